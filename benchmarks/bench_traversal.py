@@ -0,0 +1,96 @@
+# benchmarks/bench_traversal.py
+"""
+图遍历的规模测试：在 1k ~ 100k 个节点的链路与分层图（相邻层全连接）上计时，
+每一行给出总耗时和每个节点的耗时（微秒）；线性扩展时每节点耗时应大致不变。
+
+    python benchmarks/bench_traversal.py [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph.models.connection_model import ConnectionType, NodeConnection
+from graph.models.node_model import WorkflowNode
+from graph.models.utils import get_child_nodes
+from graph.models.wf_model import Workflow, WorkflowParameters
+from graph.models import wf_model_old
+
+
+def chain(n):
+    return {f"N{i}": {"main": [[NodeConnection(f"N{i + 1}", ConnectionType.MAIN, 0)]]} for i in range(n - 1)}
+
+
+def layered(n, width=4):
+    """
+    每层 width 个节点，相邻两层全连接（大量菱形结构）。
+    """
+    connections = {}
+    for i in range(n - width):
+        layer_start = (i // width + 1) * width
+        targets = range(layer_start, min(layer_start + width, n))
+        connections[f"N{i}"] = {"main": [[NodeConnection(f"N{j}", ConnectionType.MAIN, 0) for j in targets]]}
+    return connections
+
+
+def old_model(connections, n):
+    nodes = [wf_model_old.Node(f"N{i}", "processor") for i in range(n)]
+    old_connections = {
+        src: {t: [[wf_model_old.ConnectionInfo(c.node, t, c.index) for c in group] for group in groups]
+              for t, groups in types.items()}
+        for src, types in connections.items()
+    }
+    return wf_model_old.Workflow("bench", "bench", nodes, old_connections)
+
+
+def timed(fn):
+    # 与 timeit 一样在计时期间关闭 GC，避免大量存活对象引起的分代回收干扰结果
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print(f"{'case':<44}{'nodes':>8}{'total(s)':>12}{'us/node':>10}")
+    # 分层图上 get_highest_node 会把大量节点作为"最顶层"返回（结果本身与图同阶），
+    # 只比较 get_child_nodes / get_parent_nodes
+    shapes = (
+        ("chain", chain, None),
+        ("layered", layered, {"utils.get_child_nodes", "wf_model_old.get_parent_nodes"}),
+    )
+    for shape, build, only in shapes:
+        for n in sizes:
+            connections = build(n)
+            nodes = [WorkflowNode(name=f"N{i}", type="processor") for i in range(n)]
+            wf = Workflow(WorkflowParameters(id="bench", nodes=nodes, connections=connections))
+            old = old_model(connections, n)
+            last = f"N{n - 1}"
+            cases = (
+                ("utils.get_child_nodes", lambda: get_child_nodes(connections, "N0")),
+                ("wf_model.get_highest_node", lambda: wf.get_highest_node(last)),
+                ("wf_model.get_node_connection_indexes", lambda: wf.get_node_connection_indexes(last, "N0")),
+                ("wf_model_old.get_parent_nodes", lambda: old.get_parent_nodes(last)),
+            )
+            for name, fn in cases:
+                if only is not None and name not in only:
+                    continue
+                elapsed = timed(fn)
+                print(f"{shape + ' ' + name:<44}{n:>8}{elapsed:>12.4f}{elapsed / n * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
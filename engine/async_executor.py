@@ -0,0 +1,176 @@
+# engine/async_executor.py
+
+import asyncio
+import inspect
+import itertools
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .executor import WorkflowExecutor
+from .models import NodeResult, ExecutionCancelled
+from .result import ExecutionResult
+from .node_types import NodeType
+from .offload import run_in_process_async
+from .retry import RetryQueue
+from .logger import Logger
+from graph.models.wf_model_old import Node
+from graph.models.http_model import AsyncAbortSignal
+
+
+class AsyncWorkflowExecutor(WorkflowExecutor):
+    """
+    基于 asyncio 的执行器，语义与 WorkflowExecutor.execute_workflow 相同：
+      - 节点类型的 execute 若为协程（如 AsyncNodeType），直接 await；
+        同步节点在事件循环线程内直接调用（应保持轻量）；
+        cpu_bound 节点在配置了 process_pool 时交给进程池，等待期间不阻塞事件循环；
+      - 所有就绪节点作为 Task 并发运行，结果一完成即在事件循环中合并并派发就绪的子节点；
+        与并行模式相同，下游的输入顺序与 run_data 的顺序按拓扑序确定，与节点耗时无关；
+      - 重试进入延迟队列，等待期间其它节点照常运行；
+      - 传入 AsyncAbortSignal 后，abort() 会取消所有运行中的节点，执行状态为 CANCELED；
+        执行超时时同样取消所有运行中的节点；
+        调用方取消 execute_workflow 所在的 Task 时，记录执行结果并清理后继续抛出 CancelledError；
+      - 配置了检查点存储时，可用 await resume(execution_id) 恢复中断的执行。
+    多个执行可以共享同一个事件循环，而无需各自占用一个线程。
+    """
+
+    async def execute_workflow(
+        self,
+        start_node_names: Optional[List[str]] = None,
+        destination_node: Optional[str] = None,
+        start_inputs: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        execution_id: Optional[str] = None,
+        abort_signal: Optional[AsyncAbortSignal] = None,
+    ) -> ExecutionResult:
+        self.abort_signal = abort_signal
+        subgraph_nodes, node_stack = self._start_run(start_node_names, destination_node, start_inputs, execution_id)
+        if node_stack is None:
+            return self._build_result(error_msg="No valid start nodes found")
+        return await self._run_async_to_result(node_stack, subgraph_nodes)
+
+    async def resume(self, execution_id: str, abort_signal: Optional[AsyncAbortSignal] = None) -> ExecutionResult:
+        self.abort_signal = abort_signal
+        subgraph_nodes, node_stack = self._restore_run(execution_id)
+        return await self._run_async_to_result(node_stack, subgraph_nodes)
+
+    def _stack_lifo(self) -> bool:
+        return False
+
+    async def _run_async_to_result(self, node_stack: deque, subgraph_nodes: Optional[set]) -> ExecutionResult:
+        try:
+            await self._run_async(node_stack, subgraph_nodes)
+        except asyncio.CancelledError:
+            # 只有来自本次执行的 abort_signal / 超时的取消才转为 CANCELED 结果；
+            # 调用方取消外层 Task（wait_for、TaskGroup、关闭事件循环等）时照常向上传播
+            internal = self._timed_out or (self.abort_signal is not None and self.abort_signal.aborted)
+            result = self._finish_run(ExecutionCancelled("Execution was canceled"))
+            if internal:
+                return result
+            raise
+        except Exception as e:
+            return self._finish_run(e)
+        return self._finish_run()
+
+    # =============== scheduling ===============
+    async def _run_async(self, node_stack: deque, subgraph_nodes: Optional[set]) -> None:
+        seq = itertools.count()
+        pending: Dict[asyncio.Task, Tuple[int, int, Optional[List[Dict[str, Any]]], int]] = {}
+        retries = RetryQueue()
+
+        def _on_abort():
+            for task in pending:
+                task.cancel()
+
+        if self.abort_signal is not None:
+            self.abort_signal.add_event_listener(_on_abort)
+        try:
+            while node_stack or pending or retries:
+                self._check_aborted()
+                for node_id, input_data, attempt in retries.pop_due():
+                    task = asyncio.ensure_future(self._run_node_async(node_id, input_data, attempt))
+                    pending[task] = (next(seq), node_id, input_data, attempt)
+                for seq_no, node_id, input_data in self._take_ready(node_stack, seq):
+                    if self._skip_node(node_id, input_data, subgraph_nodes):
+                        continue
+                    self._before_node(node_id, input_data)
+                    attempt = self._first_attempt(node_id)
+                    task = asyncio.ensure_future(self._run_node_async(node_id, input_data, attempt))
+                    pending[task] = (seq_no, node_id, input_data, attempt)
+                if not pending:
+                    delay = self._bounded_wait(retries.next_wait())
+                    if delay:
+                        await asyncio.sleep(delay)
+                    continue
+                done, _ = await asyncio.wait(pending, timeout=self._bounded_wait(retries.next_wait()), return_when=asyncio.FIRST_COMPLETED)
+                self._check_aborted()
+                for task in sorted(done, key=lambda t: pending[t][0]):
+                    _, node_id, input_data, attempt = pending.pop(task)
+                    outcome = task.result()
+                    if isinstance(outcome, NodeResult):
+                        node_stack.extend(self._commit_result(node_id, outcome, subgraph_nodes))
+                    else:
+                        self._schedule_retry(retries, outcome, node_id, input_data, attempt + 1)
+        finally:
+            if self.abort_signal is not None:
+                self.abort_signal.remove_event_listener(_on_abort)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _on_deadline(self) -> None:
+        # 运行中的节点 Task 在 _run_async 退出时被取消；这里只通知 abort_signal 的监听者
+        self._timed_out = True
+        signal = self.abort_signal
+        if signal is not None and not signal.aborted:
+            Logger.warning("Execution deadline of %ss reached; aborting.", self.timeout, extra={})
+            asyncio.ensure_future(signal.abort())
+
+    async def _run_node_async(
+        self,
+        node_id: int,
+        input_data: Optional[List[Dict[str, Any]]],
+        attempt: int = 1,
+    ) -> Union[NodeResult, float]:
+        current_node = self.plan.nodes[node_id]
+        node_logic = self._get_node_type_logic(current_node)
+        if self._log_debug:
+            Logger.debug("Node '%s' logic type: %s, try #%d", current_node.name, node_logic.__class__.__name__, attempt, extra={})
+        started = time.time()
+        perf_started = time.perf_counter()
+        # 协程在等待期间会让出线程，无法按线程统计 CPU 时间，profiler 中记为 None
+        try:
+            cache_key, result = self._cache_lookup(current_node, node_logic, input_data)
+            if result is None:
+                result = await self._run_node_logic_impl_async(current_node, node_logic, input_data)
+                self._cache_store(cache_key, result)
+        except ExecutionCancelled:
+            raise
+        except Exception as e:
+            outcome = self._handle_node_error(current_node, e, attempt)
+            if not isinstance(outcome, NodeResult):
+                self._profile(current_node, attempt, perf_started, None, input_data, None)
+                return outcome
+            result = outcome
+        result.start_time = started
+        result.execution_time = time.time() - started
+        self._profile(current_node, attempt, perf_started, None, input_data, result)
+        return result
+
+    async def _run_node_logic_impl_async(
+        self,
+        node: Node,
+        node_logic: NodeType,
+        input_data: Optional[List[Dict[str, Any]]]
+    ) -> NodeResult:
+        result = self._static_node_result(node, node_logic, input_data)
+        if result is not None:
+            return result
+        if self._log_debug:
+            Logger.debug("Node '%s' awaiting node_logic.execute() with %d items", node.name, len(input_data or []), extra={})
+        if node_logic.cpu_bound and self.process_pool is not None:
+            return await run_in_process_async(self.process_pool, node_logic, self._build_context(node, input_data))
+        result = node_logic.execute(self._build_context(node, input_data))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
@@ -0,0 +1,162 @@
+# engine/batch.py
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .executor import WorkflowExecutor
+from .hooks import HookManager
+from .models import ExecutionStatus
+from .plan import CompiledWorkflowPlan
+from .result import ExecutionResult
+from .registry import NodeTypeRegistry
+from graph.models.wf_model_old import Workflow
+
+StartInputs = Dict[str, List[Dict[str, Any]]]
+
+
+@dataclass
+class BatchStats:
+    """
+    execute_many 的累计统计。
+    """
+    submitted: int = 0
+    completed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    total_execution_time: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at or time.time()
+        return end - self.started_at if self.started_at else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """每秒完成的执行数。"""
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def avg_execution_time(self) -> float:
+        return self.total_execution_time / self.completed if self.completed else 0.0
+
+
+class BatchExecution:
+    """
+    execute_many 的返回值：迭代时按输入顺序流式产出每次执行的结果，
+    同时在 stats 中累计吞吐量等统计。输入是惰性读取的，
+    同时在途的执行数不超过 concurrency 的两倍。
+    """
+
+    def __init__(
+        self,
+        workflow: Workflow,
+        inputs: Iterable[Any],
+        concurrency: int = 1,
+        start_node_names: Optional[List[str]] = None,
+        mode: str = "trigger",
+        global_config: Optional[Dict[str, Any]] = None,
+        node_types: Optional[NodeTypeRegistry] = None,
+        hook_manager: Optional[HookManager] = None,
+        to_start_inputs: Optional[Callable[[Any], StartInputs]] = None,
+        **executor_kwargs: Any,
+    ):
+        self.workflow = workflow
+        self.inputs = inputs
+        self.concurrency = max(1, concurrency)
+        self.mode = mode
+        self.global_config = global_config if global_config is not None else {}
+        self.hook_manager = hook_manager if hook_manager is not None else HookManager()
+        self.to_start_inputs = to_start_inputs
+        self.executor_kwargs = executor_kwargs
+        self.stats = BatchStats()
+        self._stats_lock = threading.Lock()
+
+        # 图分析与起点只计算一次，所有执行共享
+        self.plan = CompiledWorkflowPlan.for_workflow(workflow, node_types)
+        if start_node_names:
+            self.start_node_names = list(start_node_names)
+        else:
+            self.start_node_names = [
+                self.plan.names[i] for i in self.plan.start_candidate_ids if not self.plan.nodes[i].disabled
+            ]
+
+    def __iter__(self) -> Iterator[ExecutionResult]:
+        self.stats.started_at = time.time()
+        try:
+            if self.concurrency == 1:
+                for payload in self.inputs:
+                    self.stats.submitted += 1
+                    yield self._run_one(payload)
+            else:
+                yield from self._run_pooled()
+        finally:
+            self.stats.finished_at = time.time()
+
+    def _run_pooled(self) -> Iterator[ExecutionResult]:
+        window: deque[Future] = deque()
+        max_in_flight = self.concurrency * 2
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="wf-batch") as pool:
+            for payload in self.inputs:
+                self.stats.submitted += 1
+                window.append(pool.submit(self._run_one, payload))
+                if len(window) >= max_in_flight:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+
+    def _payload_to_start_inputs(self, payload: Any) -> StartInputs:
+        if self.to_start_inputs is not None:
+            return self.to_start_inputs(payload)
+        items = payload if isinstance(payload, list) else [payload]
+        return {nm: items for nm in self.start_node_names}
+
+    def _run_one(self, payload: Any) -> ExecutionResult:
+        executor = WorkflowExecutor(
+            self.workflow,
+            mode=self.mode,
+            global_config=dict(self.global_config),
+            plan=self.plan,
+            hook_manager=self.hook_manager,
+            **self.executor_kwargs,
+        )
+        result = executor.execute_workflow(
+            start_node_names=self.start_node_names,
+            start_inputs=self._payload_to_start_inputs(payload),
+        )
+        with self._stats_lock:
+            self.stats.completed += 1
+            if executor.status == ExecutionStatus.SUCCESS:
+                self.stats.succeeded += 1
+            else:
+                self.stats.failed += 1
+            self.stats.total_execution_time += executor.end_time - executor.start_time
+        return result
+
+
+def execute_many(
+    workflow: Workflow,
+    inputs: Iterable[Any],
+    concurrency: int = 1,
+    **kwargs: Any,
+) -> BatchExecution:
+    """
+    用同一个工作流批量执行多份触发数据（例如回填）：
+
+        batch = execute_many(wf, payloads, concurrency=8)
+        for result in batch:
+            ...
+        print(batch.stats.throughput)
+
+    每份 payload 是一个 item（dict）或 item 列表，送入所有起点节点；
+    也可以通过 to_start_inputs 自定义 payload => {节点名: items} 的映射。
+    执行计划、起点与 HookManager 在所有执行间共享，每次执行使用 global_config 的浅拷贝。
+    其余关键字参数（start_node_names、mode、node_types、max_workers 等）透传。
+    """
+    return BatchExecution(workflow, inputs, concurrency=concurrency, **kwargs)
@@ -0,0 +1,120 @@
+# engine/cache.py
+
+import hashlib
+import json
+import pickle
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+from .columnar import ColumnarBatch
+from .models import NodeResult
+from graph.models.wf_model_old import Node
+
+CacheKey = Tuple[str, str, int, str, str, str]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, ColumnarBatch):
+        return value.to_items()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def stable_hash(value: Any) -> str:
+    """
+    与 dict 键顺序无关的内容哈希（JSON 规范化后取 blake2b）。
+    """
+    text = json.dumps(value, sort_keys=True, default=_json_default, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class NodeOutputCache:
+    """
+    节点输出缓存，用于编辑后的增量重跑：键为
+    (节点名, 节点类型, 类型版本, 参数哈希, 输入 item 哈希, 执行模式)，值为此前的 NodeResult。
+    节点名是键的一部分：内置类型会把节点名写入输出（processedBy 等），
+    类型、参数与输入都相同的两个兄弟节点不能共享结果。
+    按 LRU 淘汰，同时限制条目数 max_entries 与估算的总字节数 max_bytes
+    （按 pickle 后的大小估算；无法 pickle 的结果不缓存）。
+
+    可在多次执行、多个执行器之间共享（线程安全）：
+
+        cache = NodeOutputCache()
+        WorkflowExecutor(wf, cache=cache).execute_workflow()
+        # 修改最后一个节点的参数后重跑：上游节点直接复用缓存
+        WorkflowExecutor(wf, cache=cache).execute_workflow()
+
+    缓存的输出与后续执行共享同一批 item，节点不应原地修改输入 item。
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, Tuple[NodeResult, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @staticmethod
+    def key_for(node: Node, input_data: Optional[List[Dict[str, Any]]], mode: str) -> CacheKey:
+        return (
+            node.name,
+            node.type,
+            node.type_version,
+            stable_hash(node.parameters),
+            stable_hash(input_data or []),
+            mode,
+        )
+
+    def get(self, key: CacheKey) -> Optional[NodeResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, result: NodeResult) -> bool:
+        """
+        缓存一个成功的结果；结果过大或无法估算大小时返回 False。
+        """
+        if result.error is not None:
+            return False
+        try:
+            size = len(pickle.dumps(result.data, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return False
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
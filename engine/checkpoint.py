@@ -0,0 +1,247 @@
+# engine/checkpoint.py
+
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+# 事件：
+#   ("node", 节点名, NodeResult, 消耗的栈条目节点名或 None)  节点完成并提交结果
+#   ("retry", 节点名, 下一次尝试序号)                         节点失败，已安排重试
+Event = Tuple[Any, ...]
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+@dataclass
+class CheckpointState:
+    """
+    从存储中读回的一次执行：begin() 时的元数据、按顺序的事件，以及结束状态（未结束为 None）。
+    """
+    execution_id: str
+    meta: Dict[str, Any]
+    events: List[Event] = field(default_factory=list)
+    status: Optional[str] = None
+
+
+class CheckpointStore:
+    """
+    执行检查点存储的接口。执行器在开始时调用 begin() 写入初始状态（起点栈、子图等），
+    之后每个节点完成时 append() 一个增量事件，结束时 finish()；
+    resume() 通过 load() 读回初始状态并按顺序重放事件，恢复 run_data / waitingData / 节点栈。
+
+    discard_on_success=True（默认）时，成功结束的执行直接删除其检查点。
+    """
+
+    def __init__(self, discard_on_success: bool = True):
+        self.discard_on_success = discard_on_success
+
+    def begin(self, execution_id: str, meta: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def append(self, execution_id: str, event: Event) -> None:
+        raise NotImplementedError
+
+    def finish(self, execution_id: str, status: str) -> None:
+        raise NotImplementedError
+
+    def load(self, execution_id: str) -> Optional[CheckpointState]:
+        raise NotImplementedError
+
+    def delete(self, execution_id: str) -> None:
+        raise NotImplementedError
+
+    def unfinished(self) -> List[str]:
+        """
+        尚未结束（进程在执行中退出）的执行 id。
+        """
+        raise NotImplementedError
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    每个执行一个只追加的文件 <directory>/<execution_id>.ckpt，每个事件写为一帧
+    （4 字节长度 + pickle）。写入时 flush，fsync=True 时再 fsync（可抵御断电，但更慢）。
+    进程在写入中途退出时，末尾不完整的帧在读取时被忽略。
+    """
+
+    SUFFIX = ".ckpt"
+
+    def __init__(self, directory: str, fsync: bool = False, discard_on_success: bool = True):
+        super().__init__(discard_on_success)
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._files: Dict[str, IO[bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, execution_id: str) -> str:
+        return os.path.join(self.directory, execution_id + self.SUFFIX)
+
+    def _write(self, execution_id: str, frame: Any) -> None:
+        payload = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            f = self._files.get(execution_id)
+            if f is None:
+                f = self._files[execution_id] = open(self._path(execution_id), "ab")
+            f.write(_FRAME_HEADER.pack(len(payload)) + payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _close(self, execution_id: str) -> None:
+        with self._lock:
+            f = self._files.pop(execution_id, None)
+        if f is not None:
+            f.close()
+
+    def begin(self, execution_id: str, meta: Dict[str, Any]) -> None:
+        self._close(execution_id)
+        with open(self._path(execution_id), "wb"):
+            pass
+        self._write(execution_id, ("begin", meta))
+
+    def append(self, execution_id: str, event: Event) -> None:
+        self._write(execution_id, event)
+
+    def finish(self, execution_id: str, status: str) -> None:
+        if status == "SUCCESS" and self.discard_on_success:
+            self.delete(execution_id)
+            return
+        self._write(execution_id, ("end", status))
+        self._close(execution_id)
+
+    def load(self, execution_id: str) -> Optional[CheckpointState]:
+        try:
+            with open(self._path(execution_id), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        state: Optional[CheckpointState] = None
+        pos, size = 0, len(data)
+        while pos + _FRAME_HEADER.size <= size:
+            (length,) = _FRAME_HEADER.unpack_from(data, pos)
+            start = pos + _FRAME_HEADER.size
+            if start + length > size:
+                break  # 未写完的末尾帧
+            frame = pickle.loads(data[start:start + length])
+            pos = start + length
+            if frame[0] == "begin":
+                state = CheckpointState(execution_id, frame[1])
+            elif state is None:
+                break
+            elif frame[0] == "end":
+                state.status = frame[1]
+            else:
+                state.events.append(frame)
+        return state
+
+    def delete(self, execution_id: str) -> None:
+        self._close(execution_id)
+        try:
+            os.remove(self._path(execution_id))
+        except FileNotFoundError:
+            pass
+
+    def unfinished(self) -> List[str]:
+        ids = []
+        for fname in sorted(os.listdir(self.directory)):
+            if fname.endswith(self.SUFFIX):
+                execution_id = fname[:-len(self.SUFFIX)]
+                state = self.load(execution_id)
+                if state is not None and state.status is None:
+                    ids.append(execution_id)
+        return ids
+
+    def close(self) -> None:
+        with self._lock:
+            files, self._files = self._files, {}
+        for f in files.values():
+            f.close()
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    SQLite 存储（WAL 模式）：executions 表保存元数据与结束状态，
+    events 表每个事件一行，每次 append() 只插入一行并提交。
+    path 为 ":memory:" 时仅在当前进程内有效（用于测试）。
+    """
+
+    def __init__(self, path: str, discard_on_success: bool = True):
+        super().__init__(discard_on_success)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS executions ("
+                "execution_id TEXT PRIMARY KEY, meta BLOB NOT NULL, status TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "execution_id TEXT NOT NULL, seq INTEGER NOT NULL, payload BLOB NOT NULL, "
+                "PRIMARY KEY (execution_id, seq))"
+            )
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def begin(self, execution_id: str, meta: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM events WHERE execution_id = ?", (execution_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO executions (execution_id, meta, status) VALUES (?, ?, NULL)",
+                (execution_id, self._dumps(meta)),
+            )
+
+    def append(self, execution_id: str, event: Event) -> None:
+        payload = self._dumps(event)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO events (execution_id, seq, payload) VALUES "
+                "(?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM events WHERE execution_id = ?), ?)",
+                (execution_id, execution_id, payload),
+            )
+
+    def finish(self, execution_id: str, status: str) -> None:
+        if status == "SUCCESS" and self.discard_on_success:
+            self.delete(execution_id)
+            return
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE executions SET status = ? WHERE execution_id = ?", (status, execution_id))
+
+    def load(self, execution_id: str) -> Optional[CheckpointState]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT meta, status FROM executions WHERE execution_id = ?", (execution_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            events = self._conn.execute(
+                "SELECT payload FROM events WHERE execution_id = ? ORDER BY seq", (execution_id,)
+            ).fetchall()
+        return CheckpointState(
+            execution_id, pickle.loads(row[0]), [pickle.loads(p) for (p,) in events], row[1]
+        )
+
+    def delete(self, execution_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM events WHERE execution_id = ?", (execution_id,))
+            self._conn.execute("DELETE FROM executions WHERE execution_id = ?", (execution_id,))
+
+    def unfinished(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT execution_id FROM executions WHERE status IS NULL ORDER BY execution_id"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
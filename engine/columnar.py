@@ -0,0 +1,210 @@
+# engine/columnar.py
+
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("ColumnarBatch requires numpy (pip install numpy)")
+
+
+def _scalar(value: Any) -> Any:
+    # numpy 标量转回 Python 原生类型，保证行视图与 dict item 一致
+    return value.item() if np is not None and isinstance(value, np.generic) else value
+
+
+# 只有单一原生类型的字段存为定长数组；int 与 float 混合时 numpy 会把 int 转为 float，
+# 行视图中 1 变成 1.0，因此与其它混合类型一样使用 object 数组
+_NATIVE_TYPES = ({int}, {float}, {bool}, {str})
+
+
+def _column_from_values(values: List[Any], valid: "np.ndarray") -> "np.ndarray":
+    n = len(valid)
+    present = [v for v, ok in zip(values, valid) if ok]
+    arr = None
+    if present and {type(v) for v in present} in _NATIVE_TYPES:
+        try:
+            arr = np.asarray(present)
+        except OverflowError:
+            arr = None
+    if arr is None:
+        # 嵌套 / 混合类型的字段使用 object 数组，保持原始 Python 对象
+        col = np.empty(n, dtype=object)
+        col[:] = [v if ok else None for v, ok in zip(values, valid)]
+        return col
+    col = np.zeros(n, dtype=arr.dtype)
+    col[valid] = arr
+    return col
+
+
+class ColumnarBatch(Sequence):
+    """
+    列式 item 批次（需要 numpy）：每个字段一个数组，外加有效性掩码
+    （masks[field][i] 为 False 表示第 i 个 item 没有该字段）。
+
+    可直接作为 NodeResult.data 中的一个输出：它是 item 的 Sequence，
+    按下标 / 迭代访问时才惰性构建对应的 dict，因此不理解列式数据的节点照常工作；
+    理解它的节点（NodeType 默认实现、SwitchNodeType、ConditionNodeType）则按列向量化处理。
+    执行器在单输入连接之间原样传递批次，不会展开为 dict 列表。
+    """
+
+    def __init__(
+        self,
+        columns: Mapping[str, Any],
+        masks: Optional[Mapping[str, Any]] = None,
+        length: Optional[int] = None,
+    ):
+        _require_numpy()
+        self.columns: Dict[str, "np.ndarray"] = {k: np.asarray(v) for k, v in columns.items()}
+        if length is None:
+            length = len(next(iter(self.columns.values()))) if self.columns else 0
+        self.length = length
+        # 全部有效的字段不保存掩码
+        self.masks: Dict[str, "np.ndarray"] = {}
+        for k, m in (masks or {}).items():
+            m = np.asarray(m, dtype=bool)
+            if not m.all():
+                self.masks[k] = m
+        for k, col in self.columns.items():
+            if len(col) != length:
+                raise ValueError(f"Column '{k}' has length {len(col)}, expected {length}")
+
+    # =============== 构造 ===============
+    @classmethod
+    def from_items(cls, items: Iterable[Mapping[str, Any]]) -> "ColumnarBatch":
+        _require_numpy()
+        items = list(items)
+        fields: Dict[str, None] = {}
+        for item in items:
+            for k in item:
+                fields.setdefault(k, None)
+        columns, masks = {}, {}
+        for k in fields:
+            valid = np.fromiter((k in item for item in items), dtype=bool, count=len(items))
+            columns[k] = _column_from_values([item.get(k) for item in items], valid)
+            masks[k] = valid
+        return cls(columns, masks, length=len(items))
+
+    @classmethod
+    def concat(cls, batches: Iterable["ColumnarBatch"]) -> "ColumnarBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls({}, length=0)
+        if len(batches) == 1:
+            return batches[0]
+        fields: Dict[str, None] = {}
+        for b in batches:
+            for k in b.columns:
+                fields.setdefault(k, None)
+        columns, masks = {}, {}
+        for k in fields:
+            parts, valid = [], []
+            for b in batches:
+                if k in b.columns:
+                    parts.append(b.columns[k])
+                    valid.append(b.mask(k))
+                else:
+                    parts.append(np.empty(len(b), dtype=object))
+                    valid.append(np.zeros(len(b), dtype=bool))
+            if len({p.dtype.kind for p in parts}) > 1:
+                # 不同类型的列（如 int 与 float）拼接时同样改用 object，避免类型提升改变原值
+                parts = [p.astype(object) for p in parts]
+            columns[k] = np.concatenate(parts)
+            masks[k] = np.concatenate(valid)
+        return cls(columns, masks, length=sum(len(b) for b in batches))
+
+    # =============== Sequence（dict 行视图） ===============
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return self.take(np.arange(self.length)[index])
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        row = {}
+        for k, col in self.columns.items():
+            m = self.masks.get(k)
+            if m is None or m[index]:
+                row[k] = _scalar(col[index])
+        return row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.length):
+            yield self[i]
+
+    def to_items(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<ColumnarBatch rows={self.length}, columns={list(self.columns)}>"
+
+    # =============== 列操作 ===============
+    def mask(self, field: str) -> "np.ndarray":
+        """
+        字段的有效性掩码（没有该字段时全部为 False）。
+        """
+        if field not in self.columns:
+            return np.zeros(self.length, dtype=bool)
+        m = self.masks.get(field)
+        return m if m is not None else np.ones(self.length, dtype=bool)
+
+    def take(self, selector: Any) -> "ColumnarBatch":
+        """
+        按布尔掩码或下标数组选取行。
+        """
+        selector = np.asarray(selector)
+        length = int(selector.sum()) if selector.dtype == bool else len(selector)
+        columns = {k: col[selector] for k, col in self.columns.items()}
+        masks = {k: m[selector] for k, m in self.masks.items()}
+        return ColumnarBatch(columns, masks, length=length)
+
+    def with_constant(self, **values: Any) -> "ColumnarBatch":
+        """
+        返回增加（或覆盖）常量列后的新批次；已有的列数组共享，不复制。
+        """
+        columns = dict(self.columns)
+        masks = dict(self.masks)
+        for k, v in values.items():
+            columns[k] = np.full(self.length, v)
+            masks.pop(k, None)
+        return ColumnarBatch(columns, masks, length=self.length)
+
+    def equals(self, field: str, value: Any) -> "np.ndarray":
+        if field not in self.columns:
+            return np.zeros(self.length, dtype=bool)
+        col = self.columns[field]
+        if col.dtype.kind == "O":
+            eq = np.fromiter((v == value for v in col), dtype=bool, count=self.length)
+        else:
+            eq = np.asarray(col == value, dtype=bool)
+            if eq.shape != col.shape:  # 类型不可比较时 numpy 返回标量 False
+                eq = np.zeros(self.length, dtype=bool)
+        return self.mask(field) & eq
+
+    def truthy(self, field: str) -> "np.ndarray":
+        if field not in self.columns:
+            return np.zeros(self.length, dtype=bool)
+        col = self.columns[field]
+        if col.dtype.kind == "U":
+            return self.mask(field) & (col != "")
+        if col.dtype.kind == "O":
+            return self.mask(field) & np.fromiter((bool(v) for v in col), dtype=bool, count=self.length)
+        return self.mask(field) & col.astype(bool)
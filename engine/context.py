@@ -1,9 +1,14 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
+
+from .models import ExecutionCancelled
+from graph.models.http_model import ThreadedAbortSignal, AsyncAbortSignal
 
 
 class NodeExecutionContext:
     """
     为节点执行时提供的上下文：包括输入数据、全局配置、执行模式等。
+    abort_signal：执行被取消（或超时）时置为 aborted，长时间运行的节点应定期调用 check_aborted()。
+    parameters：节点参数（node.parameters）。
     """
     def __init__(
         self,
@@ -11,6 +16,8 @@ class NodeExecutionContext:
         input_data: Optional[List[Dict[str, Any]]],
         mode: str = "manual",
         global_config: Optional[Dict[str, Any]] = None,
+        abort_signal: Optional[Union[ThreadedAbortSignal, AsyncAbortSignal]] = None,
+        parameters: Optional[Dict[str, Any]] = None,
     ):
         self.node_name = node_name
         self.input_data = input_data or []
@@ -19,6 +26,15 @@ class NodeExecutionContext:
             self.global_config = {}
         else:
             self.global_config = global_config
+        self.abort_signal = abort_signal
+        self.parameters = parameters if parameters is not None else {}
+
+    def check_aborted(self) -> None:
+        """
+        执行已被取消时抛出 ExecutionCancelled（执行器不会把它当作节点错误重试）。
+        """
+        if self.abort_signal is not None and self.abort_signal.aborted:
+            raise ExecutionCancelled("Execution was canceled", node_name=self.node_name)
 
     def __repr__(self):
         return f"<NodeExecutionContext node={self.node_name}, input_items={len(self.input_data)}>"
@@ -1,16 +1,39 @@
-from typing import Any, Dict, List, Optional, Tuple, Union
-from collections import defaultdict, deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+import asyncio
+import inspect
+import itertools
+import logging
+import threading
 import time
+import uuid
 
-from .models import NodeResult, ExecutionStatus, ExecutionError
+from .models import NodeResult, ExecutionStatus, ExecutionError, ExecutionCancelled
 from .context import NodeExecutionContext
-from .node_types import NodeType, SwitchNodeType, ProducerNodeType
+from .node_types import NodeType
+from .plan import CompiledWorkflowPlan
+from .registry import NodeTypeRegistry
+from .offload import run_in_process
+from .result import ExecutionResult
+from .columnar import ColumnarBatch
+from .retention import RetentionPolicy
+from .retry import RetryPolicy, RetryQueue
+from .profiler import Profiler
+from .cache import NodeOutputCache, CacheKey
+from .checkpoint import CheckpointStore
 from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.data_model import NodeExecutionData
+from graph.models.http_model import ThreadedAbortSignal, AsyncAbortSignal
 
 from .logger import Logger
 from .hooks import HookManager
 
 
+# _commit_result 的 consumed 默认值：消耗的栈条目就是该节点自身
+_SELF = -1
+
+
 class ErrorPolicy:
     STOP_WORKFLOW = "stopWorkflow"
     CONTINUE_ON_FAIL = "continueOnFail"
@@ -27,7 +50,35 @@ class WorkflowExecutor:
     4) 可指定 destination_node，仅执行该节点及其所有上游子图。
     5) 节点错误策略：通过 onError、maxRetries、retryDelay、errorOutputIndex 控制，
        支持 stopWorkflow、continueOnFail、retryOnFail、errorOutput 四种策略。
-    6) 内置日志记录与钩子调用，便于调试、监控与前端反馈。
+       重试按 RetryPolicy（指数退避、抖动、最大等待）放入延迟队列，由调度循环唤醒，
+       等待期间不阻塞其它就绪节点。
+    6) 内置日志记录与钩子调用，便于调试、监控与前端反馈；debug 日志的级别判断在构造时缓存。
+    7) 图分析结果（CompiledWorkflowPlan）按工作流版本缓存，多次执行共享同一计划。
+    8) 节点类型通过 NodeTypeRegistry 解析（默认 default_registry），插件可自行注册。
+    9) max_workers > 1 时启用并行模式：所有就绪节点同时派发到线程池执行，结果一完成即合并。
+       同一输入上的多个上游输出按上游节点的拓扑序（plan.topo_rank）合并，执行结束时 run_data
+       也按该顺序排列，因此下游的输入顺序与 run_data 的顺序与节点耗时无关。
+    10) 传入 process_pool（如 ProcessPoolExecutor）后，cpu_bound 节点在进程池中执行。
+    11) streaming=True 时，连续的可流式节点（线性链路）按 stream_chunk_size 分块流水执行，
+        中间节点不物化输出（run_data 中只记录 item 数），峰值内存与块大小相关。
+    12) run_data 的保留由 RetentionPolicy 决定（KeepAll / KeepLastRun / KeepSinkNodes /
+        SampleItems / SpillToDisk）；未指定时按 workflow.settings 的 save_data_* 设置选择。
+    13) 传入 Profiler 后，记录每个节点每次尝试的耗时、CPU 时间与 item 吞吐。
+    14) 传入 NodeOutputCache 后，cacheable 节点在节点名、类型、参数与输入都未变化时直接复用此前的输出，
+        编辑某个节点后重跑只需重新计算受影响的节点。
+    15) 工作流的固定数据（workflow.pin_data）：被固定的节点视为已执行，直接输出固定的 item
+        （run_data 中标记 pinned），只为其提供输入的上游子图整体跳过。
+        默认仅在 manual 模式下生效，可用 use_pin_data 显式开关。
+    16) 传入 CheckpointStore（FileCheckpointStore / SQLiteCheckpointStore）后，每个节点完成时
+        增量写入检查点；进程崩溃后可用新的执行器 resume(execution_id) 从最后完成的节点继续，
+        已完成的节点不会重新执行。
+    17) 执行超时：timeout 参数（秒），未指定时取 workflow.settings.execution_timeout（<= 0 表示不限）。
+        每次执行有各自的截止时间与 abort_signal：调度循环在节点之间检查截止时间，
+        到期时触发 abort_signal，运行中的节点应通过 context.check_aborted() 协作退出；
+        超时的执行状态为 CANCELED。
+    18) main 连接存在环的工作流在编译计划时即被拒绝（CycleError），不会在运行时死循环。
+        计划中的拓扑分层用于：并行模式与异步执行器中同时就绪的节点按层派发；部分执行的起点按层排序；
+        waitingData 每次执行按节点 id 预分配槽位。
     """
 
     def __init__(
@@ -35,326 +86,976 @@ class WorkflowExecutor:
         workflow: Workflow,
         mode: str = "manual",
         global_config: Optional[Dict[str, Any]] = None,
+        plan: Optional[CompiledWorkflowPlan] = None,
+        node_types: Optional[NodeTypeRegistry] = None,
+        max_workers: int = 1,
+        process_pool: Optional[Executor] = None,
+        hook_manager: Optional[HookManager] = None,
+        streaming: bool = False,
+        stream_chunk_size: int = 1000,
+        retention: Optional[RetentionPolicy] = None,
+        profiler: Optional[Profiler] = None,
+        cache: Optional[NodeOutputCache] = None,
+        use_pin_data: Optional[bool] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        timeout: Optional[float] = None,
     ):
         self.workflow = workflow
         self.mode = mode
         self.global_config = global_config if global_config is not None else {}
         self.status: ExecutionStatus = ExecutionStatus.NEW
+        self.max_workers = max_workers
+        self.process_pool = process_pool
+        self.streaming = streaming
+        self.stream_chunk_size = max(1, stream_chunk_size)
 
         self.run_data: Dict[str, List[NodeResult]] = {}
+        self.retention = retention if retention is not None else RetentionPolicy.from_settings(
+            getattr(workflow, "settings", None)
+        )
+        self.destination_node: Optional[str] = None
+        self.profiler = profiler
+        self.cache = cache
+        self.use_pin_data = mode == "manual" if use_pin_data is None else use_pin_data
+        # 本次执行中生效的固定数据：节点名 -> item 列表
+        self._pinned: Dict[str, List[Dict[str, Any]]] = {}
+        self.checkpoint = checkpoint
+        self.execution_id: Optional[str] = None
+        # resume 时尚在重试中的节点：node_id -> 下一次尝试序号
+        self._resume_attempts: Dict[int, int] = {}
 
         self.start_time: float = 0
         self.end_time: float = 0
 
-        self.waitingData: Dict[str, Dict[int, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+        # 等待合并的输入：waitingData[node_id][inputIndex] => [(上游拓扑序, items), ...]，每次执行按节点数预分配
+        self.waitingData: List[Optional[Dict[int, List[Tuple[int, List[Dict[str, Any]]]]]]] = []
 
-        self.inputRequirements: Dict[str, int] = {}
-        self._calculate_input_requirements()
+        self.abort_signal: Optional[Union[ThreadedAbortSignal, AsyncAbortSignal]] = None
+        if timeout is None:
+            timeout = getattr(getattr(workflow, "settings", None), "execution_timeout", None)
+        self.timeout: Optional[float] = timeout if timeout and timeout > 0 else None
+        self._deadline: Optional[float] = None
+        self._deadline_timer: Optional[threading.Timer] = None
+        self._timed_out = False
 
-        self.hook_manager = HookManager()
-
-        Logger.info("WorkflowExecutor initialized.", extra={"mode": self.mode, "workflow_id": self.workflow.id})
+        self.plan = plan if plan is not None else CompiledWorkflowPlan.for_workflow(workflow, node_types)
+        self.inputRequirements: Dict[str, int] = self.plan.input_requirements_by_name
+        self._reset_waiting()
 
-    def _calculate_input_requirements(self):
-        Logger.debug("Calculating input requirements...", extra={})
-        from collections import defaultdict
-        dest_map: Dict[str, set] = defaultdict(set)
+        self.hook_manager = hook_manager if hook_manager is not None else HookManager()
 
-        for srcNode, connTypes in self.workflow.connections_by_source_node.items():
-            mainConns = connTypes.get("main", [])
-            for outIdx, connInfos in enumerate(mainConns):
-                for cInfo in connInfos:
-                    dest_map[cInfo.node].add(cInfo.index)
+        # 级别判断在构造时缓存，热路径上关闭的 debug 日志不产生任何格式化开销
+        self._log_debug = Logger.is_enabled_for(logging.DEBUG)
 
-        for nodeName, idxSet in dest_map.items():
-            self.inputRequirements[nodeName] = len(idxSet)
-            Logger.debug(f"Node '{nodeName}' requires {len(idxSet)} input(s).", extra={})
+        Logger.info("WorkflowExecutor initialized.", extra={"mode": self.mode, "workflow_id": self.workflow.id})
 
     def execute_workflow(
         self,
         start_node_names: Optional[List[str]] = None,
         destination_node: Optional[str] = None,
-        start_inputs: Optional[Dict[str, List[Dict[str, Any]]]] = None  # 新增参数
-    ) -> Dict[str, Any]:
+        start_inputs: Optional[Dict[str, List[Dict[str, Any]]]] = None,  # 新增参数
+        execution_id: Optional[str] = None,
+        abort_signal: Optional[ThreadedAbortSignal] = None,
+    ) -> ExecutionResult:
+        self.abort_signal = self._run_abort_signal(abort_signal)
+        subgraph_nodes, node_stack = self._start_run(start_node_names, destination_node, start_inputs, execution_id)
+        if node_stack is None:
+            return self._build_result(error_msg="No valid start nodes found")
+        return self._run(node_stack, subgraph_nodes)
+
+    def resume(self, execution_id: str, abort_signal: Optional[ThreadedAbortSignal] = None) -> ExecutionResult:
+        """
+        从检查点恢复一次中断（或失败）的执行：重放已完成节点的结果，重建 run_data、
+        waitingData 与节点栈，然后只执行尚未完成的节点。失败的节点会重新执行。
+        执行器需使用与原执行相同的工作流和检查点存储。超时从恢复时重新计时。
+        """
+        self.abort_signal = self._run_abort_signal(abort_signal)
+        subgraph_nodes, node_stack = self._restore_run(execution_id)
+        return self._run(node_stack, subgraph_nodes)
+
+    def _run_abort_signal(self, abort_signal: Optional[ThreadedAbortSignal]) -> Optional[ThreadedAbortSignal]:
+        """
+        本次执行的取消信号：调用方传入的信号，或设置了超时时新建一个（到期时由定时器触发）。
+        两者都没有时为 None，节点的逐 item 循环因此无需检查取消。
+        """
+        if abort_signal is not None:
+            return abort_signal
+        return ThreadedAbortSignal() if self.timeout is not None else None
+
+    def _run(self, node_stack: deque, subgraph_nodes: Optional[set]) -> ExecutionResult:
+        try:
+            if self.max_workers > 1:
+                self._run_parallel(node_stack, subgraph_nodes)
+            else:
+                self._run_sequential(node_stack, subgraph_nodes)
+        except Exception as e:
+            return self._finish_run(e)
+        return self._finish_run()
+
+    def _start_run(
+        self,
+        start_node_names: Optional[List[str]],
+        destination_node: Optional[str],
+        start_inputs: Optional[Dict[str, List[Dict[str, Any]]]],
+        execution_id: Optional[str] = None,
+    ) -> Tuple[Optional[set], Optional[deque]]:
+        """
+        初始化一次执行：计算子图与初始节点栈。找不到起点时返回的节点栈为 None。
+        """
         Logger.info("Starting Workflow Execution.", extra={"mode": self.mode, "destination_node": destination_node})
         self.status = ExecutionStatus.RUNNING
         self.start_time = time.time()
+        self.destination_node = destination_node
+        self._reset_waiting()
 
         self.hook_manager.run_hook("workflowExecuteBefore", workflow=self.workflow, start_time=self.start_time)
 
         subgraph_nodes = None
         if destination_node:
             subgraph_nodes = self._find_ancestors_including(destination_node)
-            Logger.debug("Subgraph computed.", extra={"destination_node": destination_node, "subgraph_nodes": list(subgraph_nodes)})
+            if self._log_debug:
+                Logger.debug("Subgraph computed.", extra={"destination_node": destination_node, "subgraph_nodes": list(subgraph_nodes)})
+
+        self._pinned = self._active_pin_data()
+        if self._pinned:
+            subgraph_nodes = self._pinned_subgraph(destination_node)
+            Logger.info("Using pinned data.", extra={"pinned_nodes": list(self._pinned), "subgraph_nodes": len(subgraph_nodes)})
 
-        node_stack: deque[Tuple[Node, Optional[List[Dict[str, Any]]]]] = deque()
+        plan = self.plan
+        node_stack: deque[Tuple[int, Optional[List[Dict[str, Any]]]]] = deque()
 
         if start_node_names:
-            Logger.debug("Using provided start_node_names.", extra={"start_node_names": start_node_names})
+            if self._log_debug:
+                Logger.debug("Using provided start_node_names.", extra={"start_node_names": start_node_names})
             for nm in start_node_names:
-                n_obj = self.workflow.get_node(nm)
-                if not n_obj:
+                node_id = plan.index.get(nm)
+                if node_id is None:
                     continue
                 if subgraph_nodes and nm not in subgraph_nodes:
-                    Logger.debug(f"Node '{nm}' not in subgraph; skipped.", extra={})
+                    if self._log_debug:
+                        Logger.debug("Node '%s' not in subgraph; skipped.", nm, extra={})
                     continue
                 node_input = start_inputs.get(nm) if start_inputs and nm in start_inputs else None
-                node_stack.append((n_obj, node_input))
+                node_stack.append((node_id, node_input))
         else:
             if subgraph_nodes:
                 auto_starts = self._find_start_nodes_in_subgraph(subgraph_nodes)
             else:
                 auto_starts = self._find_start_nodes()
-            if not auto_starts:
-                Logger.error("No valid start nodes found.", extra={})
-                self.status = ExecutionStatus.ERROR
-                return self._build_result(error_msg="No valid start nodes found")
-            Logger.debug("Auto start nodes found.", extra={"start_nodes": [n.name for n in auto_starts]})
+            auto_starts = [n for n in auto_starts if n.name not in self._pinned]
+            if self._log_debug:
+                Logger.debug("Auto start nodes found.", extra={"start_nodes": [n.name for n in auto_starts]})
             for stN in auto_starts:
-                node_stack.append((stN, None))
+                node_stack.append((plan.index[stN.name], None))
 
-        try:
-            while node_stack:
-                current_node, input_data = node_stack.pop()
-                Logger.debug(f"Popped node '{current_node.name}' from stack.", extra={})
+        # 固定节点不依赖上游输入，直接作为起点
+        queued = {node_id for node_id, _ in node_stack}
+        for nm in self._pinned:
+            node_id = plan.index[nm]
+            if nm in subgraph_nodes and node_id not in queued:
+                node_stack.append((node_id, None))
 
-                if subgraph_nodes and current_node.name not in subgraph_nodes:
-                    Logger.debug(f"Node '{current_node.name}' not in subgraph; skipped.", extra={})
-                    continue
+        if not node_stack and not start_node_names:
+            Logger.error("No valid start nodes found.", extra={})
+            self.status = ExecutionStatus.ERROR
+            return subgraph_nodes, None
 
-                if current_node.disabled:
-                    Logger.info(f"Node '{current_node.name}' is disabled; recording input and skipping.", extra={})
-                    self.run_data.setdefault(current_node.name, [])
-                    self.run_data[current_node.name].append(NodeResult(data=[[input_data or []]]))
-                    continue
+        self.execution_id = execution_id or uuid.uuid4().hex
+        self._resume_attempts = {}
+        self._arm_deadline()
+        if self.checkpoint is not None:
+            self.checkpoint.begin(self.execution_id, {
+                "workflow_id": self.workflow.id,
+                "nodes": list(plan.names),
+                "mode": self.mode,
+                "start_time": self.start_time,
+                "destination_node": destination_node,
+                "subgraph_nodes": sorted(subgraph_nodes) if subgraph_nodes is not None else None,
+                "node_stack": [(plan.names[node_id], node_input) for node_id, node_input in node_stack],
+                "lifo": self._stack_lifo(),
+            })
+        return subgraph_nodes, node_stack
 
-                self.hook_manager.run_hook("nodeExecuteBefore", node=current_node, input_data=input_data, timestamp=time.time())
+    def _restore_run(self, execution_id: str) -> Tuple[Optional[set], deque]:
+        """
+        读回检查点并重放事件，返回 (子图, 节点栈)。
+        """
+        if self.checkpoint is None:
+            raise ValueError("resume() requires a checkpoint store")
+        state = self.checkpoint.load(execution_id)
+        if state is None:
+            raise ValueError(f"No checkpoint found for execution '{execution_id}'")
+        if state.status == ExecutionStatus.SUCCESS.name:
+            raise ValueError(f"Execution '{execution_id}' already finished successfully")
+        meta = state.meta
+        plan = self.plan
+        if meta["workflow_id"] != self.workflow.id or meta["nodes"] != list(plan.names):
+            raise ValueError(f"Workflow changed since execution '{execution_id}' was checkpointed")
 
-                node_logic = self._get_node_type_logic(current_node)
-                Logger.debug(f"Node '{current_node.name}' logic type: {node_logic.__class__.__name__}", extra={})
+        Logger.info("Resuming Workflow Execution.", extra={"execution_id": execution_id, "events": len(state.events)})
+        self.execution_id = execution_id
+        self.mode = meta["mode"]
+        self.status = ExecutionStatus.RUNNING
+        self._reset_waiting()
+        self.start_time = meta["start_time"]
+        self.destination_node = meta["destination_node"]
+        self.hook_manager.run_hook("workflowExecuteBefore", workflow=self.workflow, start_time=self.start_time)
 
-                result = self._run_node_with_error_strategy(current_node, node_logic, input_data)
-                self.run_data.setdefault(current_node.name, [])
-                self.run_data[current_node.name].append(result)
+        self._pinned = self._active_pin_data()
+        subgraph_nodes = set(meta["subgraph_nodes"]) if meta["subgraph_nodes"] is not None else None
+        node_stack: deque = deque((plan.index[nm], node_input) for nm, node_input in meta["node_stack"])
+        attempts: Dict[str, int] = {}
+        for event in state.events:
+            if event[0] == "retry":
+                attempts[event[1]] = event[2]
+                continue
+            _, nm, result, consumed = event
+            node_id = plan.index[nm]
+            attempts.pop(nm, None)
+            if consumed is not None:
+                self._remove_stack_entry(node_stack, plan.index[consumed], meta["lifo"])
+            self.retention.record(self.run_data, nm, result, self._is_sink(node_id))
+            node_stack.extend(self._distribute(node_id, result, subgraph_nodes))
+        self._resume_attempts = {plan.index[nm]: attempt for nm, attempt in attempts.items()}
+        self._arm_deadline()
+        return subgraph_nodes, node_stack
 
-                self.hook_manager.run_hook("nodeExecuteAfter", node=current_node, result=result, timestamp=time.time())
+    @staticmethod
+    def _remove_stack_entry(node_stack: deque, node_id: int, lifo: bool) -> None:
+        # 栈后进先出时被消耗的是最后一个同名条目，否则是第一个
+        positions = range(len(node_stack) - 1, -1, -1) if lifo else range(len(node_stack))
+        for pos in positions:
+            if node_stack[pos][0] == node_id:
+                del node_stack[pos]
+                return
 
-                if result.error:
-                    Logger.error(f"Node '{current_node.name}' final error; stopping workflow.", extra={})
-                    self.status = ExecutionStatus.ERROR
-                    raise ExecutionError(str(result.error), node_name=current_node.name)
+    def _stack_lifo(self) -> bool:
+        return self.max_workers <= 1
 
-                if not result.data:
-                    Logger.debug(f"Node '{current_node.name}' produced no output; skipping children.", extra={})
-                    continue
+    # =============== deadline / cancellation ===============
+    def _arm_deadline(self) -> None:
+        self._timed_out = False
+        if self.timeout is None:
+            self._deadline = None
+            return
+        self._deadline = time.monotonic() + self.timeout
+        if isinstance(self.abort_signal, ThreadedAbortSignal):
+            # 节点在调度线程内运行时调度循环无法检查，由定时器触发 abort_signal
+            self._deadline_timer = threading.Timer(self.timeout, self._on_deadline)
+            self._deadline_timer.daemon = True
+            self._deadline_timer.start()
 
-                if current_node.name in self.workflow.connections_by_source_node:
-                    mainConns = self.workflow.connections_by_source_node[current_node.name].get("main", [])
-                    for outIdx, outItems in enumerate(result.data):
-                        if outIdx >= len(mainConns):
-                            continue
-                        for cInfo in mainConns[outIdx]:
-                            childName = cInfo.node
-                            if subgraph_nodes and childName not in subgraph_nodes:
-                                Logger.debug(f"Child node '{childName}' not in subgraph; skipped.", extra={})
-                                continue
-                            Logger.debug(f"Distributing output to child '{childName}', inputIndex={cInfo.index}, items={len(outItems)}", extra={})
-                            self.waitingData[childName][cInfo.index].extend(outItems)
-                            if self._is_node_ready(childName):
-                                combinedData = self._combine_all_inputs(childName)
-                                del self.waitingData[childName]
-                                childNode = self.workflow.get_node(childName)
-                                Logger.debug(f"Child '{childName}' is ready; pushing stack with {len(combinedData)} items.", extra={})
-                                node_stack.append((childNode, combinedData))
+    def _disarm_deadline(self) -> None:
+        timer, self._deadline_timer = self._deadline_timer, None
+        if timer is not None:
+            timer.cancel()
+        self._deadline = None
 
+    def _on_deadline(self) -> None:
+        self._timed_out = True
+        signal = self.abort_signal
+        if isinstance(signal, ThreadedAbortSignal) and not signal.aborted:
+            Logger.warning("Execution deadline of %ss reached; aborting.", self.timeout, extra={})
+            signal.abort()
+
+    def _bounded_wait(self, delay: Optional[float]) -> Optional[float]:
+        """
+        调度循环的等待时间不超过距截止时间的剩余秒数。
+        """
+        if self._deadline is None:
+            return delay
+        left = max(0.0, self._deadline - time.monotonic())
+        return left if delay is None else min(delay, left)
+
+    def _check_aborted(self) -> None:
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self._on_deadline()
+        if self._timed_out:
+            raise ExecutionCancelled(f"Execution timed out after {self.timeout}s")
+        if self.abort_signal is not None and self.abort_signal.aborted:
+            raise ExecutionCancelled("Execution was canceled")
+
+    def _first_attempt(self, node_id: int) -> int:
+        if self._resume_attempts:
+            return self._resume_attempts.pop(node_id, 1)
+        return 1
+
+    def _schedule_retry(
+        self,
+        retries: RetryQueue,
+        delay: float,
+        node_id: int,
+        input_data: Optional[List[Dict[str, Any]]],
+        attempt: int,
+    ) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.append(self.execution_id, ("retry", self.plan.names[node_id], attempt))
+        retries.push(delay, node_id, input_data, attempt)
+
+    def _finish_run(self, error: Optional[BaseException] = None) -> ExecutionResult:
+        """
+        结束一次执行：设置最终状态、触发 workflowExecuteAfter 钩子并返回结果。
+        """
+        self.end_time = time.time()
+        self._disarm_deadline()
+        if self._timed_out and isinstance(error, ExecutionCancelled):
+            # 节点自身因 abort_signal 退出时抛出的取消也归为超时
+            error = ExecutionCancelled(f"Execution timed out after {self.timeout}s", node_name=error.node_name)
+        error_msg: Optional[str] = None
+        node_name: Optional[str] = None
+        if error is None:
             Logger.info("Workflow execution completed successfully.", extra={})
             self.status = ExecutionStatus.SUCCESS
-
-        except ExecutionError as e:
-            Logger.error(f"ExecutionError: {e}", extra={})
+        elif isinstance(error, ExecutionCancelled):
+            Logger.warning("Execution canceled: %s", error, extra={})
+            self.status = ExecutionStatus.CANCELED
+            error_msg, node_name = str(error), error.node_name
+        elif isinstance(error, ExecutionError):
+            Logger.error("ExecutionError: %s", error, extra={})
             self.status = ExecutionStatus.ERROR
-            return self._build_result(error_msg=str(e), node_name=e.node_name)
-        except Exception as e:
-            Logger.error(f"Unknown exception: {e}", extra={})
+            error_msg, node_name = str(error), error.node_name
+        else:
+            Logger.error("Unknown exception: %s", error, extra={})
             self.status = ExecutionStatus.ERROR
-            return self._build_result(error_msg=str(e))
+            error_msg = str(error)
+
+        if not self._stack_lifo() and len(self.run_data) > 1:
+            # 并发执行时节点按完成顺序写入 run_data；按拓扑序重排，使结果与耗时无关
+            index, topo_rank = self.plan.index, self.plan.topo_rank
+            self.run_data = {
+                nm: self.run_data[nm]
+                for nm in sorted(self.run_data, key=lambda nm: topo_rank[index[nm]] if nm in index else len(index))
+            }
+        self.retention.finalize(self.run_data, self.status, self._sink_names())
+        if self.checkpoint is not None and self.execution_id is not None:
+            self.checkpoint.finish(self.execution_id, self.status.name)
+        result = self._build_result(error_msg=error_msg, node_name=node_name)
+        self.hook_manager.run_hook("workflowExecuteAfter", result=result, end_time=self.end_time)
+        return result
+
+    # =============== scheduling ===============
+    def _run_sequential(self, node_stack: deque, subgraph_nodes: Optional[set]) -> None:
+        retries = RetryQueue()
+        while node_stack or retries:
+            self._check_aborted()
+            for node_id, input_data, attempt in retries.pop_due():
+                self._attempt_node(node_id, input_data, attempt, node_stack, retries, subgraph_nodes)
+            if not node_stack:
+                # 只剩等待重试的节点：睡到最早的一个到期
+                delay = self._bounded_wait(retries.next_wait())
+                if delay:
+                    time.sleep(delay)
+                continue
+            node_id, input_data = node_stack.pop()
+            if self._skip_node(node_id, input_data, subgraph_nodes):
+                continue
+            chain = self._stream_chain(node_id, subgraph_nodes) if self.streaming else None
+            if chain:
+                node_id, result = self._run_stream_chain(chain, input_data, subgraph_nodes)
+                node_stack.extend(self._commit_result(node_id, result, subgraph_nodes, consumed=chain[0]))
+            else:
+                self._before_node(node_id, input_data)
+                self._attempt_node(node_id, input_data, self._first_attempt(node_id), node_stack, retries, subgraph_nodes)
+
+    def _attempt_node(
+        self,
+        node_id: int,
+        input_data: Optional[List[Dict[str, Any]]],
+        attempt: int,
+        node_stack: deque,
+        retries: RetryQueue,
+        subgraph_nodes: Optional[set],
+    ) -> None:
+        outcome = self._run_node(node_id, input_data, attempt)
+        if isinstance(outcome, NodeResult):
+            node_stack.extend(self._commit_result(node_id, outcome, subgraph_nodes))
+        else:
+            self._schedule_retry(retries, outcome, node_id, input_data, attempt + 1)
+
+    def _run_parallel(self, node_stack: deque, subgraph_nodes: Optional[set]) -> None:
+        """
+        并行模式：所有就绪节点同时派发到线程池执行。
+        run_data / waitingData 的合并全部在调度线程中完成；节点一完成就合并并派发其就绪的子节点，
+        不等待其它分支。合并顺序的确定性由 _combine_all_inputs 与 _finish_run 按拓扑序保证；
+        同一次唤醒中完成的多个节点按派发顺序合并。
+        """
+        seq = itertools.count()
+        pending: Dict[Future, Tuple[int, int, Optional[List[Dict[str, Any]]], int]] = {}
+        retries = RetryQueue()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="wf-node")
+        cancelled = False
+        try:
+            while node_stack or pending or retries:
+                self._check_aborted()
+                for node_id, input_data, attempt in retries.pop_due():
+                    fut = pool.submit(self._run_node, node_id, input_data, attempt)
+                    pending[fut] = (next(seq), node_id, input_data, attempt)
+                for seq_no, node_id, input_data in self._take_ready(node_stack, seq):
+                    if self._skip_node(node_id, input_data, subgraph_nodes):
+                        continue
+                    self._before_node(node_id, input_data)
+                    attempt = self._first_attempt(node_id)
+                    fut = pool.submit(self._run_node, node_id, input_data, attempt)
+                    pending[fut] = (seq_no, node_id, input_data, attempt)
+                if not pending:
+                    delay = self._bounded_wait(retries.next_wait())
+                    if delay:
+                        time.sleep(delay)
+                    continue
+                done, _ = wait(pending, timeout=self._bounded_wait(retries.next_wait()), return_when=FIRST_COMPLETED)
+                for fut in sorted(done, key=lambda f: pending[f][0]):
+                    _, node_id, input_data, attempt = pending.pop(fut)
+                    outcome = fut.result()
+                    if isinstance(outcome, NodeResult):
+                        node_stack.extend(self._commit_result(node_id, outcome, subgraph_nodes))
+                    else:
+                        self._schedule_retry(retries, outcome, node_id, input_data, attempt + 1)
+        except ExecutionCancelled:
+            cancelled = True
+            raise
         finally:
-            self.end_time = time.time()
+            # 出错时取消尚未开始的节点；已在运行的节点执行完后丢弃其结果。
+            # 取消 / 超时时不等待仍在运行的节点（它们应检查 abort_signal 自行退出）
+            pool.shutdown(wait=not cancelled, cancel_futures=True)
+
+    def _take_ready(self, node_stack: deque, seq: Iterator[int]) -> List[Tuple[int, int, Optional[List[Dict[str, Any]]]]]:
+        """
+        取出全部就绪节点，返回 (派发序号, node_id, input_data) 列表。
+        按拓扑层（稳定）排序：工作线程不足而排队时，较早层的节点先执行。
+        """
+        batch = [(next(seq), node_id, input_data) for node_id, input_data in node_stack]
+        node_stack.clear()
+        if len(batch) > 1:
+            level_of = self.plan.level_of
+            batch.sort(key=lambda entry: level_of[entry[1]])
+        return batch
 
-            self.hook_manager.run_hook("workflowExecuteAfter", result=self._build_result(), end_time=self.end_time)
+    # =============== streaming ===============
+    def _stream_chain(self, node_id: int, subgraph_nodes: Optional[set]) -> Optional[List[int]]:
+        """
+        以 node_id 为首的流式链路（至少两个节点），否则返回 None。
+        链路中的节点必须启用、位于子图内、没有固定数据，且使用默认的 stopWorkflow 错误策略（流式中途无法重试）。
+        """
+        if not self._stream_eligible(node_id, subgraph_nodes):
+            return None
+        chain = [node_id]
+        nxt = self.plan.stream_next[node_id]
+        while nxt is not None and self._stream_eligible(nxt, subgraph_nodes):
+            chain.append(nxt)
+            nxt = self.plan.stream_next[nxt]
+        return chain if len(chain) > 1 else None
+
+    def _stream_eligible(self, node_id: int, subgraph_nodes: Optional[set]) -> bool:
+        node = self.plan.nodes[node_id]
+        if node_id not in self.plan.streamable_ids or node.disabled:
+            return False
+        if subgraph_nodes and node.name not in subgraph_nodes:
+            return False
+        if node.name in self._pinned or "onError" in node.parameters:
+            return False
+        return self._get_node_type_logic(node) is self.plan.node_logic[node_id]
 
-        return self._build_result()
+    def _run_stream_chain(
+        self,
+        chain: List[int],
+        input_data: Optional[List[Dict[str, Any]]],
+        subgraph_nodes: Optional[set],
+    ) -> Tuple[int, NodeResult]:
+        """
+        按块执行流式链路：每个块依次流经所有节点后再读取下一块。
+        中间节点以 streamed_items 记录到 run_data；返回链尾节点 id 及其完整输出。
+        """
+        plan = self.plan
+        stages = []
+        for i, node_id in enumerate(chain):
+            node = plan.nodes[node_id]
+            self._before_node(node_id, input_data if i == 0 else None)
+            stages.append((node, plan.node_logic[node_id], self._build_context(node, None)))
+        if self._log_debug:
+            Logger.debug("Streaming chain %s with chunk size %d", [n.name for n, _, _ in stages], self.stream_chunk_size, extra={})
+
+        started = time.time()
+        counts = [0] * len(chain)
+        # 每个阶段累计的墙钟 / CPU 时间
+        walls = [0.0] * len(chain)
+        cpus = [0.0] * len(chain)
+        sink_out: List[Dict[str, Any]] = []
+        source = iter(input_data or [])
+        while True:
+            chunk = list(itertools.islice(source, self.stream_chunk_size))
+            if not chunk:
+                break
+            self._check_aborted()
+            for pos, (node, logic, ctx) in enumerate(stages):
+                perf_started, cpu_started = time.perf_counter(), time.thread_time()
+                try:
+                    chunk = list(logic.process_items(chunk, ctx))
+                except ExecutionCancelled:
+                    raise
+                except Exception as e:
+                    Logger.error("Node '%s' EX while streaming: %s", node.name, e, extra={})
+                    raise ExecutionError(str(e), node_name=node.name) from e
+                walls[pos] += time.perf_counter() - perf_started
+                cpus[pos] += time.thread_time() - cpu_started
+                counts[pos] += len(chunk)
+            sink_out.extend(chunk)
+
+        results = [NodeResult(streamed_items=n) for n in counts[:-1]] + [NodeResult(data=[sink_out])]
+        for pos, result in enumerate(results):
+            result.start_time, result.execution_time = started, walls[pos]
+            if self.profiler is not None:
+                items_in = len(input_data or []) if pos == 0 else counts[pos - 1]
+                self.profiler.record(self.workflow.id, stages[pos][0].name, 1, walls[pos], cpus[pos], items_in, counts[pos])
+        for node_id, result in zip(chain[:-1], results):
+            # 中间节点没有自己的栈条目；链首条目由链尾提交时消耗
+            self._commit_result(node_id, result, subgraph_nodes, consumed=None)
+        return chain[-1], results[-1]
+
+    def _skip_node(self, node_id: int, input_data: Optional[List[Dict[str, Any]]], subgraph_nodes: Optional[set]) -> bool:
+        current_node = self.plan.nodes[node_id]
+        if self._log_debug:
+            Logger.debug("Popped node '%s' from stack.", current_node.name, extra={})
+
+        if subgraph_nodes and current_node.name not in subgraph_nodes:
+            if self._log_debug:
+                Logger.debug("Node '%s' not in subgraph; skipped.", current_node.name, extra={})
+            return True
+
+        if current_node.disabled:
+            Logger.info("Node '%s' is disabled; recording input and skipping.", current_node.name, extra={})
+            self.retention.record(
+                self.run_data, current_node.name, NodeResult(data=[[input_data or []]]), self._is_sink(node_id)
+            )
+            return True
+        return False
+
+    def _before_node(self, node_id: int, input_data: Optional[List[Dict[str, Any]]]) -> None:
+        if self.hook_manager.has_hooks("nodeExecuteBefore"):
+            self.hook_manager.run_hook("nodeExecuteBefore", node=self.plan.nodes[node_id], input_data=input_data, timestamp=time.time())
+
+    def _run_node(
+        self,
+        node_id: int,
+        input_data: Optional[List[Dict[str, Any]]],
+        attempt: int = 1,
+    ) -> Union[NodeResult, float]:
+        """
+        执行节点的一次尝试。返回 NodeResult，或需要重试时返回重试前的等待秒数
+        （由调度循环放入延迟队列，而不是在这里 sleep）。
+        """
+        current_node = self.plan.nodes[node_id]
+        node_logic = self._get_node_type_logic(current_node)
+        if self._log_debug:
+            Logger.debug("Node '%s' logic type: %s, try #%d", current_node.name, node_logic.__class__.__name__, attempt, extra={})
+        started = time.time()
+        perf_started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            cache_key, result = self._cache_lookup(current_node, node_logic, input_data)
+            if result is None:
+                result = self._run_node_logic_impl(current_node, node_logic, input_data)
+                self._cache_store(cache_key, result)
+        except ExecutionCancelled:
+            # 取消不是节点错误：不重试，也不走 onError 策略
+            raise
+        except Exception as e:
+            outcome = self._handle_node_error(current_node, e, attempt)
+            if not isinstance(outcome, NodeResult):
+                self._profile(current_node, attempt, perf_started, time.thread_time() - cpu_started, input_data, None)
+                return outcome
+            result = outcome
+        result.start_time = started
+        result.execution_time = time.time() - started
+        self._profile(current_node, attempt, perf_started, time.thread_time() - cpu_started, input_data, result)
+        return result
+
+    def _cache_lookup(
+        self,
+        node: Node,
+        node_logic: NodeType,
+        input_data: Optional[List[Dict[str, Any]]],
+    ) -> Tuple[Optional[CacheKey], Optional[NodeResult]]:
+        """
+        查询输出缓存，返回 (缓存键, 命中的结果)。不可缓存的节点返回 (None, None)。
+        """
+        if (self.cache is None or not node_logic.cacheable or node_logic.is_trigger
+                or not node_logic.can_execute or node.name in self._pinned):
+            return None, None
+        key = self.cache.key_for(node, input_data, self.mode)
+        cached = self.cache.get(key)
+        if cached is None:
+            return key, None
+        if self._log_debug:
+            Logger.debug("Node '%s' output served from cache", node.name, extra={})
+        # 新的 NodeResult 对象，避免改写缓存中结果的耗时等字段
+        return key, NodeResult(data=cached.data)
+
+    def _cache_store(self, key: Optional[CacheKey], result: Any) -> None:
+        if key is not None and isinstance(result, NodeResult) and result.error is None:
+            self.cache.put(key, result)
+
+    def _profile(
+        self,
+        node: Node,
+        attempt: int,
+        perf_started: float,
+        cpu: Optional[float],
+        input_data: Optional[List[Dict[str, Any]]],
+        result: Optional[NodeResult],
+    ) -> None:
+        """
+        向 profiler 记录一次尝试；result 为 None 表示该尝试失败、将被重试。
+        """
+        if self.profiler is None:
+            return
+        items_out = sum(len(out or []) for out in result.data) if result is not None and result.data else 0
+        self.profiler.record(
+            self.workflow.id, node.name, attempt,
+            time.perf_counter() - perf_started, cpu,
+            len(input_data or []), items_out,
+            failed=result is None,
+        )
+
+    def _commit_result(
+        self,
+        node_id: int,
+        result: NodeResult,
+        subgraph_nodes: Optional[set],
+        consumed: Optional[int] = _SELF,
+    ) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        记录节点结果并把输出分发给子节点，返回新就绪的 (child_id, input_data) 列表。
+        consumed 为产生该结果时弹出的栈条目所属节点（默认即本节点，流式链路的中间节点为 None），
+        写入检查点供 resume 重放。
+        """
+        plan = self.plan
+        current_node = plan.nodes[node_id]
+        # 下游通过本地的 result 取数据，run_data 中的记录可由保留策略立即释放
+        self.retention.record(self.run_data, current_node.name, result, self._is_sink(node_id))
+
+        if self.hook_manager.has_hooks("nodeExecuteAfter"):
+            self.hook_manager.run_hook("nodeExecuteAfter", node=current_node, result=result, timestamp=time.time())
+
+        if result.error:
+            Logger.error("Node '%s' final error; stopping workflow.", current_node.name, extra={})
+            self.status = ExecutionStatus.ERROR
+            raise ExecutionError(str(result.error), node_name=current_node.name)
+
+        if self.checkpoint is not None:
+            consumed_name = None if consumed is None else plan.names[node_id if consumed == _SELF else consumed]
+            self.checkpoint.append(self.execution_id, ("node", current_node.name, result, consumed_name))
+        return self._distribute(node_id, result, subgraph_nodes)
+
+    def _distribute(
+        self,
+        node_id: int,
+        result: NodeResult,
+        subgraph_nodes: Optional[set],
+    ) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        把节点输出放入子节点的 waitingData，返回新就绪的 (child_id, input_data) 列表。
+        """
+        plan = self.plan
+        current_node = plan.nodes[node_id]
+        ready: List[Tuple[int, List[Dict[str, Any]]]] = []
+        if not result.data:
+            if self._log_debug:
+                Logger.debug("Node '%s' produced no output; skipping children.", current_node.name, extra={})
+            return ready
+
+        log_debug = self._log_debug
+        pinned = self._pinned
+        rank = plan.topo_rank[node_id]
+        outConns = plan.children[node_id]
+        for outIdx, outItems in enumerate(result.data):
+            if outIdx >= len(outConns):
+                break
+            for childId, inputIdx in outConns[outIdx]:
+                childName = plan.names[childId]
+                if subgraph_nodes and childName not in subgraph_nodes:
+                    if log_debug:
+                        Logger.debug("Child node '%s' not in subgraph; skipped.", childName, extra={})
+                    continue
+                if childName in pinned:
+                    # 固定节点已作为起点输出固定数据，不再接收上游输入
+                    continue
+                if log_debug:
+                    Logger.debug("Distributing output to child '%s', inputIndex=%d, items=%d", childName, inputIdx, len(outItems), extra={})
+                self._add_waiting(childId, inputIdx, outItems, rank)
+                if self._is_node_ready(childId):
+                    combinedData = self._combine_all_inputs(childId)
+                    self.waitingData[childId] = None
+                    if log_debug:
+                        Logger.debug("Child '%s' is ready; pushing stack with %d items.", childName, len(combinedData), extra={})
+                    ready.append((childId, combinedData))
+        return ready
+
+    def _is_sink(self, node_id: int) -> bool:
+        return node_id in self.plan.sink_ids or self.plan.names[node_id] == self.destination_node
+
+    def _sink_names(self) -> List[str]:
+        names = [self.plan.names[i] for i in self.plan.sink_ids]
+        if self.destination_node:
+            names.append(self.destination_node)
+        return names
+
+    # =============== pin data ===============
+    def _active_pin_data(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        本次执行生效的固定数据；忽略不存在或已禁用的节点。
+        item 可以是 dict，也可以是 NodeExecutionData（取其 json_data）。
+        """
+        pin_data = getattr(self.workflow, "pin_data", None)
+        if not self.use_pin_data or not pin_data:
+            return {}
+        plan = self.plan
+        pinned: Dict[str, List[Dict[str, Any]]] = {}
+        for nm, items in pin_data.items():
+            node_id = plan.index.get(nm)
+            if node_id is None or plan.nodes[node_id].disabled:
+                continue
+            pinned[nm] = [
+                item.json_data if isinstance(item, NodeExecutionData) else item for item in (items or [])
+            ]
+        return pinned
+
+    def _pinned_subgraph(self, destination_node: Optional[str]) -> set:
+        """
+        需要执行的节点：从终点（destination_node，或所有 sink 节点）向上回溯，
+        遇到固定节点即停止。只为固定节点提供输入的上游节点不在其中。
+        """
+        plan = self.plan
+        if destination_node:
+            targets = [plan.index[destination_node]] if destination_node in plan.index else []
+        else:
+            targets = list(plan.sink_ids)
+        needed: set = set()
+        stack = targets
+        while stack:
+            node_id = stack.pop()
+            nm = plan.names[node_id]
+            if nm in needed:
+                continue
+            needed.add(nm)
+            if nm not in self._pinned:
+                stack.extend(plan.parents[node_id])
+        return needed
 
     def _find_ancestors_including(self, node_name: str) -> set:
-        visited = set()
-        def dfs(nm: str):
-            if nm in visited:
-                return
-            visited.add(nm)
-            parents = self.workflow.get_parent_nodes(nm, "main")
-            for p in parents:
-                dfs(p)
-        dfs(node_name)
-        return visited
+        ancestors = set(self.workflow.graph_index.ancestors(node_name, "main"))
+        ancestors.add(node_name)
+        return ancestors
 
     def _find_start_nodes_in_subgraph(self, sub_nodes: set) -> List[Node]:
+        # 子图对上游封闭（上游闭包，或回溯到固定节点为止），只需检查直接父节点。
+        # 按拓扑层排序，保证起点顺序确定（不依赖集合的迭代顺序）
+        plan = self.plan
+        index = self.workflow.graph_index
         res = []
-        for nm in sub_nodes:
-            n_obj = self.workflow.get_node(nm)
+        for node_id in sorted((plan.index[nm] for nm in sub_nodes), key=lambda i: (plan.level_of[i], i)):
+            nm = plan.names[node_id]
+            n_obj = plan.nodes[node_id]
             if n_obj.disabled:
                 continue
-            logic = self._get_node_type_logic(n_obj)
-            if logic.is_trigger:
+            if plan.node_logic[node_id].is_trigger:
                 res.append(n_obj)
                 continue
-            pset = self.workflow.get_parent_nodes(nm, "main")
-            p_in = [p for p in pset if p in sub_nodes]
-            if not p_in:
+            if not any(p in sub_nodes for p in index.parents(nm, "main")):
                 res.append(n_obj)
         return res
 
     def _find_start_nodes(self) -> List[Node]:
-        all_nodes = set(self.workflow.nodes.keys())
-        child_nodes = set()
-        for srcName, connDict in self.workflow.connections_by_source_node.items():
-            main_conns = connDict.get("main", [])
-            for cList in main_conns:
-                for cInfo in cList:
-                    child_nodes.add(cInfo.node)
-        no_parent = all_nodes - child_nodes
-        out = []
-        for nm in all_nodes:
-            n_obj = self.workflow.nodes[nm]
-            if n_obj.disabled:
-                continue
-            logic = self._get_node_type_logic(n_obj)
-            if logic.is_trigger:
-                out.append(n_obj)
-            elif nm in no_parent:
-                out.append(n_obj)
-        return out
+        nodes = self.plan.nodes
+        return [nodes[i] for i in self.plan.start_candidate_ids if not nodes[i].disabled]
 
     # =============== error / retry ===============
-    def _run_node_with_error_strategy(
+    def _handle_node_error(self, node: Node, e: Exception, cur_try: int) -> Union[NodeResult, float]:
+        """
+        按节点的 onError 策略处理一次失败：
+          - 返回 NodeResult：作为该节点的输出（continueOnFail / errorOutput）；
+          - 返回 float：需要重试，值为重试前的等待秒数（retryOnFail，或节点设置了 retry_on_fail）；
+          - 抛出 ExecutionError：停止工作流。
+        节点设置 retry_on_fail 时先按 RetryPolicy 重试，用尽后再应用 onError 策略。
+        """
+        on_err = node.parameters.get("onError", ErrorPolicy.STOP_WORKFLOW)
+        Logger.error("Node '%s' EX on try #%d: %s", node.name, cur_try, e, extra={})
+        if on_err == ErrorPolicy.RETRY_ON_FAIL or getattr(node, "retry_on_fail", False):
+            policy = RetryPolicy.from_node(node)
+            if cur_try <= policy.max_retries:
+                delay = policy.delay_for(cur_try)
+                Logger.info("retryOnFail: attempt %d, retry in %.3fs", cur_try, delay, extra={})
+                return delay
+            Logger.error("Used up %d retries", policy.max_retries, extra={})
+            if on_err == ErrorPolicy.RETRY_ON_FAIL:
+                raise ExecutionError(str(e), node_name=node.name) from e
+
+        if on_err == ErrorPolicy.CONTINUE_ON_FAIL:
+            fb = {"error": str(e), "errType": type(e).__name__}
+            Logger.info("continueOnFail: produce fallback item %s", fb, extra={})
+            return NodeResult(data=[[fb]], error=None)
+        elif on_err == ErrorPolicy.ERROR_OUTPUT:
+            errIdx = int(node.parameters.get("errorOutputIndex", 1))
+            Logger.info("errorOutput: produce error on outputIndex=%d", errIdx, extra={})
+            outs: List[List[Dict[str, Any]]] = []
+            for i in range(errIdx + 1):
+                outs.append([])
+            outs[errIdx] = [{"error": str(e), "errType": type(e).__name__}]
+            return NodeResult(data=outs, error=None)
+        else:
+            Logger.error("stopWorkflow: raising ExecutionError", extra={})
+            raise ExecutionError(str(e), node_name=node.name) from e
+
+    def _run_node_logic_impl(
         self,
         node: Node,
-        node_type_logic: NodeType,
+        node_logic: NodeType,
         input_data: Optional[List[Dict[str, Any]]]
     ) -> NodeResult:
-        on_err = node.parameters.get("onError", ErrorPolicy.STOP_WORKFLOW)
-        maxR = int(node.parameters.get("maxRetries", 0))
-        rDelay = float(node.parameters.get("retryDelay", 0))
-        errIdx = int(node.parameters.get("errorOutputIndex", 1))
-
-        cur_try = 0
-        while True:
-            cur_try += 1
-            Logger.debug(f"Node '{node.name}' try #{cur_try}, onError={on_err}, maxR={maxR}", extra={})
+        result = self._static_node_result(node, node_logic, input_data)
+        if result is not None:
+            return result
+        if self._log_debug:
+            Logger.debug("Node '%s' calling node_logic.execute() with %d items", node.name, len(input_data or []), extra={})
+        if node_logic.cpu_bound and self.process_pool is not None:
             try:
-                result = self._run_node_logic_impl(node, node_type_logic, input_data)
-                Logger.debug(f"Node '{node.name}' success on attempt #{cur_try}", extra={})
-                return result
-            except Exception as e:
-                Logger.error(f"Node '{node.name}' EX on try #{cur_try}: {e}", extra={})
-                if on_err == ErrorPolicy.CONTINUE_ON_FAIL:
-                    fb = {"error": str(e), "errType": type(e).__name__}
-                    Logger.info(f"continueOnFail: produce fallback item {fb}", extra={})
-                    return NodeResult(data=[[fb]], error=None)
-                elif on_err == ErrorPolicy.RETRY_ON_FAIL:
-                    if cur_try <= maxR:
-                        Logger.info(f"retryOnFail: attempt {cur_try}, sleep {rDelay}, next...", extra={})
-                        if rDelay > 0:
-                            time.sleep(rDelay)
-                        continue
-                    else:
-                        Logger.error(f"Used up {maxR} retries; raising ExecutionError", extra={})
-                        raise ExecutionError(str(e)) from e
-                elif on_err == ErrorPolicy.ERROR_OUTPUT:
-                    Logger.info(f"errorOutput: produce error on outputIndex={errIdx}", extra={})
-                    outs: List[List[Dict[str, Any]]] = []
-                    for i in range(errIdx + 1):
-                        outs.append([])
-                    outs[errIdx] = [{"error": str(e), "errType": type(e).__name__}]
-                    return NodeResult(data=outs, error=None)
-                else:
-                    Logger.error("stopWorkflow: raising ExecutionError", extra={})
-                    raise ExecutionError(str(e)) from e
+                return run_in_process(
+                    self.process_pool, node_logic, self._build_context(node, input_data), timeout=self._bounded_wait(None)
+                )
+            except ExecutionCancelled:
+                # 截止时间已到时给出与调度循环一致的超时错误
+                self._check_aborted()
+                raise
+        result = node_logic.execute(self._build_context(node, input_data))
+        if inspect.isawaitable(result):
+            result = self._await_sync(node, result)
+        return result
 
-    def _run_node_logic_impl(
+    @staticmethod
+    def _await_sync(node: Node, awaitable: Any) -> NodeResult:
+        """
+        异步节点类型在同步执行器中运行：在当前线程上开一个事件循环等待它。
+        当前线程已有运行中的事件循环时无法这样做（也不能阻塞该循环），直接报错。
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(awaitable)
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        raise RuntimeError(
+            f"Node '{node.name}' is asynchronous but the synchronous executor is running inside an event loop; "
+            "use AsyncWorkflowExecutor instead"
+        )
+
+    def _static_node_result(
         self,
         node: Node,
         node_logic: NodeType,
         input_data: Optional[List[Dict[str, Any]]]
-    ) -> NodeResult:
-        
+    ) -> Optional[NodeResult]:
+        """
+        固定节点、trigger 与 can_execute=False 的节点不调用 execute()，直接得到结果；其余返回 None。
+        """
+        pinned = self._pinned.get(node.name)
+        if pinned is not None:
+            if self._log_debug:
+                Logger.debug("Node '%s' emits %d pinned items", node.name, len(pinned), extra={})
+            result = NodeResult(data=[list(pinned)])
+            result.pinned = True
+            return result
         if node_logic.is_trigger:
             if self.mode == "manual":
-                Logger.debug(f"Node '{node.name}' (trigger) produce trig item", extra={})
+                if self._log_debug:
+                    Logger.debug("Node '%s' (trigger) produce trig item", node.name, extra={})
                 return NodeResult(data=[[{"trig": True}]])
             else:
-                out = [dict(item) for item in (input_data or [])]
-                Logger.debug(f"Node '{node.name}' (trigger) pass-through {len(out)} items", extra={})
+                if isinstance(input_data, ColumnarBatch):
+                    out = input_data
+                else:
+                    out = [dict(item) for item in (input_data or [])]
+                if self._log_debug:
+                    Logger.debug("Node '%s' (trigger) pass-through %d items", node.name, len(out), extra={})
                 return NodeResult(data=[out])
-        else:
-            if not node_logic.can_execute:
-                Logger.debug(f"Node '{node.name}' can_execute=False; pass-through", extra={})
-                return NodeResult(data=[[input_data or []]])
-            Logger.debug(f"Node '{node.name}' calling node_logic.execute() with {len(input_data or [])} items", extra={})
-            ctx = NodeExecutionContext(node.name, input_data, self.mode, self.global_config)
-            return node_logic.execute(ctx)
+        if not node_logic.can_execute:
+            if self._log_debug:
+                Logger.debug("Node '%s' can_execute=False; pass-through", node.name, extra={})
+            return NodeResult(data=[[input_data or []]])
+        return None
+
+    def _build_context(self, node: Node, input_data: Optional[List[Dict[str, Any]]]) -> NodeExecutionContext:
+        return NodeExecutionContext(
+            node.name, input_data, self.mode, self.global_config, self.abort_signal, node.parameters
+        )
 
     # =============== waitingData / combine ===============
-    def _is_node_ready(self, node_name: str) -> bool:
-        need = self.inputRequirements.get(node_name, 1)
-        if node_name not in self.waitingData:
+    def _reset_waiting(self) -> None:
+        self.waitingData = [None] * len(self.plan)
+
+    def _is_node_ready(self, node_id: int) -> bool:
+        w_d = self.waitingData[node_id]
+        if w_d is None:
             return False
-        w_d = self.waitingData[node_name]
+        need = self.plan.input_requirements[node_id] or 1
         for i in range(need):
             if i not in w_d:
                 return False
         return True
 
-    def _combine_all_inputs(self, node_name: str) -> List[Dict[str, Any]]:
+    def _add_waiting(self, node_id: int, input_idx: int, items: List[Dict[str, Any]], rank: int = 0) -> None:
+        """
+        把上游输出放入 waitingData：每个输入按到达顺序保存 (上游拓扑序, items) 片段，
+        合并推迟到 _combine_all_inputs。
+        """
+        w_d = self.waitingData[node_id]
+        if w_d is None:
+            w_d = self.waitingData[node_id] = {}
+        pieces = w_d.get(input_idx)
+        if pieces is None:
+            w_d[input_idx] = [(rank, items)]
+        else:
+            pieces.append((rank, items))
+
+    @staticmethod
+    def _merge_parts(parts: List[Any]) -> Any:
+        """
+        ColumnarBatch 原样传递（多个批次拼接为一个批次），只有与 dict 列表混合时才展开；
+        dict 列表合并为新的列表，不与上游的输出共享。
+        """
+        if all(isinstance(p, ColumnarBatch) for p in parts):
+            return ColumnarBatch.concat(parts)
         combined = []
-        need = self.inputRequirements.get(node_name, 1)
-        for i in range(need):
-            combined.extend(self.waitingData[node_name][i])
+        for p in parts:
+            combined.extend(p)
         return combined
 
+    def _combine_all_inputs(self, node_id: int) -> List[Dict[str, Any]]:
+        """
+        按 inputIndex 顺序合并各输入。并发执行时同一输入上的多个片段按上游节点的拓扑序
+        （稳定）排序，与完成顺序无关；顺序执行时保持到达顺序。
+        """
+        need = self.plan.input_requirements[node_id] or 1
+        w_d = self.waitingData[node_id]
+        ordered = not self._stack_lifo()
+        parts = []
+        for i in range(need):
+            pieces = w_d[i]
+            if ordered and len(pieces) > 1:
+                pieces = sorted(pieces, key=lambda piece: piece[0])
+            parts.append(self._merge_parts([items for _, items in pieces]))
+        if len(parts) == 1:
+            return parts[0]
+        return self._merge_parts(parts)
+
     # =============== nodeType logic ===============
     def _get_node_type_logic(self, node: Node) -> NodeType:
-        node_type_lower = node.type.lower()
-        if "producer" in node_type_lower:
-            return ProducerNodeType(name=node.type)
-        if "switch" in node_type_lower:
-            return SwitchNodeType(name=node.type)
-        if "trigger" in node_type_lower:
-            return NodeType(name=node.type, can_execute=False, is_trigger=True)
-        if "condition" in node_type_lower:
-            from .node_types import ConditionNodeType
-            return ConditionNodeType(name=node.type)
-        if "executesubworkflow" in node_type_lower:
-            from .node_types import ExecuteSubWorkflowNode
-            return ExecuteSubWorkflowNode(name=node.type)
-        return NodeType(name=node.type, can_execute=True, is_trigger=False)
+        return self.plan.logic_of(node.name)
 
     # =============== final result ===============
-    def _build_result(self, error_msg: Optional[str] = None, node_name: Optional[str] = None) -> Dict[str, Any]:
-        dur = self.end_time - self.start_time if self.end_time > self.start_time else 0
-        res: Dict[str, Any] = {
-            "status": self.status.name,
-            "startedAt": self.start_time,
-            "finishedAt": self.end_time,
-            "executionTime": dur,
-            "runData": {}
-        }
-        if error_msg:
-            res["error"] = {
-                "message": error_msg,
-                "nodeName": node_name
-            }
-        run_data_repr = {}
-        for nm, nResList in self.run_data.items():
-            run_data_repr[nm] = [repr(r) for r in nResList]
-        res["runData"] = run_data_repr
-        return res
\ No newline at end of file
+    def _build_result(self, error_msg: Optional[str] = None, node_name: Optional[str] = None) -> ExecutionResult:
+        return ExecutionResult(
+            self.status,
+            self.start_time,
+            self.end_time,
+            self.run_data,
+            error_msg=error_msg,
+            error_node=node_name,
+        )
@@ -1,48 +1,177 @@
 # engine/hooks.py
 
-from typing import Callable, Dict, List, Any
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from .logger import Logger
+
+_STOP = object()
+
 
 class HookManager:
     """
     HookManager 用于管理钩子回调函数。
     你可以通过 register_hook() 为特定事件注册回调，
     在 run_hook() 时依次调用所有注册的回调，并传入相关参数。
+
+    dispatch="async" 时，run_hook() 只把事件放入有界队列，由后台线程批量投递，
+    慢钩子不再计入执行耗时：
+      - max_queue：队列容量；队列满时按 overflow 处理：
+        "block" 阻塞调用方（背压），"drop" 丢弃该事件并计入 dropped；
+      - batch_size：后台线程每次最多取出的事件数；
+      - register_hook(..., timeout=秒)：单个回调的超时，超时后记录警告并继续投递后续事件
+        （Python 无法强行终止回调，超时的回调会在辅助线程中继续运行完）。
+    flush() 等待已入队的事件全部投递完，close() 停止后台线程。
+    没有为某事件注册回调时，run_hook() 直接返回；调用方也可以先用 has_hooks() 判断，
+    避免构造参数本身的开销。
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        dispatch: str = "sync",
+        max_queue: int = 1000,
+        batch_size: int = 100,
+        overflow: str = "block",
+    ):
+        if dispatch not in ("sync", "async"):
+            raise ValueError(f"Unknown dispatch mode: {dispatch}")
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
         self._hooks: Dict[str, List[Callable[..., None]]] = {}
+        self._timeouts: Dict[Tuple[str, Callable[..., None]], float] = {}
+        self.dispatch = dispatch
+        self.batch_size = max(1, batch_size)
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._timeout_pool: Optional[ThreadPoolExecutor] = None
+        self._timeout_pool_lock = threading.Lock()
 
-    def register_hook(self, event_name: str, callback: Callable[..., None]) -> None:
+    def register_hook(self, event_name: str, callback: Callable[..., None], timeout: Optional[float] = None) -> None:
         """
         注册一个钩子回调函数。
-        
+
         :param event_name: 钩子事件名称，例如 "workflowExecuteBefore"、"nodeExecuteAfter" 等
         :param callback: 回调函数，接收可选参数
+        :param timeout: 可选，单次回调的超时秒数
         """
-        if event_name not in self._hooks:
-            self._hooks[event_name] = []
-        self._hooks[event_name].append(callback)
+        # 写时复制：投递线程持有的回调列表快照不受影响
+        self._hooks[event_name] = self._hooks.get(event_name, []) + [callback]
+        if timeout is not None:
+            self._timeouts[(event_name, callback)] = timeout
 
     def unregister_hook(self, event_name: str, callback: Callable[..., None]) -> None:
         """
         注销某个钩子回调。
         """
+        self._timeouts.pop((event_name, callback), None)
         if event_name in self._hooks:
-            self._hooks[event_name] = [cb for cb in self._hooks[event_name] if cb != callback]
+            remaining = [cb for cb in self._hooks[event_name] if cb != callback]
+            if remaining:
+                self._hooks[event_name] = remaining
+            else:
+                del self._hooks[event_name]
+
+    def has_hooks(self, event_name: str) -> bool:
+        return event_name in self._hooks
 
     def run_hook(self, event_name: str, *args: Any, **kwargs: Any) -> None:
         """
         运行指定事件的所有钩子回调函数。
-        
+
         :param event_name: 事件名称
         :param args: 位置参数，将传递给回调函数
         :param kwargs: 关键字参数，将传递给回调函数
         """
-        if event_name not in self._hooks:
+        callbacks = self._hooks.get(event_name)
+        if not callbacks:
+            return
+
+        if self.dispatch == "sync":
+            self._deliver(event_name, callbacks, args, kwargs)
+            return
+
+        self._ensure_worker()
+        event = (event_name, callbacks, args, kwargs)
+        if self.overflow == "drop":
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            self._queue.put(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已入队的事件全部投递完；超时返回 False。
+        """
+        if self._worker is None:
+            return True
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def close(self) -> None:
+        """
+        投递完剩余事件后停止后台线程；之后再次 run_hook() 会重新启动线程。
+        """
+        with self._worker_lock:
+            worker, self._worker = self._worker, None
+            if worker is not None:
+                self._queue.put(_STOP)
+                worker.join()
+        with self._timeout_pool_lock:
+            if self._timeout_pool is not None:
+                self._timeout_pool.shutdown(wait=False)
+                self._timeout_pool = None
+
+    # =============== 内部实现 ===============
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
             return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._worker_loop, name="wf-hooks", daemon=True)
+                self._worker.start()
 
-        for callback in self._hooks[event_name]:
+    def _worker_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for event in batch:
+                if event is _STOP:
+                    stop = True
+                else:
+                    self._deliver(*event)
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, event_name: str, callbacks: List[Callable[..., None]], args: Tuple, kwargs: Dict[str, Any]) -> None:
+        for callback in callbacks:
+            timeout = self._timeouts.get((event_name, callback))
             try:
-                callback(*args, **kwargs)
+                if timeout is None:
+                    callback(*args, **kwargs)
+                else:
+                    self._call_with_timeout(callback, timeout, args, kwargs)
+            except FutureTimeoutError:
+                Logger.warning("[HookManager] Hook '%s' timed out after %ss", event_name, timeout, extra={})
             except Exception as e:
-                print(f"[HookManager] Error in hook '{event_name}': {e}")
\ No newline at end of file
+                Logger.error("[HookManager] Error in hook '%s': %s", event_name, e, extra={})
+
+    def _call_with_timeout(self, callback: Callable[..., None], timeout: float, args: Tuple, kwargs: Dict[str, Any]) -> None:
+        if self._timeout_pool is None:
+            with self._timeout_pool_lock:
+                if self._timeout_pool is None:
+                    self._timeout_pool = ThreadPoolExecutor(thread_name_prefix="wf-hook-call")
+        self._timeout_pool.submit(callback, *args, **kwargs).result(timeout=timeout)
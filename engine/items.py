@@ -0,0 +1,12 @@
+# engine/items.py
+
+from collections.abc import Mapping
+from typing import Any, Dict
+
+
+def derive_item(item: Mapping, **updates: Any) -> Dict[str, Any]:
+    """
+    基于上游 item 派生一个新 item 并写入 updates，等同于 dict(item) 后逐个赋值（浅拷贝）。
+    以一次 C 层的字典展开完成复制与写入：被覆盖的键保持原位置，新增键在后，上游 item 不被修改。
+    """
+    return {**item, **updates}
@@ -1,50 +1,150 @@
 # engine/logger.py
 
+import json
 import logging
+import os
+import queue
 import sys
-from typing import Any, Dict
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, IO, Optional, Union
+
+# LogRecord 自带的属性；其余属性视为通过 extra 传入的结构化字段
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    每条日志输出一行 JSON：time / level / logger / message 以及 extra 中的字段。
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                out[key] = value
+        if record.exc_info:
+            out["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=repr, ensure_ascii=False)
+
 
 class Logger:
+    """
+    工作流日志。消息支持 %-风格的惰性参数（Logger.debug("Node '%s' ...", name)），
+    只有在级别启用时才会格式化。热路径上应先用 Logger.is_enabled_for() 得到并缓存级别判断，
+    再决定是否调用。默认级别为 DEBUG，可通过环境变量 WF_LOG_LEVEL 或 configure() 调整。
+    """
     _logger: logging.Logger = None
+    _listener: Optional[QueueListener] = None
+    _lock = threading.Lock()
 
     @classmethod
     def _init_logger(cls):
-        if cls._logger is None:
-            cls._logger = logging.getLogger("workflow_logger")
-            cls._logger.setLevel(logging.DEBUG)
+        if cls._logger is not None:
+            return
+        with cls._lock:
+            if cls._logger is not None:
+                return
+            logger = logging.getLogger("workflow_logger")
+            logger.setLevel(os.environ.get("WF_LOG_LEVEL", "DEBUG").upper())
 
             handler = logging.StreamHandler(sys.stdout)
-            handler.setLevel(logging.DEBUG)
+            handler.setFormatter(cls._text_formatter())
+            logger.addHandler(handler)
+            logger.propagate = True
+            cls._logger = logger
+
+    @staticmethod
+    def _text_formatter() -> logging.Formatter:
+        return logging.Formatter(
+            fmt="[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
 
-            formatter = logging.Formatter(
-                fmt="[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
-                datefmt="%Y-%m-%d %H:%M:%S"
-            )
-            handler.setFormatter(formatter)
-            cls._logger.addHandler(handler)
-            cls._logger.propagate = True
+    @classmethod
+    def configure(
+        cls,
+        level: Union[int, str] = logging.DEBUG,
+        stream: Optional[IO[str]] = sys.stdout,
+        json_sink: Optional[Union[str, IO[str], logging.Handler]] = None,
+    ) -> logging.Logger:
+        """
+        重新配置日志：
+          - level：日志级别（已创建的执行器缓存了级别判断，新级别对之后创建的执行器生效）；
+          - stream：文本输出流，None 表示不输出文本；
+          - json_sink：结构化 JSON 输出（文件路径、文件对象或 Handler），
+            经 QueueHandler 交给后台 QueueListener 线程写出，调用线程只负责入队。
+        """
+        cls._init_logger()
+        cls.shutdown()
+        logger = cls._logger
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+        if stream is not None:
+            handler = logging.StreamHandler(stream)
+            handler.setFormatter(cls._text_formatter())
+            logger.addHandler(handler)
+
+        if json_sink is not None:
+            if isinstance(json_sink, logging.Handler):
+                sink_handler = json_sink
+            elif isinstance(json_sink, str):
+                sink_handler = logging.FileHandler(json_sink, encoding="utf-8")
+            else:
+                sink_handler = logging.StreamHandler(json_sink)
+            sink_handler.setFormatter(JsonFormatter())
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            logger.addHandler(QueueHandler(log_queue))
+            cls._listener = QueueListener(log_queue, sink_handler, respect_handler_level=True)
+            cls._listener.start()
+        return logger
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        停止后台 JSON 写出线程（会先写完队列中剩余的日志）。
+        """
+        listener, cls._listener = cls._listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+    @classmethod
+    def is_enabled_for(cls, level: int) -> bool:
+        cls._init_logger()
+        return cls._logger.isEnabledFor(level)
 
     @classmethod
-    def debug(cls, message: str, extra: Dict[str, Any] = None) -> None:
+    def debug(cls, message: str, *args: Any, extra: Dict[str, Any] = None) -> None:
         cls._init_logger()
-        cls._logger.debug(message, extra=extra or {})
+        if cls._logger.isEnabledFor(logging.DEBUG):
+            cls._logger.debug(message, *args, extra=extra or {})
 
     @classmethod
-    def info(cls, message: str, extra: Dict[str, Any] = None) -> None:
+    def info(cls, message: str, *args: Any, extra: Dict[str, Any] = None) -> None:
         cls._init_logger()
-        cls._logger.info(message, extra=extra or {})
+        if cls._logger.isEnabledFor(logging.INFO):
+            cls._logger.info(message, *args, extra=extra or {})
 
     @classmethod
-    def warning(cls, message: str, extra: Dict[str, Any] = None) -> None:
+    def warning(cls, message: str, *args: Any, extra: Dict[str, Any] = None) -> None:
         cls._init_logger()
-        cls._logger.warning(message, extra=extra or {})
+        cls._logger.warning(message, *args, extra=extra or {})
 
     @classmethod
-    def error(cls, message: str, extra: Dict[str, Any] = None) -> None:
+    def error(cls, message: str, *args: Any, extra: Dict[str, Any] = None) -> None:
         cls._init_logger()
-        cls._logger.error(message, extra=extra or {})
+        cls._logger.error(message, *args, extra=extra or {})
 
     @classmethod
-    def critical(cls, message: str, extra: Dict[str, Any] = None) -> None:
+    def critical(cls, message: str, *args: Any, extra: Dict[str, Any] = None) -> None:
         cls._init_logger()
-        cls._logger.critical(message, extra=extra or {})
\ No newline at end of file
+        cls._logger.critical(message, *args, extra=extra or {})
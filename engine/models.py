@@ -20,12 +20,22 @@ class ExecutionError(Exception):
         self.node_name = node_name
 
 
+class ExecutionCancelled(ExecutionError):
+    """
+    执行被取消（abort signal 或超时）。
+    """
+
+
 class NodeResult:
     """
     单个节点执行的结果：
       - data: 二维列表，data[outputIndex] = list of items
               或者 None 表示无输出
       - error: 如果执行出错，可在此存储错误信息
+      - streamed_items: 流式模式下的中间节点不物化输出，data 为 None，
+              这里只记录其输出的 item 数
+      - start_time / execution_time: 由执行器填写的开始时间戳与耗时（秒）
+      - pinned: 输出来自工作流的固定数据（pin data），节点本身并未执行
 
     多输出的关键：
       data = [
@@ -34,9 +44,20 @@ class NodeResult:
         ...
       ]
     """
-    def __init__(self, data: Optional[List[List[Dict[str, Any]]]] = None, error: Optional[Exception] = None):
+    def __init__(
+        self,
+        data: Optional[List[List[Dict[str, Any]]]] = None,
+        error: Optional[Exception] = None,
+        streamed_items: Optional[int] = None,
+    ):
         self.data = data
         self.error = error
+        self.streamed_items = streamed_items
+        self.start_time: Optional[float] = None
+        self.execution_time: Optional[float] = None
+        self.pinned = False
 
     def __repr__(self):
+        if self.streamed_items is not None:
+            return f"<NodeResult streamed_items={self.streamed_items}, error={self.error}>"
         return f"<NodeResult data={self.data}, error={self.error}>"
\ No newline at end of file
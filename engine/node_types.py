@@ -1,14 +1,61 @@
 # engine/node_types.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
 from .context import NodeExecutionContext
 from .models import NodeResult
+from .items import derive_item
+from .columnar import ColumnarBatch
+from .predicates import CompiledByParameters, compile_predicate, compile_switch
+
+# 逐个 item 处理时，每隔这么多个 item 检查一次取消信号
+ABORT_CHECK_INTERVAL = 1024
+
+
+def _abortable(items: Iterator[Dict[str, Any]], context: NodeExecutionContext) -> Iterator[Dict[str, Any]]:
+    """
+    逐个 item 处理的循环中，每隔 ABORT_CHECK_INTERVAL 个 item 检查一次取消信号。
+    """
+    if context.abort_signal is None:
+        return items
+    return _checked(items, context)
+
+
+def _checked(items: Iterator[Dict[str, Any]], context: NodeExecutionContext) -> Iterator[Dict[str, Any]]:
+    check = context.check_aborted
+    for i, item in enumerate(items):
+        if not i % ABORT_CHECK_INTERVAL:
+            check()
+        yield item
+
 
 class NodeType:
     """
     基础节点类型:
       - processor、pass-through 等
+      - cpu_bound = True 表示执行过程 CPU 密集（长时间持有 GIL），
+        执行器配置了 process_pool 时会把它交给进程池执行；
+        此类节点类型必须可 pickle（定义在模块顶层）。
+      - 输入可以是 ColumnarBatch（engine.columnar，列式批次）；理解它的节点按列向量化处理，
+        其余节点按 dict 行视图逐个读取。
+      - 内置节点用 derive_item（engine.items）派生输出 item：普通 dict 的浅拷贝，不修改上游 item。
+      - streamable = True 表示节点逐个 item 处理（process_items），
+        流式模式下可与相邻节点组成流水线，按块处理而不物化中间结果。
+        子类重写 execute 而未显式声明 streamable 时，自动视为不可流式。
+      - cacheable = True 表示输出只取决于节点名、参数与输入（无副作用），执行器配置了
+        NodeOutputCache 时可复用此前的结果。可缓存不继承：子类须在确认自身为纯函数后
+        显式声明 cacheable = True，否则视为不可缓存（基类本身的默认实现是纯的）。
     """
+    cpu_bound: bool = False
+    streamable: bool = True
+    cacheable: bool = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "cacheable" not in cls.__dict__:
+            cls.cacheable = False
+        if "execute" in cls.__dict__ and "streamable" not in cls.__dict__:
+            cls.streamable = False
+
     def __init__(self, name: str, can_execute: bool = True, is_trigger: bool = False):
         self.name = name
         self.can_execute = can_execute
@@ -17,14 +64,29 @@ class NodeType:
     def execute(self, context: NodeExecutionContext) -> NodeResult:
         """
         默认实现：将输入数据直接传递，并在每个输出项上打上 processedBy 标记。
-        如果没有输入，则返回空输出。
+        如果没有输入，则返回空输出。列式输入且未重写 process_items 时按列处理。
+        """
+        items = context.input_data
+        if isinstance(items, ColumnarBatch) and type(self).process_items is NodeType.process_items:
+            return NodeResult(data=[items.with_constant(processedBy=context.node_name)])
+        return NodeResult(data=[list(_abortable(self.process_items(items or [], context), context))])
+
+    def process_items(self, items: Iterable[Dict[str, Any]], context: NodeExecutionContext) -> Iterator[Dict[str, Any]]:
+        """
+        逐个处理 item（单输出）。流式模式下 items 为当前数据块，而不是完整输入。
         """
-        out = []
-        for item in (context.input_data or []):
-            new_item = dict(item)
-            new_item["processedBy"] = context.node_name
-            out.append(new_item)
-        return NodeResult(data=[out])
+        node_name = context.node_name
+        for item in items:
+            yield derive_item(item, processedBy=node_name)
+
+
+class AsyncNodeType(NodeType):
+    """
+    异步节点基类：execute 为协程。
+    AsyncWorkflowExecutor 会直接 await 它；同步执行器中则在当前线程开事件循环运行。
+    """
+    async def execute(self, context: NodeExecutionContext) -> NodeResult:
+        return super().execute(context)
 
 
 class ProducerNodeType(NodeType):
@@ -33,6 +95,8 @@ class ProducerNodeType(NodeType):
     - 如果没有输入，则生成初始数据；
     - 如果有输入，则将数据传递并添加 processedBy 标记。
     """
+    cacheable = True
+
     def execute(self, context: NodeExecutionContext) -> NodeResult:
         if not context.input_data:
             data_out = [{
@@ -42,35 +106,54 @@ class ProducerNodeType(NodeType):
             }]
             return NodeResult(data=[data_out])
         else:
-            out = []
-            for item in context.input_data:
-                new_item = dict(item)
-                new_item["processedBy"] = context.node_name
-                out.append(new_item)
+            out = [derive_item(item, processedBy=context.node_name) for item in context.input_data]
             return NodeResult(data=[out])
 
 
 class SwitchNodeType(NodeType):
     """
-    Switch 节点示例：
-    根据输入项中 "category" 字段判断，如果等于 "A" 则输出到分支 0，否则输出到分支 1。
+    Switch 节点：
+    参数 rules 为规则列表，rules[i] 为输出 i 的规则（见 engine.predicates），
+    item 进入第一个匹配的输出，都不匹配时进入最后一个输出。
+    未配置 rules 时保持旧行为：category 等于 "A" 输出到分支 0，否则输出到分支 1。
+    规则按节点参数对象编译一次（CompiledByParameters）；ColumnarBatch 输入按列向量化路由。
     """
+    cacheable = True
+    DEFAULT_RULES = [{"field": "category", "eq": "A"}]
+
     def __init__(self, name: str):
         super().__init__(name, can_execute=True, is_trigger=False)
+        self._routers = CompiledByParameters(self._compile)
+
+    def _compile(self, parameters):
+        rules = parameters.get("rules")
+        router = compile_switch(rules if rules is not None else self.DEFAULT_RULES)
+        # 旧行为的两个分支带 branch 标记
+        branches = ["true", "false"] if rules is None else [None] * router.outputs
+        return router, branches
 
     def execute(self, context: NodeExecutionContext) -> NodeResult:
-        out0: List[Dict[str, Any]] = []
-        out1: List[Dict[str, Any]] = []
-        for item in (context.input_data or []):
-            new_item = dict(item)
-            new_item["processedBy"] = context.node_name
-            if new_item.get("category") == "A":
-                new_item["branch"] = "true"
-                out0.append(new_item)
+        router, branches = self._routers.get(context.parameters)
+        node_name = context.node_name
+
+        items = context.input_data
+        if isinstance(items, ColumnarBatch):
+            outs = router.route_batch(items)
+            return NodeResult(data=[
+                out.with_constant(processedBy=node_name, branch=branch) if branch is not None
+                else out.with_constant(processedBy=node_name)
+                for out, branch in zip(outs, branches)
+            ])
+        outs: List[List[Dict[str, Any]]] = [[] for _ in range(router.outputs)]
+        route = router.route
+        for item in _abortable(iter(items or []), context):
+            idx = route(item)
+            branch = branches[idx]
+            if branch is None:
+                outs[idx].append(derive_item(item, processedBy=node_name))
             else:
-                new_item["branch"] = "false"
-                out1.append(new_item)
-        return NodeResult(data=[out0, out1])
+                outs[idx].append(derive_item(item, processedBy=node_name, branch=branch))
+        return NodeResult(data=outs)
 
 
 class TriggerNodeType(NodeType):
@@ -86,36 +169,49 @@ class TriggerNodeType(NodeType):
         if context.mode == "manual":
             return NodeResult(data=[[{"trig": True, "processedBy": context.node_name}]])
         else:
-            out = []
-            for item in (context.input_data or []):
-                new_item = dict(item)
-                new_item["processedBy"] = context.node_name
-                out.append(new_item)
+            out = [derive_item(item, processedBy=context.node_name) for item in (context.input_data or [])]
             return NodeResult(data=[out])
 
 
 class ConditionNodeType(NodeType):
     """
-    条件节点示例：
-    - 遍历输入数据，根据 item 中的 "pass" 字段判断，
-      如果为 True 则输出到分支 0，否则输出到分支 1。
+    条件节点：
+    - 参数 conditions 为一条规则或规则列表（见 engine.predicates），combinator 为 "and"（默认）或 "or"；
+      未配置时保持旧行为：item 中的 "pass" 字段为真。
+    - 满足条件的 item 输出到分支 0，否则输出到分支 1。
     - 每个输出项均添加 processedBy 和 branch 标记。
+    规则按节点参数对象编译一次（CompiledByParameters）。
     """
+    cacheable = True
+    DEFAULT_CONDITIONS = {"field": "pass", "truthy": True}
+
     def __init__(self, name: str):
         super().__init__(name, can_execute=True, is_trigger=False)
+        self._predicates = CompiledByParameters(self._compile)
+
+    def _compile(self, parameters):
+        return compile_predicate(
+            parameters.get("conditions", self.DEFAULT_CONDITIONS), parameters.get("combinator", "and")
+        )
 
     def execute(self, context: NodeExecutionContext) -> NodeResult:
+        predicate = self._predicates.get(context.parameters)
+        node_name = context.node_name
+        items = context.input_data
+        if isinstance(items, ColumnarBatch):
+            mask = predicate.mask(items)
+            return NodeResult(data=[
+                items.take(mask).with_constant(processedBy=node_name, branch="true"),
+                items.take(~mask).with_constant(processedBy=node_name, branch="false"),
+            ])
         out_true = []
         out_false = []
-        for item in (context.input_data or []):
-            new_item = dict(item)
-            new_item["processedBy"] = context.node_name
-            if new_item.get("pass", False):
-                new_item["branch"] = "true"
-                out_true.append(new_item)
+        test = predicate.test
+        for item in _abortable(iter(items or []), context):
+            if test(item):
+                out_true.append(derive_item(item, processedBy=node_name, branch="true"))
             else:
-                new_item["branch"] = "false"
-                out_false.append(new_item)
+                out_false.append(derive_item(item, processedBy=node_name, branch="false"))
         return NodeResult(data=[out_true, out_false])
 
 
@@ -139,7 +235,7 @@ class ExecuteSubWorkflowNode(NodeType):
             from engine.executor import WorkflowExecutor
             print(f"[SubWorkflowNode] Executing sub-workflow for node '{context.node_name}'")
             sub_executor = WorkflowExecutor(sub_wf, mode=context.mode, global_config=context.global_config)
-            sub_result = sub_executor.execute_workflow()
+            sub_result = sub_executor.execute_workflow(abort_signal=context.abort_signal)
             return NodeResult(data=[[{"subRunData": sub_result.get("runData", {})}]])
         except Exception as e:
             print(f"[SubWorkflowNode] Error executing sub-workflow: {e}")
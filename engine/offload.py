@@ -0,0 +1,93 @@
+# engine/offload.py
+
+import asyncio
+import pickle
+import time
+from concurrent.futures import Executor, TimeoutError as FutureTimeoutError
+from typing import Any, Optional
+
+from .context import NodeExecutionContext
+from .models import NodeResult, ExecutionCancelled
+from .node_types import NodeType
+from .logger import Logger
+
+_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+# 等待进程池结果时检查取消信号的间隔（秒）
+ABORT_POLL_INTERVAL = 0.05
+
+
+def _pack_call(node_logic: NodeType, context: NodeExecutionContext) -> Optional[bytes]:
+    """
+    在父进程中一次性序列化 (节点类型, 上下文输入)。
+    预先打包成 bytes 后，进程池队列只需拷贝一块连续内存，且可使用最高 pickle 协议。
+    abort_signal 无法跨进程传递，不会被发送。
+    无法序列化（例如 global_config 中有 lambda）时返回 None，由调用方回退为本进程执行。
+    """
+    try:
+        return pickle.dumps(
+            (node_logic, context.node_name, context.input_data, context.mode, context.global_config, context.parameters),
+            protocol=_PROTOCOL,
+        )
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        Logger.warning("Node '%s' input is not picklable (%s); running in-process.", context.node_name, e, extra={})
+        return None
+
+
+def _execute_packed(payload: bytes) -> bytes:
+    """
+    进程池 worker 端：还原上下文、执行节点并把 NodeResult 打包返回。
+    """
+    node_logic, node_name, input_data, mode, global_config, parameters = pickle.loads(payload)
+    result = node_logic.execute(NodeExecutionContext(node_name, input_data, mode, global_config, parameters=parameters))
+    return pickle.dumps(result, protocol=_PROTOCOL)
+
+
+def _unpack_result(packed: bytes) -> NodeResult:
+    return pickle.loads(packed)
+
+
+def run_in_process(
+    pool: Executor,
+    node_logic: NodeType,
+    context: NodeExecutionContext,
+    timeout: Optional[float] = None,
+) -> NodeResult:
+    """
+    将 cpu_bound 节点的执行交给进程池，阻塞等待结果（等待期间释放 GIL）。
+    等待期间每隔 ABORT_POLL_INTERVAL 检查 context.abort_signal；超过 timeout 秒（执行的剩余时间）
+    或信号被触发时取消 future 并抛出 ExecutionCancelled。已在 worker 中运行的调用无法中断，
+    其结果被丢弃。
+    """
+    payload = _pack_call(node_logic, context)
+    if payload is None:
+        return node_logic.execute(context)
+    future = pool.submit(_execute_packed, payload)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = ABORT_POLL_INTERVAL if context.abort_signal is not None else None
+        if deadline is not None:
+            left = max(0.0, deadline - time.monotonic())
+            wait = left if wait is None else min(wait, left)
+        try:
+            return _unpack_result(future.result(timeout=wait))
+        except FutureTimeoutError:
+            pass
+        try:
+            context.check_aborted()
+            if deadline is not None and time.monotonic() >= deadline:
+                raise ExecutionCancelled("Execution deadline reached", node_name=context.node_name)
+        except ExecutionCancelled:
+            future.cancel()
+            raise
+
+
+async def run_in_process_async(pool: Executor, node_logic: NodeType, context: NodeExecutionContext) -> Any:
+    """
+    run_in_process 的协程版本，等待期间不阻塞事件循环。
+    """
+    payload = _pack_call(node_logic, context)
+    if payload is None:
+        return node_logic.execute(context)
+    packed = await asyncio.get_running_loop().run_in_executor(pool, _execute_packed, payload)
+    return _unpack_result(packed)
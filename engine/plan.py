@@ -0,0 +1,158 @@
+# engine/plan.py
+
+import threading
+import weakref
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .node_types import NodeType
+from .registry import NodeTypeRegistry, default_registry
+from graph.models.wf_model_old import Workflow, Node
+
+
+# children[node_id][output_index] => ((child_id, input_index), ...)
+ChildEdges = Tuple[Tuple[int, int], ...]
+
+
+class CompiledWorkflowPlan:
+    """
+    工作流的编译执行计划（只读，可被任意多次执行共享）：
+      - 节点使用整数 id（按 workflow.nodes 的插入顺序编号）；
+      - children[id][outputIndex] 为扁平的 (child_id, inputIndex) 元组；
+      - parents[id] 为直接上游（main 连接，去重）；
+      - 预先计算 inputRequirements、无父节点集合、汇点集合、trigger 集合；
+      - 通过 NodeTypeRegistry 预先解析每个节点的 NodeType 单例；
+      - stream_next[id] 为可组成流式流水线的下游节点（线性链路）；
+      - levels 为 main 连接的拓扑分层（节点 id），level_of[id] 为节点所在层；
+        topo_rank[id] 为节点在按层展开的拓扑序中的位置（层内按 id），与执行时机无关。
+        main 连接存在环时编译失败（CycleError），执行前即可发现死循环。
+
+    计划与 workflow.version 及注册表版本绑定；通过 for_workflow() 获取时，
+    若工作流结构已变化（version 不同）则自动重新编译。
+    注意：计划中不持有 Workflow 本身的引用，以便缓存随工作流一起回收。
+    """
+
+    def __init__(self, workflow: Workflow, node_types: Optional[NodeTypeRegistry] = None):
+        self.workflow_id = workflow.id
+        self.version = workflow.version
+        self.node_types = node_types if node_types is not None else default_registry
+        self.node_types_version = self.node_types.version
+
+        self.names: List[str] = list(workflow.nodes.keys())
+        self.index: Dict[str, int] = {nm: i for i, nm in enumerate(self.names)}
+        self.nodes: List[Node] = [workflow.nodes[nm] for nm in self.names]
+
+        size = len(self.names)
+        children: List[List[ChildEdges]] = [[] for _ in range(size)]
+        parents: List[List[int]] = [[] for _ in range(size)]
+        input_indexes: List[set] = [set() for _ in range(size)]
+        incoming_edges: List[int] = [0] * size
+
+        for srcName, connTypes in workflow.connections_by_source_node.items():
+            src_id = self.index.get(srcName)
+            if src_id is None:
+                continue
+            mainConns = connTypes.get("main", [])
+            out_edges: List[ChildEdges] = []
+            for connInfos in mainConns:
+                edges = []
+                for cInfo in connInfos or []:
+                    child_id = self.index.get(cInfo.node)
+                    if child_id is None:
+                        continue
+                    edges.append((child_id, cInfo.index))
+                    input_indexes[child_id].add(cInfo.index)
+                    incoming_edges[child_id] += 1
+                    if src_id not in parents[child_id]:
+                        parents[child_id].append(src_id)
+                out_edges.append(tuple(edges))
+            children[src_id] = out_edges
+
+        self.children: List[Tuple[ChildEdges, ...]] = [tuple(c) for c in children]
+        self.parents: List[Tuple[int, ...]] = [tuple(p) for p in parents]
+        self.input_requirements: List[int] = [len(s) for s in input_indexes]
+        self.input_requirements_by_name: Dict[str, int] = {
+            self.names[i]: need for i, need in enumerate(self.input_requirements) if need
+        }
+
+        self.node_logic: List[NodeType] = [
+            self.node_types.get_by_name_and_version(n.type, n.type_version) for n in self.nodes
+        ]
+        self.trigger_ids: FrozenSet[int] = frozenset(
+            i for i, logic in enumerate(self.node_logic) if logic.is_trigger
+        )
+        # 流式链路：u 仅有一条 main 出边连到 v，v 仅有这一条入边，且两者都可逐 item 处理
+        streamable = [
+            logic.streamable and logic.can_execute and not logic.is_trigger and not logic.cpu_bound
+            for logic in self.node_logic
+        ]
+        self.stream_next: List[Optional[int]] = [None] * size
+        for u in range(size):
+            outs = self.children[u]
+            if len(outs) != 1 or len(outs[0]) != 1:
+                continue
+            v, input_idx = outs[0][0]
+            if streamable[u] and streamable[v] and input_idx == 0 and incoming_edges[v] == 1:
+                self.stream_next[u] = v
+        self.streamable_ids: FrozenSet[int] = frozenset(i for i in range(size) if streamable[i])
+
+        self.levels: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(self.index[nm] for nm in level) for level in workflow.graph_index.topological_levels("main")
+        )
+        self.level_of: List[int] = [0] * size
+        self.topo_rank: List[int] = [0] * size
+        rank = 0
+        for depth, level in enumerate(self.levels):
+            for i in sorted(level):
+                self.level_of[i] = depth
+                self.topo_rank[i] = rank
+                rank += 1
+
+        self.root_ids: FrozenSet[int] = frozenset(i for i in range(size) if not self.parents[i])
+        # 汇点：没有任何 main 出边的节点（其输出即工作流的最终输出）
+        self.sink_ids: FrozenSet[int] = frozenset(
+            i for i in range(size) if not any(self.children[i])
+        )
+        # 自动起点候选：trigger 或无父节点（disabled 在运行时过滤，因为它可能随时被切换）
+        self.start_candidate_ids: Tuple[int, ...] = tuple(
+            i for i in range(size) if i in self.trigger_ids or i in self.root_ids
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self):
+        return f"<CompiledWorkflowPlan workflow={self.workflow_id}, version={self.version}, nodes={len(self.names)}>"
+
+    def logic_of(self, node_name: str) -> NodeType:
+        return self.node_logic[self.index[node_name]]
+
+    def is_current(self, workflow: Workflow, node_types: NodeTypeRegistry) -> bool:
+        return (
+            self.version == workflow.version
+            and self.node_types is node_types
+            and self.node_types_version == node_types.version
+        )
+
+    @classmethod
+    def for_workflow(
+        cls,
+        workflow: Workflow,
+        node_types: Optional[NodeTypeRegistry] = None,
+    ) -> "CompiledWorkflowPlan":
+        """
+        获取（必要时编译）工作流对应的执行计划；同一版本的工作流只编译一次。
+        """
+        node_types = node_types if node_types is not None else default_registry
+        plan = _PLAN_CACHE.get(workflow)
+        if plan is not None and plan.is_current(workflow, node_types):
+            return plan
+        with _PLAN_CACHE_LOCK:
+            plan = _PLAN_CACHE.get(workflow)
+            if plan is None or not plan.is_current(workflow, node_types):
+                plan = cls(workflow, node_types)
+                _PLAN_CACHE[workflow] = plan
+        return plan
+
+
+_PLAN_CACHE: "weakref.WeakKeyDictionary[Workflow, CompiledWorkflowPlan]" = weakref.WeakKeyDictionary()
+_PLAN_CACHE_LOCK = threading.Lock()
@@ -0,0 +1,305 @@
+# engine/predicates.py
+
+import copy
+import functools
+import json
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .columnar import ColumnarBatch, np
+
+_MISSING = object()
+
+Rule = Mapping[str, Any]
+Rules = Union[Rule, Sequence[Rule]]
+
+# DisplayCondition 风格的运算符，外加兼容旧版 Condition 节点的 truthy
+OPERATORS = (
+    "eq", "not_eq", "gte", "lte", "gt", "lt", "between",
+    "startsWith", "endsWith", "includes", "regex", "exists", "truthy",
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _regex(pattern: str) -> "re.Pattern":
+    return re.compile(pattern)
+
+
+class Predicate:
+    """
+    编译后的谓词：predicate(item) 判断单个 item，predicate.mask(batch) 对 ColumnarBatch 向量化求值。
+    """
+    __slots__ = ("test", "_mask", "source")
+
+    def __init__(self, test: Callable[[Mapping], bool], mask: Callable[[ColumnarBatch], Any], source: Any = None):
+        self.test = test
+        self._mask = mask
+        self.source = source
+
+    def __call__(self, item: Mapping) -> bool:
+        return self.test(item)
+
+    def mask(self, batch: ColumnarBatch) -> "np.ndarray":
+        return self._mask(batch)
+
+    def __repr__(self):
+        return f"<Predicate {self.source}>"
+
+
+# =============== 单个运算符 ===============
+def _value_test(op: str, expected: Any) -> Callable[[Any], bool]:
+    """
+    op 对字段值（可能为 _MISSING）的判断函数。
+    """
+    if op == "eq":
+        return lambda x: x is not _MISSING and x == expected
+    if op == "not_eq":
+        return lambda x: x is _MISSING or x != expected
+    if op == "exists":
+        return (lambda x: x is not _MISSING) if expected else (lambda x: x is _MISSING)
+    if op == "truthy":
+        return (lambda x: x is not _MISSING and bool(x)) if expected else (lambda x: x is _MISSING or not x)
+    if op in ("gte", "lte", "gt", "lt", "between"):
+        if op == "between":
+            lo, hi = expected["from"], expected["to"]
+            cmp = lambda x: lo <= x <= hi
+        else:
+            cmp = {
+                "gte": lambda x: x >= expected,
+                "lte": lambda x: x <= expected,
+                "gt": lambda x: x > expected,
+                "lt": lambda x: x < expected,
+            }[op]
+
+        def test(x):
+            if x is _MISSING or x is None:
+                return False
+            try:
+                return cmp(x)
+            except TypeError:
+                return False
+        return test
+    if op == "startsWith":
+        return lambda x: isinstance(x, str) and x.startswith(expected)
+    if op == "endsWith":
+        return lambda x: isinstance(x, str) and x.endswith(expected)
+    if op == "includes":
+        return lambda x: isinstance(x, str) and expected in x
+    if op == "regex":
+        search = _regex(expected).search
+        return lambda x: isinstance(x, str) and search(x) is not None
+    raise ValueError(f"Unknown predicate operator: {op}")
+
+
+def _column_mask(op: str, expected: Any, test: Callable[[Any], bool], field: str) -> Callable[[ColumnarBatch], Any]:
+    """
+    op 的向量化版本；数值 / 字符串列走 numpy，其余逐个值回退到 test。
+    """
+    def fallback(batch: ColumnarBatch):
+        col, valid = batch.columns.get(field), batch.mask(field)
+        if col is None:
+            return np.full(len(batch), test(_MISSING), dtype=bool)
+        return np.fromiter(
+            (test(v if ok else _MISSING) for v, ok in zip(col, valid)), dtype=bool, count=len(batch)
+        )
+
+    if op == "exists":
+        return (lambda b: b.mask(field)) if expected else (lambda b: ~b.mask(field))
+    if op == "truthy":
+        return (lambda b: b.truthy(field)) if expected else (lambda b: ~b.truthy(field))
+    if op == "eq":
+        return lambda b: b.equals(field, expected)
+    if op == "not_eq":
+        return lambda b: ~b.equals(field, expected)
+
+    numeric = isinstance(expected, (int, float)) and not isinstance(expected, bool)
+    if op == "between":
+        numeric = all(isinstance(expected[k], (int, float)) for k in ("from", "to"))
+
+    def vectorised(batch: ColumnarBatch):
+        col = batch.columns.get(field)
+        if col is None:
+            return fallback(batch)
+        kind = col.dtype.kind
+        if numeric and kind in "iuf":
+            if op == "between":
+                hit = (col >= expected["from"]) & (col <= expected["to"])
+            else:
+                hit = {"gte": col >= expected, "lte": col <= expected,
+                       "gt": col > expected, "lt": col < expected}[op]
+            return batch.mask(field) & hit
+        if kind == "U" and isinstance(expected, str):
+            if op == "startsWith":
+                return batch.mask(field) & np.char.startswith(col, expected)
+            if op == "endsWith":
+                return batch.mask(field) & np.char.endswith(col, expected)
+            if op == "includes":
+                return batch.mask(field) & (np.char.find(col, expected) >= 0)
+        return fallback(batch)
+    return vectorised
+
+
+# =============== 规则 / 规则集 ===============
+def _all(parts: List[Callable]) -> Callable:
+    if len(parts) == 1:
+        return parts[0]
+    return lambda x: all(p(x) for p in parts)
+
+
+def _compile_rule(rule: Rule) -> Predicate:
+    """
+    单条规则：{"field": "score", "gte": 10, "lt": 20}，同一规则内的多个运算符为 AND。
+    """
+    field = rule.get("field")
+    if field is None:
+        raise ValueError(f"Rule without field: {rule}")
+    tests, masks = [], []
+    for op, expected in rule.items():
+        if op == "field":
+            continue
+        test = _value_test(op, expected)
+        tests.append(test)
+        masks.append(_column_mask(op, expected, test, field))
+    if not tests:
+        raise ValueError(f"Rule without operator: {rule}")
+
+    value_test = _all(tests)
+
+    def item_test(item: Mapping) -> bool:
+        return value_test(item.get(field, _MISSING))
+
+    def mask(batch: ColumnarBatch):
+        result = masks[0](batch)
+        for m in masks[1:]:
+            result = result & m(batch)
+        return result
+    return Predicate(item_test, mask, rule)
+
+
+def _canonical(rules: Any) -> Optional[str]:
+    """
+    规则的缓存键。含有无法 JSON 序列化的值时返回 None（不缓存），
+    而不是转成字符串——否则不同的规则可能得到同一个键。
+    """
+    try:
+        return json.dumps(rules, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_cached(key: str, combinator: str) -> Predicate:
+    return _compile(json.loads(key), combinator)
+
+
+def _compile(rules: Rules, combinator: str) -> Predicate:
+    if isinstance(rules, Mapping):
+        rules = [rules]
+    preds = [_compile_rule(r) for r in rules]
+    if len(preds) == 1:
+        return preds[0]
+    tests = [p.test for p in preds]
+    if combinator == "or":
+        def item_test(item):
+            return any(t(item) for t in tests)
+
+        def mask(batch):
+            result = preds[0].mask(batch)
+            for p in preds[1:]:
+                result = result | p.mask(batch)
+            return result
+    else:
+        def item_test(item):
+            return all(t(item) for t in tests)
+
+        def mask(batch):
+            result = preds[0].mask(batch)
+            for p in preds[1:]:
+                result = result & p.mask(batch)
+            return result
+    return Predicate(item_test, mask, rules)
+
+
+def compile_predicate(rules: Rules, combinator: str = "and") -> Predicate:
+    """
+    编译一条规则或规则列表（combinator 为 "and" / "or"）。结果按规则内容缓存，
+    相同参数的节点在多次执行间共享同一个编译结果。
+    """
+    if combinator not in ("and", "or"):
+        raise ValueError(f"Unknown combinator: {combinator}")
+    key = _canonical(rules)
+    if key is None:
+        return _compile(rules, combinator)
+    return _compile_cached(key, combinator)
+
+
+class SwitchRouter:
+    """
+    Switch 路由：rules[i] 为输出 i 的规则（单条或列表），按顺序取第一个匹配的输出；
+    都不匹配的 item 进入最后一个（fallback）输出，共 len(rules) + 1 个输出。
+    """
+
+    def __init__(self, rules: Sequence[Rules]):
+        self.predicates = [compile_predicate(r) for r in rules]
+        self.outputs = len(self.predicates) + 1
+
+    def route(self, item: Mapping) -> int:
+        for i, pred in enumerate(self.predicates):
+            if pred.test(item):
+                return i
+        return len(self.predicates)
+
+    def route_batch(self, batch: ColumnarBatch) -> List[ColumnarBatch]:
+        remaining = np.ones(len(batch), dtype=bool)
+        out = []
+        for pred in self.predicates:
+            hit = pred.mask(batch) & remaining
+            out.append(batch.take(hit))
+            remaining &= ~hit
+        out.append(batch.take(remaining))
+        return out
+
+
+@functools.lru_cache(maxsize=256)
+def _router_cached(key: str) -> SwitchRouter:
+    return SwitchRouter(json.loads(key))
+
+
+def compile_switch(rules: Sequence[Rules]) -> SwitchRouter:
+    key = _canonical(rules)
+    if key is None:
+        return SwitchRouter(rules)
+    return _router_cached(key)
+
+
+class CompiledByParameters:
+    """
+    按节点参数对象记忆编译结果：同一个 parameters 对象只编译一次，
+    执行时无需再序列化规则来查找缓存。同时保存参数的深拷贝，参数被原地修改后
+    （与快照不再相等）重新编译；最多保留 maxsize 个。
+    """
+
+    def __init__(self, compile: Callable[[Mapping[str, Any]], Any], maxsize: int = 256):
+        self._compile = compile
+        self._maxsize = maxsize
+        # id(parameters) => (parameters, 快照, 编译结果)；保留 parameters 的引用，保证 id 不被复用
+        self._entries: Dict[int, Tuple[Mapping[str, Any], Any, Any]] = {}
+
+    def get(self, parameters: Mapping[str, Any]) -> Any:
+        entry = self._entries.get(id(parameters))
+        if entry is not None and entry[0] is parameters and entry[1] == parameters:
+            return entry[2]
+        compiled = self._compile(parameters)
+        try:
+            snapshot = copy.deepcopy(parameters)
+        except Exception:
+            # 无法复制的参数不记忆，每次重新编译（compile_predicate 自身仍按内容缓存）
+            return compiled
+        if len(self._entries) >= self._maxsize:
+            self._entries.clear()
+        self._entries[id(parameters)] = (parameters, snapshot, compiled)
+        return compiled
+
+    def __getstate__(self):
+        # 编译结果含闭包，无法 pickle（如节点类型被发送到进程池）；在目标进程中重新编译
+        return {"_compile": self._compile, "_maxsize": self._maxsize, "_entries": {}}
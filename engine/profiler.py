@@ -0,0 +1,183 @@
+# engine/profiler.py
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# 每个 2 的幂区间再细分为 2**_SUB_BUCKET_BITS 个桶，相对误差约 1/32
+_SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+
+
+class LatencyHistogram:
+    """
+    HDR 风格的对数-线性直方图（微秒精度）：内存占用与记录次数无关，
+    可跨执行累积并合并，百分位误差约 3%。
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    @staticmethod
+    def _bucket_of(micros: int) -> int:
+        if micros < _SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - _SUB_BUCKET_BITS - 1
+        return ((shift + 1) << _SUB_BUCKET_BITS) + ((micros >> shift) - _SUB_BUCKETS)
+
+    @staticmethod
+    def _bucket_upper(bucket: int) -> int:
+        if bucket < _SUB_BUCKETS:
+            return bucket
+        shift = (bucket >> _SUB_BUCKET_BITS) - 1
+        sub = bucket & (_SUB_BUCKETS - 1)
+        return ((_SUB_BUCKETS + sub + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        seconds = max(0.0, seconds)
+        bucket = self._bucket_of(int(seconds * 1_000_000))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for bucket, n in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        第 p 百分位（0~100）的秒数，取所在桶的上界（不超过实际最大值）。
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(p / 100.0 * self.count)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._bucket_upper(bucket) / 1_000_000, self.max)
+        return self.max
+
+
+@dataclass
+class NodeProfile:
+    """
+    单个节点（按 workflow_id + 节点名区分）跨执行累积的统计。
+    """
+    workflow_id: str
+    node_name: str
+    runs: int = 0
+    attempts: int = 0
+    failures: int = 0
+    wall_total: float = 0.0
+    cpu_total: float = 0.0
+    items_in: int = 0
+    items_out: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    # attempt 序号 => 该次尝试的耗时分布
+    latency_by_attempt: Dict[int, LatencyHistogram] = field(default_factory=dict)
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items_out / self.wall_total if self.wall_total > 0 else 0.0
+
+
+class Profiler:
+    """
+    内置的节点级性能分析器，挂到执行器上即可（WorkflowExecutor(..., profiler=p)）：
+    记录每个节点每次尝试的墙钟时间、CPU 时间（当前线程）、输入/输出 item 数，
+    并在多次执行间累积延迟直方图。可在多个执行器、多个工作流之间共享。
+
+        p = Profiler()
+        WorkflowExecutor(wf, profiler=p).execute_workflow()
+        print(p.report())
+    """
+
+    def __init__(self):
+        self._profiles: Dict[Tuple[str, str], NodeProfile] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        workflow_id: str,
+        node_name: str,
+        attempt: int,
+        wall: float,
+        cpu: Optional[float],
+        items_in: int,
+        items_out: int,
+        failed: bool = False,
+    ) -> None:
+        """
+        记录一次尝试。failed=True 表示该尝试失败（之后会重试或报错），不计入 runs。
+        cpu 为 None 表示无法测量（例如异步节点在等待期间让出了线程）。
+        """
+        key = (workflow_id, node_name)
+        with self._lock:
+            prof = self._profiles.get(key)
+            if prof is None:
+                prof = self._profiles[key] = NodeProfile(workflow_id, node_name)
+            prof.attempts += 1
+            if failed:
+                prof.failures += 1
+            else:
+                prof.runs += 1
+                prof.items_in += items_in
+                prof.items_out += items_out
+            prof.wall_total += wall
+            if cpu is not None:
+                prof.cpu_total += cpu
+            prof.latency.record(wall)
+            hist = prof.latency_by_attempt.get(attempt)
+            if hist is None:
+                hist = prof.latency_by_attempt[attempt] = LatencyHistogram()
+            hist.record(wall)
+
+    def profiles(self, workflow_id: Optional[str] = None) -> List[NodeProfile]:
+        with self._lock:
+            return [p for p in self._profiles.values() if workflow_id is None or p.workflow_id == workflow_id]
+
+    def get(self, workflow_id: str, node_name: str) -> Optional[NodeProfile]:
+        return self._profiles.get((workflow_id, node_name))
+
+    def hot_nodes(self, top: int = 10, by: str = "wall_total", workflow_id: Optional[str] = None) -> List[NodeProfile]:
+        """
+        按累计指标（wall_total / cpu_total / attempts / items_out ...）排序的前 top 个节点。
+        """
+        return sorted(self.profiles(workflow_id), key=lambda p: getattr(p, by), reverse=True)[:top]
+
+    def report(self, top: int = 10, by: str = "wall_total", workflow_id: Optional[str] = None) -> str:
+        """
+        文本形式的热点节点报告。
+        """
+        rows = self.hot_nodes(top, by, workflow_id)
+        header = (f"{'workflow':<16} {'node':<20} {'runs':>6} {'tries':>6} {'wall(s)':>10} {'cpu(s)':>10} "
+                  f"{'p50(ms)':>9} {'p99(ms)':>9} {'in':>8} {'out':>8} {'items/s':>10}")
+        lines = [header, "-" * len(header)]
+        for p in rows:
+            lines.append(
+                f"{p.workflow_id:<16.16} {p.node_name:<20.20} {p.runs:>6} {p.attempts:>6} "
+                f"{p.wall_total:>10.4f} {p.cpu_total:>10.4f} "
+                f"{p.latency.percentile(50) * 1000:>9.3f} {p.latency.percentile(99) * 1000:>9.3f} "
+                f"{p.items_in:>8} {p.items_out:>8} {p.items_per_second:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._profiles.clear()
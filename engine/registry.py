@@ -0,0 +1,170 @@
+# engine/registry.py
+
+import threading
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from graph.models.node_type import NodeTypes, VersionedNodeType
+from graph.models.description_model import NodeTypeBaseDescription
+
+from .node_types import (
+    NodeType,
+    ProducerNodeType,
+    SwitchNodeType,
+    TriggerNodeType,
+    ConditionNodeType,
+    ExecuteSubWorkflowNode,
+)
+
+NodeTypeFactory = Union[NodeType, Type[NodeType]]
+
+# 兼容旧的子串匹配规则：类型名（小写）包含 keyword 时，使用 canonical 类型的注册项
+_LEGACY_KEYWORDS: Tuple[Tuple[str, str], ...] = (
+    ("producer", "producer"),
+    ("switch", "switch"),
+    ("trigger", "trigger"),
+    ("condition", "condition"),
+    ("executesubworkflow", "executeSubWorkflow"),
+)
+
+DEFAULT_TYPE = "default"
+
+
+class RegisteredNodeType(VersionedNodeType):
+    """
+    同一类型名下按版本保存的 NodeType 单例。
+    内置节点类型都是无状态的，因此每个 (type, version) 只需一个实例。
+    """
+
+    def __init__(self, type_name: str):
+        self.type_name = type_name
+        self._versions: Dict[int, NodeType] = {}
+
+    @property
+    def node_versions(self) -> Dict[int, NodeType]:
+        return self._versions
+
+    @property
+    def current_version(self) -> int:
+        return max(self._versions)
+
+    @property
+    def description(self) -> NodeTypeBaseDescription:
+        return NodeTypeBaseDescription(
+            displayName=self.type_name,
+            name=self.type_name,
+            group=[],
+            description="",
+            defaultVersion=self.current_version,
+        )
+
+    def get_node_type(self, version: Optional[int] = None) -> NodeType:
+        """
+        返回指定版本；未指定或该版本未注册时返回当前（最高）版本。
+        """
+        if version is not None and version in self._versions:
+            return self._versions[version]
+        return self._versions[self.current_version]
+
+    def __repr__(self):
+        return f"<RegisteredNodeType {self.type_name} versions={sorted(self._versions)}>"
+
+
+class NodeTypeRegistry(NodeTypes):
+    """
+    节点类型注册表：
+      - register() 注册类型（实例或类，类只会实例化一次）；
+      - get_by_name_and_version() 按 (type, version) O(1) 查找，结果缓存；
+      - 未注册的类型名按旧规则做子串匹配（如 "webhookTrigger" => trigger），
+        都不匹配则使用 "default" 直通节点。
+    插件可以直接注册到 default_registry，或创建独立的注册表传给 WorkflowExecutor。
+    """
+
+    def __init__(self, include_builtins: bool = True):
+        self._types: Dict[str, RegisteredNodeType] = {}
+        self._resolved: Dict[Tuple[str, Optional[int]], NodeType] = {}
+        self._lock = threading.Lock()
+        # 注册表内容变化时递增，执行计划据此判断是否需要重新解析节点类型
+        self.version = 0
+
+        if include_builtins:
+            self.register(DEFAULT_TYPE, NodeType)
+            self.register("producer", ProducerNodeType)
+            self.register("switch", SwitchNodeType)
+            self.register("trigger", TriggerNodeType)
+            self.register("condition", ConditionNodeType)
+            self.register("executeSubWorkflow", ExecuteSubWorkflowNode)
+
+    def register(self, type_name: str, node_type: NodeTypeFactory, version: int = 1) -> NodeType:
+        """
+        注册节点类型。node_type 可以是 NodeType 实例，也可以是 NodeType 子类
+        （以 type_name 为参数实例化一次）。重复注册同一 (type, version) 会覆盖。
+        """
+        instance = node_type(name=type_name) if isinstance(node_type, type) else node_type
+        with self._lock:
+            entry = self._types.get(type_name)
+            if entry is None:
+                entry = self._types[type_name] = RegisteredNodeType(type_name)
+            entry.node_versions[version] = instance
+            self._resolved = {}
+            self.version += 1
+        return instance
+
+    def unregister(self, type_name: str, version: Optional[int] = None) -> None:
+        with self._lock:
+            entry = self._types.get(type_name)
+            if entry is None:
+                return
+            if version is None:
+                del self._types[type_name]
+            else:
+                entry.node_versions.pop(version, None)
+                if not entry.node_versions:
+                    del self._types[type_name]
+            self._resolved = {}
+            self.version += 1
+
+    def get_by_name(self, node_type: str) -> Optional[RegisteredNodeType]:
+        entry = self._types.get(node_type)
+        if entry is not None:
+            return entry
+        canonical = self._legacy_type_name(node_type)
+        return self._types.get(canonical) if canonical else None
+
+    def get_by_name_and_version(self, node_type: str, version: Optional[int] = None) -> NodeType:
+        key = (node_type, version)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            entry = self.get_by_name(node_type)
+            if entry is None:
+                entry = self._types.get(DEFAULT_TYPE)
+            if entry is None:
+                raise KeyError(f"Unknown node type: {node_type}")
+            resolved = entry.get_node_type(version)
+            self._resolved[key] = resolved
+        return resolved
+
+    def get_known_types(self) -> Dict[str, Any]:
+        return {name: sorted(entry.node_versions) for name, entry in self._types.items()}
+
+    def _legacy_type_name(self, node_type: str) -> Optional[str]:
+        node_type_lower = node_type.lower()
+        for keyword, canonical in _LEGACY_KEYWORDS:
+            if keyword in node_type_lower:
+                return canonical
+        return None
+
+
+default_registry = NodeTypeRegistry()
+
+
+def register_node_type(type_name: str, version: int = 1, registry: Optional[NodeTypeRegistry] = None):
+    """
+    类装饰器：将 NodeType 子类注册到注册表（默认 default_registry）。
+
+        @register_node_type("myPlugin")
+        class MyPluginNode(NodeType): ...
+    """
+    def decorator(cls: Type[NodeType]) -> Type[NodeType]:
+        (registry or default_registry).register(type_name, cls, version=version)
+        return cls
+    return decorator
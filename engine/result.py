@@ -0,0 +1,158 @@
+# engine/result.py
+
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from .models import NodeResult, ExecutionStatus
+from graph.models.data_model import NodeExecutionData
+from graph.models.executor_model import NodeExecutionHint, TaskData, ExecutionStatus as TaskExecutionStatus
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return repr(value)
+
+
+_PINNED_HINT = NodeExecutionHint(message="Output from pinned data", type="info", location="outputPane")
+
+
+def node_result_to_task_data(result: NodeResult) -> TaskData:
+    """
+    将 NodeResult 转为 executor_model.TaskData：data 为 {"main": [[NodeExecutionData, ...], ...]}。
+    """
+    data = None
+    if result.data is not None:
+        data = {"main": [
+            [NodeExecutionData(json_data=item) for item in (out or [])]
+            for out in result.data
+        ]}
+    return TaskData(
+        start_time=result.start_time or 0.0,
+        execution_time=result.execution_time or 0.0,
+        execution_status=TaskExecutionStatus.ERROR if result.error else TaskExecutionStatus.SUCCESS,
+        data=data,
+        error=str(result.error) if result.error else None,
+        hints=[_PINNED_HINT] if result.pinned else None,
+    )
+
+
+def _task_data_to_json(task: TaskData) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "startTime": task.start_time,
+        "executionTime": task.execution_time,
+        "executionStatus": task.execution_status.value if task.execution_status else None,
+        "data": None,
+    }
+    if task.data is not None:
+        out["data"] = {
+            conn_type: [[{"json": entry.json_data} for entry in output] for output in outputs]
+            for conn_type, outputs in task.data.items()
+        }
+    if task.error:
+        out["error"] = task.error
+    if task.hints:
+        out["hints"] = [{"message": h.message, "type": h.type, "location": h.location} for h in task.hints]
+    return out
+
+
+class ExecutionResult(Mapping):
+    """
+    结构化的执行结果。
+
+    仍可当作旧的 dict 结果使用（result["status"]、result["runData"] ...），
+    但 runData 的 repr 字符串视图只在被访问时构建；构建结果本身只做 O(节点数) 的快照，
+    不会格式化任何 item。结构化数据通过 task_data()（TaskData 列表）获取，
+    序列化使用 to_json() / iter_json()（后者按节点运行分块流式输出）。
+    """
+
+    def __init__(
+        self,
+        status: ExecutionStatus,
+        started_at: float,
+        finished_at: float,
+        run_data: Dict[str, List[NodeResult]],
+        error_msg: Optional[str] = None,
+        error_node: Optional[str] = None,
+    ):
+        self.status = status
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.execution_time = finished_at - started_at if finished_at > started_at else 0
+        # 浅快照：执行器后续追加的运行不会影响本结果
+        self.node_results: Dict[str, List[NodeResult]] = {nm: list(runs) for nm, runs in run_data.items()}
+        self.error: Optional[Dict[str, Any]] = None
+        if error_msg:
+            self.error = {"message": error_msg, "nodeName": error_node}
+
+        self._fields: Dict[str, Any] = {
+            "status": status.name,
+            "startedAt": started_at,
+            "finishedAt": finished_at,
+            "executionTime": self.execution_time,
+        }
+        if self.error:
+            self._fields["error"] = self.error
+        self._legacy_run_data: Optional[Dict[str, List[str]]] = None
+        self._task_data: Optional[Dict[str, List[TaskData]]] = None
+
+    # =============== Mapping（兼容旧 dict 结果） ===============
+    def __getitem__(self, key: str) -> Any:
+        if key == "runData":
+            if self._legacy_run_data is None:
+                self._legacy_run_data = {
+                    nm: [repr(r) for r in runs] for nm, runs in self.node_results.items()
+                }
+            return self._legacy_run_data
+        return self._fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from ("status", "startedAt", "finishedAt", "executionTime", "runData")
+        if self.error:
+            yield "error"
+
+    def __len__(self) -> int:
+        return 6 if self.error else 5
+
+    def __repr__(self):
+        return (f"<ExecutionResult status={self.status.name}, nodes={len(self.node_results)}, "
+                f"executionTime={self.execution_time:.6f}, error={self.error}>")
+
+    # =============== 结构化访问 ===============
+    def task_data(self) -> Dict[str, List[TaskData]]:
+        if self._task_data is None:
+            self._task_data = {
+                nm: [node_result_to_task_data(r) for r in runs] for nm, runs in self.node_results.items()
+            }
+        return self._task_data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        可直接 json 序列化的结构（runData 为 TaskData 形式，而不是 repr 字符串）。
+        """
+        out = dict(self._fields)
+        out["runData"] = {
+            nm: [_task_data_to_json(t) for t in tasks] for nm, tasks in self.task_data().items()
+        }
+        return out
+
+    def to_json(self, **kwargs: Any) -> str:
+        kwargs.setdefault("default", _json_default)
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def iter_json(self) -> Iterator[str]:
+        """
+        流式输出与 to_json() 等价的 JSON 文本，每次产出一个节点运行，避免一次性构建整个字符串。
+        """
+        head = json.dumps(self._fields, default=_json_default)
+        yield head[:-1] + ', "runData": {'
+        for n, (nm, runs) in enumerate(self.node_results.items()):
+            yield ("" if n == 0 else ", ") + json.dumps(nm) + ": ["
+            for i, r in enumerate(runs):
+                chunk = json.dumps(_task_data_to_json(node_result_to_task_data(r)), default=_json_default)
+                yield chunk if i == 0 else ", " + chunk
+            yield "]"
+        yield "}}"
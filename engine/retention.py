@@ -0,0 +1,179 @@
+# engine/retention.py
+
+import os
+import pickle
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from .models import NodeResult, ExecutionStatus
+from graph.models.data_model import WorkflowSettings
+
+RunData = Dict[str, List[NodeResult]]
+
+
+def _with_timing(result: NodeResult, source: NodeResult) -> NodeResult:
+    result.start_time = source.start_time
+    result.execution_time = source.execution_time
+    result.pinned = source.pinned
+    return result
+
+
+def released_result(result: NodeResult) -> NodeResult:
+    """
+    丢弃输出数据、只保留 item 数、错误与耗时的轻量结果。
+    """
+    if result.data is None:
+        count = result.streamed_items
+    else:
+        count = sum(len(out or []) for out in result.data)
+    return _with_timing(NodeResult(error=result.error, streamed_items=count), result)
+
+
+class RetentionPolicy:
+    """
+    run_data 的保留策略。执行器在节点结果分发给下游之后调用 record()，
+    此时下游已拿到输出（waitingData），策略可以安全地丢弃或替换 run_data 中的数据；
+    执行结束时调用 finalize()，可按最终状态再做一次裁剪。
+
+    默认行为（KeepAll）与旧版一致：保留每个节点的每次运行。
+    """
+
+    def record(self, run_data: RunData, node_name: str, result: NodeResult, is_sink: bool) -> None:
+        run_data.setdefault(node_name, []).append(result)
+
+    def finalize(self, run_data: RunData, status: ExecutionStatus, sink_names: List[str]) -> None:
+        pass
+
+    @staticmethod
+    def from_settings(settings: Optional[WorkflowSettings]) -> "RetentionPolicy":
+        """
+        根据 WorkflowSettings.save_data_success_execution / save_data_error_execution 选择策略：
+          - 两者都为 "none"：执行过程中即释放非汇点节点的数据（KeepSinkNodes）；
+          - 仅其中之一为 "none"：执行中保留全部，结束后按最终状态裁剪；
+          - 其它（None / "DEFAULT" / "all"）：KeepAll。
+        """
+        if settings is None:
+            return KeepAll()
+        on_success = settings.save_data_success_execution == "none"
+        on_error = settings.save_data_error_execution == "none"
+        if on_success and on_error:
+            return KeepSinkNodes()
+        if on_success or on_error:
+            return _PruneOnFinish(on_success=on_success, on_error=on_error)
+        return KeepAll()
+
+
+class KeepAll(RetentionPolicy):
+    """
+    保留所有节点的所有运行。
+    """
+
+
+class KeepLastRun(RetentionPolicy):
+    """
+    每个节点只保留最后一次运行。
+    """
+
+    def record(self, run_data: RunData, node_name: str, result: NodeResult, is_sink: bool) -> None:
+        run_data[node_name] = [result]
+
+
+class KeepSinkNodes(RetentionPolicy):
+    """
+    只保留汇点节点（无下游）的输出；其它节点只记录 item 数、错误与耗时。
+    """
+
+    def record(self, run_data: RunData, node_name: str, result: NodeResult, is_sink: bool) -> None:
+        if not is_sink:
+            result = released_result(result)
+        run_data.setdefault(node_name, []).append(result)
+
+
+class SampleItems(RetentionPolicy):
+    """
+    每个节点的每个输出最多保留前 n 个 item（汇点节点默认保留全部）。
+    """
+
+    def __init__(self, n: int, include_sinks: bool = False):
+        self.n = max(0, n)
+        self.include_sinks = include_sinks
+
+    def record(self, run_data: RunData, node_name: str, result: NodeResult, is_sink: bool) -> None:
+        if result.data is not None and (self.include_sinks or not is_sink):
+            sampled = NodeResult(data=[(out or [])[:self.n] for out in result.data], error=result.error)
+            result = _with_timing(sampled, result)
+        run_data.setdefault(node_name, []).append(result)
+
+
+class SpilledNodeResult(NodeResult):
+    """
+    数据已写入磁盘的节点结果；访问 data 时才从文件中读取。
+    """
+
+    def __init__(self, path: str, source: NodeResult):
+        super().__init__(error=source.error, streamed_items=source.streamed_items)
+        _with_timing(self, source)
+        self.path = path
+
+    @property
+    def data(self) -> Optional[List[List[Dict[str, Any]]]]:
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+    @data.setter
+    def data(self, value: Any) -> None:
+        # NodeResult.__init__ 会赋值 data=None，真正的数据在文件中
+        pass
+
+
+class SpillToDisk(RetentionPolicy):
+    """
+    把非汇点节点的输出 pickle 到 directory 下（默认临时目录），run_data 中只保留
+    SpilledNodeResult；需要时仍可通过 .data 读回。调用 cleanup() 删除已写入的文件。
+    """
+
+    def __init__(self, directory: Optional[str] = None, include_sinks: bool = False):
+        self.directory = directory if directory is not None else tempfile.mkdtemp(prefix="wf-spill-")
+        os.makedirs(self.directory, exist_ok=True)
+        self.include_sinks = include_sinks
+        self.paths: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, run_data: RunData, node_name: str, result: NodeResult, is_sink: bool) -> None:
+        if result.data is not None and (self.include_sinks or not is_sink):
+            with self._lock:
+                path = os.path.join(self.directory, f"{len(self.paths):06d}.pkl")
+                self.paths.append(path)
+            with open(path, "wb") as f:
+                pickle.dump(result.data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            result = SpilledNodeResult(path, result)
+        run_data.setdefault(node_name, []).append(result)
+
+    def cleanup(self) -> None:
+        with self._lock:
+            paths, self.paths = self.paths, []
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class _PruneOnFinish(RetentionPolicy):
+    """
+    执行中保留全部数据；结束后若对应状态的保存设置为 "none"，释放非汇点节点的数据。
+    """
+
+    def __init__(self, on_success: bool, on_error: bool):
+        self.on_success = on_success
+        self.on_error = on_error
+
+    def finalize(self, run_data: RunData, status: ExecutionStatus, sink_names: List[str]) -> None:
+        prune = self.on_success if status == ExecutionStatus.SUCCESS else self.on_error
+        if not prune:
+            return
+        sinks = set(sink_names)
+        for nm, runs in run_data.items():
+            if nm not in sinks:
+                run_data[nm] = [released_result(r) for r in runs]
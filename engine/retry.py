@@ -0,0 +1,83 @@
+# engine/retry.py
+
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class RetryPolicy:
+    """
+    节点重试策略：第 n 次重试前等待 delay * backoff**(n-1) 秒，
+    不超过 max_delay；jitter 为 0~1 的比例，随机缩短等待时间以错开同时失败的节点。
+    """
+    max_retries: int = 0
+    delay: float = 0.0
+    backoff: float = 1.0
+    max_delay: Optional[float] = None
+    jitter: float = 0.0
+
+    def delay_for(self, retry: int, rng: Optional[random.Random] = None) -> float:
+        d = self.delay * (self.backoff ** max(0, retry - 1))
+        if self.max_delay is not None:
+            d = min(d, self.max_delay)
+        if self.jitter > 0 and d > 0:
+            d -= d * min(self.jitter, 1.0) * (rng or random).random()
+        return max(0.0, d)
+
+    @classmethod
+    def from_node(cls, node: Any) -> "RetryPolicy":
+        """
+        从节点读取策略。parameters 中的 maxRetries / retryDelay / retryBackoff /
+        retryMaxDelay / retryJitter 优先；否则使用 WorkflowNode 的
+        max_tries（总尝试次数）与 wait_between_tries（毫秒）。
+        """
+        params = node.parameters
+        max_tries = getattr(node, "max_tries", None)
+        wait_between = getattr(node, "wait_between_tries", None)
+        max_retries = params.get("maxRetries", max_tries - 1 if max_tries else 0)
+        delay = params.get("retryDelay", wait_between / 1000 if wait_between else 0)
+        max_delay = params.get("retryMaxDelay")
+        return cls(
+            max_retries=int(max_retries),
+            delay=float(delay),
+            backoff=float(params.get("retryBackoff", 1.0)),
+            max_delay=float(max_delay) if max_delay is not None else None,
+            jitter=float(params.get("retryJitter", 0.0)),
+        )
+
+
+class RetryQueue:
+    """
+    待重试节点的延迟队列（按唤醒时间排序的小顶堆），由调度循环轮询，
+    等待期间其它就绪节点照常执行。条目为 (node_id, input_data, attempt)。
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int, Optional[List[Dict[str, Any]]], int]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, delay: float, node_id: int, input_data: Optional[List[Dict[str, Any]]], attempt: int) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), node_id, input_data, attempt))
+
+    def pop_due(self) -> List[Tuple[int, Optional[List[Dict[str, Any]]], int]]:
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, node_id, input_data, attempt = heapq.heappop(self._heap)
+            due.append((node_id, input_data, attempt))
+        return due
+
+    def next_wait(self) -> Optional[float]:
+        """
+        距最早一个条目到期的秒数；队列为空时返回 None。
+        """
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
@@ -51,7 +51,7 @@ class NodeTypeBaseDescription:
     hidden: Optional[bool] = False
     usableAsTool: Optional[bool] = False
 
-@dataclass
+@dataclass(kw_only=True)
 class NodeTypeDescription(NodeTypeBaseDescription):
     version: Union[int, List[int]]
     defaults: Optional[Dict[str, Any]] = None
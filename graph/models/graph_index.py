@@ -0,0 +1,282 @@
+import threading
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# 连接类型过滤：具体类型名（如 "main"），或以下两个特殊值
+ALL = "ALL"
+ALL_NON_MAIN = "ALL_NON_MAIN"
+
+# adjacency[节点名][连接类型] => 按连接顺序去重的相邻节点
+Adjacency = Dict[str, Dict[str, List[str]]]
+
+
+def _build_adjacency(connections: Dict[str, Dict[str, List[List[object]]]]) -> Adjacency:
+    adjacency: Adjacency = {}
+    for node_name, type_dict in connections.items():
+        per_type: Dict[str, List[str]] = {}
+        for conn_type, list_of_lists in type_dict.items():
+            seen = set()
+            ordered: List[str] = []
+            for conn_infos in list_of_lists:
+                for ci in conn_infos or ():
+                    if ci.node not in seen:
+                        seen.add(ci.node)
+                        ordered.append(ci.node)
+            per_type[conn_type] = ordered
+        adjacency[node_name] = per_type
+    return adjacency
+
+
+class CycleError(ValueError):
+    """
+    连接图中存在环。nodes 为位于环上（或两个环之间）的全部节点，按工作流中的顺序；
+    cycle 为其中一个具体的环（按连接方向，不重复首节点）。
+    """
+
+    def __init__(self, nodes: List[Hashable], cycle: List[Hashable]):
+        self.nodes = nodes
+        self.cycle = cycle
+        path = " -> ".join(str(n) for n in cycle + cycle[:1])
+        super().__init__(f"Workflow contains a cycle: {path}")
+
+
+def topological_levels(
+    nodes: Sequence[Hashable], children: Callable[[Hashable], Iterable[Hashable]]
+) -> List[List[Hashable]]:
+    """
+    Kahn 算法分层：第 0 层为没有父节点的节点，其余节点所在层 = 最长上游路径的长度，
+    即每个节点只依赖更早层中的节点；层内保持 nodes 中的顺序。
+    不在 nodes 中的相邻节点被忽略。存在环时抛出 CycleError。O(V+E)。
+    """
+    order = list(nodes)
+    position = {n: i for i, n in enumerate(order)}
+    successors: List[List[int]] = []
+    indegree = [0] * len(order)
+    for n in order:
+        succ: List[int] = []
+        seen = set()
+        for child in children(n):
+            j = position.get(child)
+            if j is not None and j not in seen:
+                seen.add(j)
+                succ.append(j)
+                indegree[j] += 1
+        successors.append(succ)
+
+    levels: List[List[Hashable]] = []
+    level = [i for i in range(len(order)) if indegree[i] == 0]
+    placed = 0
+    while level:
+        levels.append([order[i] for i in level])
+        placed += len(level)
+        nxt: List[int] = []
+        for i in level:
+            for j in successors[i]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    nxt.append(j)
+        nxt.sort()
+        level = nxt
+
+    if placed < len(order):
+        raise _cycle_error(order, successors, indegree)
+    return levels
+
+
+def _cycle_error(order: List[Hashable], successors: List[List[int]], indegree: List[int]) -> CycleError:
+    # Kahn 剩下的节点 = 环上的节点 + 环的下游；再反向剥掉没有剩余出边的节点，只留下环（及环之间）的节点
+    remaining = {i for i, d in enumerate(indegree) if d > 0}
+    outdegree = {i: 0 for i in remaining}
+    predecessors: Dict[int, List[int]] = {i: [] for i in remaining}
+    for i in remaining:
+        for j in successors[i]:
+            if j in remaining:
+                outdegree[i] += 1
+                predecessors[j].append(i)
+    sinks = [i for i, d in outdegree.items() if d == 0]
+    while sinks:
+        j = sinks.pop()
+        remaining.discard(j)
+        for i in predecessors[j]:
+            outdegree[i] -= 1
+            if outdegree[i] == 0:
+                sinks.append(i)
+
+    # 剩下的每个节点都有指向剩余节点的出边，沿第一条出边走必然回到走过的节点
+    start = min(remaining)
+    walk: List[int] = []
+    seen: Dict[int, int] = {}
+    curr = start
+    while curr not in seen:
+        seen[curr] = len(walk)
+        walk.append(curr)
+        curr = next(j for j in successors[curr] if j in remaining)
+    cycle = [order[i] for i in walk[seen[curr]:]]
+    return CycleError([order[i] for i in sorted(remaining)], cycle)
+
+
+class WorkflowGraphIndex:
+    """
+    工作流连接图的索引（wf_model_old.Workflow.graph_index）：
+      - 每个节点、每种连接类型的直接子节点 / 父节点（保持连接顺序，去重）；
+      - 传递闭包（全部下游 / 上游）按 (节点, 连接类型) 记忆化，
+        顺序与 Workflow.get_child_nodes / get_parent_nodes 的 DFS 先序一致；
+        BFS 顺序的下游另行记忆化；
+      - 拓扑分层（topological_levels）同样按连接类型记忆化，有环时抛出 CycleError。
+    所有遍历都使用显式栈，不受递归深度限制。
+
+    索引与 workflow.version 绑定。连接编辑（add_connection / remove_connection / remove_node /
+    rename_node）通过 refresh() 只更新受影响节点的直接相邻关系，并清空记忆化结果；
+    其它方式修改连接后 version 变化，Workflow.graph_index 会重新构建索引。
+    """
+
+    def __init__(
+        self,
+        connections_by_source: Dict[str, Dict[str, List[List[object]]]],
+        connections_by_destination: Dict[str, Dict[str, List[List[object]]]],
+        version: int = 0,
+        nodes: Optional[Iterable[str]] = None,
+    ):
+        self.version = version
+        self._children = _build_adjacency(connections_by_source)
+        self._parents = _build_adjacency(connections_by_destination)
+        # 节点全集（工作流中的顺序，可直接引用 workflow.nodes）；未给出时取连接中出现过的节点
+        self._nodes: Iterable[str] = nodes if nodes is not None else tuple(
+            dict.fromkeys(
+                [*self._children, *self._parents]
+                + [n for adjacency in (self._children, self._parents)
+                   for per_type in adjacency.values() for lst in per_type.values() for n in lst]
+            )
+        )
+        self._closures: Dict[Tuple[str, str, str], Tuple[str, ...]] = {}
+        self._levels: Dict[str, Tuple[Tuple[str, ...], ...]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(
+        self,
+        connections_by_source: Dict[str, Dict[str, List[List[object]]]],
+        connections_by_destination: Dict[str, Dict[str, List[List[object]]]],
+        node_names: Iterable[str],
+        version: int,
+    ) -> None:
+        """
+        增量更新：只重新计算 node_names 的直接相邻关系（O(度数)），清空记忆化结果并更新版本。
+        """
+        with self._lock:
+            for name in node_names:
+                for adjacency, connections in (
+                    (self._children, connections_by_source),
+                    (self._parents, connections_by_destination),
+                ):
+                    type_dict = connections.get(name)
+                    if type_dict:
+                        adjacency[name] = _build_adjacency({name: type_dict})[name]
+                    else:
+                        adjacency.pop(name, None)
+            self._closures.clear()
+            self._levels.clear()
+            self.version = version
+
+    # =============== 直接相邻 ===============
+    @staticmethod
+    def _neighbors(adjacency: Adjacency, node_name: str, conn_type: str) -> Iterable[str]:
+        type_dict = adjacency.get(node_name)
+        if not type_dict:
+            return ()
+        if conn_type == ALL:
+            lists = list(type_dict.values())
+        elif conn_type == ALL_NON_MAIN:
+            lists = [v for t, v in type_dict.items() if t != "main"]
+        else:
+            return type_dict.get(conn_type, ())
+        if len(lists) == 1:
+            return lists[0]
+        return list(dict.fromkeys(n for lst in lists for n in lst))
+
+    def children(self, node_name: str, conn_type: str = "main") -> Tuple[str, ...]:
+        return tuple(self._neighbors(self._children, node_name, conn_type))
+
+    def parents(self, node_name: str, conn_type: str = "main") -> Tuple[str, ...]:
+        return tuple(self._neighbors(self._parents, node_name, conn_type))
+
+    # =============== 传递闭包 ===============
+    def descendants(self, node_name: str, conn_type: str = "main") -> Tuple[str, ...]:
+        """
+        全部下游节点（DFS 先序，不含自身）。
+        """
+        return self._memo("down", node_name, conn_type)
+
+    def ancestors(self, node_name: str, conn_type: str = "main") -> Tuple[str, ...]:
+        """
+        全部上游节点（DFS 先序，不含自身）。
+        """
+        return self._memo("up", node_name, conn_type)
+
+    def descendants_bfs(self, node_name: str, conn_type: str = "main") -> Tuple[str, ...]:
+        """
+        全部下游节点（BFS 顺序，不含自身）。
+        """
+        return self._memo("down_bfs", node_name, conn_type)
+
+    def _memo(self, direction: str, node_name: str, conn_type: str) -> Tuple[str, ...]:
+        key = (direction, node_name, conn_type)
+        result = self._closures.get(key)
+        if result is None:
+            if direction == "down_bfs":
+                result = self._bfs(self._children, node_name, conn_type)
+            else:
+                adjacency = self._children if direction == "down" else self._parents
+                result = self._dfs(adjacency, node_name, conn_type)
+            with self._lock:
+                self._closures[key] = result
+        return result
+
+    def _dfs(self, adjacency: Adjacency, start: str, conn_type: str) -> Tuple[str, ...]:
+        visited = {start}
+        out: List[str] = []
+        neighbors = self._neighbors
+        stack = [iter(neighbors(adjacency, start, conn_type))]
+        while stack:
+            for nxt in stack[-1]:
+                if nxt not in visited:
+                    visited.add(nxt)
+                    out.append(nxt)
+                    stack.append(iter(neighbors(adjacency, nxt, conn_type)))
+                    break
+            else:
+                stack.pop()
+        return tuple(out)
+
+    def _bfs(self, adjacency: Adjacency, start: str, conn_type: str) -> Tuple[str, ...]:
+        visited = {start}
+        out: List[str] = []
+        frontier = [start]
+        neighbors = self._neighbors
+        while frontier:
+            nxt_frontier: List[str] = []
+            for curr in frontier:
+                for nxt in neighbors(adjacency, curr, conn_type):
+                    if nxt not in visited:
+                        visited.add(nxt)
+                        out.append(nxt)
+                        nxt_frontier.append(nxt)
+            frontier = nxt_frontier
+        return tuple(out)
+
+    # =============== 拓扑分层 ===============
+    def topological_levels(self, conn_type: str = "main") -> Tuple[Tuple[str, ...], ...]:
+        """
+        按 conn_type 连接的拓扑分层（见 topological_levels()），有环时抛出 CycleError。
+        """
+        levels = self._levels.get(conn_type)
+        if levels is None:
+            neighbors, adjacency = self._neighbors, self._children
+            levels = tuple(
+                tuple(level)
+                for level in topological_levels(self._nodes, lambda n: neighbors(adjacency, n, conn_type))
+            )
+            with self._lock:
+                self._levels[conn_type] = levels
+        return levels
+
+    def __repr__(self):
+        return f"<WorkflowGraphIndex version={self.version}, nodes={len(self._nodes)}>"
@@ -329,56 +329,90 @@ def rename_node_in_parameter_value(
 
     return parameter_value
 
-def get_connected_nodes(
+def _connection_node(connection: Union[NodeConnection, Dict[str, Any]]) -> str:
+    # 连接既可能是 NodeConnection，也可能是反序列化得到的 dict
+    return connection["node"] if isinstance(connection, dict) else connection.node
+
+def get_adjacent_nodes(
     connections: Connections,
     node_name: str,
     connection_type: Union[ConnectionType, str] = ConnectionType.MAIN,
-    depth: int = -1,
-    checked_nodes_incoming: Optional[List[str]] = None,
 ) -> List[str]:
-    if depth == 0:
-        return []
-
-    if node_name not in connections:
-        return []
-
-    new_depth = depth - 1 if depth > 0 else -1
-    checked_nodes = checked_nodes_incoming[:] if checked_nodes_incoming else []
-
-    if node_name in checked_nodes:
+    """
+    `node_name` 的直接相邻节点（按连接顺序，可能重复；自环时包含自身）。
+    """
+    type_dict = connections.get(node_name)
+    if not type_dict:
         return []
-
-    checked_nodes.append(node_name)
-
-    # 处理不同类型的连接
     if connection_type == "ALL":
-        types = list(connections[node_name].keys())
+        types = list(type_dict.keys())
     elif connection_type == "ALL_NON_MAIN":
-        types = [t for t in connections[node_name] if t != ConnectionType.MAIN]
+        types = [t for t in type_dict if t != ConnectionType.MAIN]
     else:
         types = [connection_type]
+    return [
+        _connection_node(connection)
+        for conn_type in types if conn_type in type_dict
+        for connections_by_index in type_dict[conn_type]
+        for connection in connections_by_index or ()
+    ]
 
-    return_nodes = []
-
-    for conn_type in types:
-        if conn_type not in connections[node_name]:
-            continue
-
-        for connections_by_index in connections[node_name][conn_type]:
-            for connection in connections_by_index:
-                if connection["node"] in checked_nodes:
-                    continue
+def get_connected_nodes(
+    connections: Connections,
+    node_name: str,
+    connection_type: Union[ConnectionType, str] = ConnectionType.MAIN,
+    depth: int = -1,
+    checked_nodes_incoming: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    `node_name` 沿 `connections` 可达的全部节点（不含自身），最远的节点在前。
 
-                return_nodes.insert(0, connection["node"])
+    结果等同于逐层把相邻节点及其下游移到最前（同一节点只保留最靠前的一次），
+    即按相邻节点的逆序做 DFS 后序遍历。每个节点记录到达时的剩余深度，
+    以不大于该深度再次到达时直接跳过；不限深度时为 O(V+E)。
+    当前路径上的节点与 `checked_nodes_incoming` 不会再次进入；`depth` 为 -1 时不限深度。
+    """
+    if depth == 0 or node_name not in connections:
+        return []
 
-                add_nodes = get_connected_nodes(
-                    connections, connection["node"], connection_type, new_depth, checked_nodes
-                )
+    path = set(checked_nodes_incoming or ())
+    if node_name in path:
+        return []
 
-                for parent_node in reversed(add_nodes):
-                    if parent_node in return_nodes:
-                        return_nodes.remove(parent_node)
-                    return_nodes.insert(0, parent_node)
+    def targets(name: str) -> List[str]:
+        nodes = get_adjacent_nodes(connections, name, connection_type)
+        nodes.reverse()
+        return nodes
+
+    unlimited = float("inf")
+    # 节点 => 到达时的最大剩余深度（-1 记为无限）
+    reached: Dict[str, float] = {}
+    return_nodes: List[str] = []
+    returned = set()
+
+    path.add(node_name)
+    # 栈帧：(节点, 子节点的剩余深度, 逆序的相邻节点迭代器)
+    stack = [(node_name, depth - 1 if depth > 0 else -1, iter(targets(node_name)))]
+    while stack:
+        name, remaining, pending = stack[-1]
+        budget = unlimited if remaining < 0 else remaining
+        for target in pending:
+            if target in path or reached.get(target, -1) >= budget:
+                continue
+            reached[target] = budget
+            if remaining != 0 and target in connections:
+                path.add(target)
+                stack.append((target, remaining - 1 if remaining > 0 else -1, iter(targets(target))))
+                break
+            if target not in returned:
+                returned.add(target)
+                return_nodes.append(target)
+        else:
+            stack.pop()
+            path.discard(name)
+            if stack and name not in returned:
+                returned.add(name)
+                return_nodes.append(name)
 
     return return_nodes
 
@@ -4,18 +4,44 @@ import logging
 from datetime import datetime
 
 from .node_model import WorkflowNode, WorkflowNodes, NodeOutputConfiguration
-from .connection_model import Connections, ConnectionType
+from .connection_model import Connections, ConnectionType, NodeConnection, NodeInputConnections
 from .node_type import NodeTypes
 from .data_model import WorkflowSettings, PinData
 from .expression import Expression
+from .graph_index import topological_levels
 from .utils import (
     get_node_parameters, 
     get_connections_by_destination, 
     GlobalState, 
     rename_node_in_parameter_value, 
-    NODES_WITH_RENAMABLE_CONTENT
+    NODES_WITH_RENAMABLE_CONTENT,
+    get_child_nodes,
+    get_parent_nodes,
+    get_adjacent_nodes,
 )
 
+def _bucket(
+    connections: Connections, node_name: str, connection_type: Union[ConnectionType, str], index: int
+) -> Optional[List[NodeConnection]]:
+    # connections[node_name][connection_type][index]，不存在时返回 None
+    connection_list = connections.get(node_name, {}).get(connection_type)
+    if connection_list is None or index >= len(connection_list):
+        return None
+    return connection_list[index]
+
+def _slot(connection_list: NodeInputConnections, index: int) -> List[NodeConnection]:
+    # 取出（必要时补齐）第 index 个连接列表
+    while len(connection_list) <= index:
+        connection_list.append([])
+    if connection_list[index] is None:
+        connection_list[index] = []
+    return connection_list[index]
+
+def _rename_in(connection_group: Optional[List[NodeConnection]], current_name: str, new_name: str) -> None:
+    for i, connection in enumerate(connection_group or ()):
+        if connection.node == current_name:
+            connection_group[i] = connection._replace(node=new_name)
+
 @dataclass
 class WorkflowBase:
     id: str
@@ -60,7 +86,10 @@ class Workflow:
             if node_type:
                 node.parameters = get_node_parameters(node_type.description.properties, node.parameters, node)
 
-        self.connections_by_destination_node = get_connections_by_destination(parameters.connections)
+        self.connections_by_source_node: Connections = parameters.connections or {}
+        self.connections_by_destination_node = get_connections_by_destination(self.connections_by_source_node)
+        # 结构版本号：节点/连接发生变化时递增
+        self.version = 0
         self.active = parameters.active
         self.static_data = parameters.static_data
         self.settings = parameters.settings
@@ -126,6 +155,8 @@ class Workflow:
         return nodes
     
     def get_pin_data_of_node(self, node_name: str) -> Optional[List[Any]]:
+        if not self.pin_data:
+            return None
         return self.pin_data.get(node_name)
     
     def rename_node(self, current_name: str, new_name: str):
@@ -142,63 +173,214 @@ class Workflow:
                         node.parameters["jsCode"], current_name, new_name, has_renamable_content=True
                     )
 
-        if current_name in self.connections_by_source_node:
-            self.connections_by_source_node[new_name] = self.connections_by_source_node.pop(current_name)
+        by_source, by_dest = self.connections_by_source_node, self.connections_by_destination_node
+        if current_name in by_source:
+            by_source[new_name] = by_source.pop(current_name)
+        if current_name in by_dest:
+            by_dest[new_name] = by_dest.pop(current_name)
+
+        # 只改写与该节点相连的条目：父节点的出边、子节点的反向入边，O(度数)
+        for connection_list in by_dest.get(new_name, {}).values():
+            for connection_group in connection_list:
+                for i, connection in enumerate(connection_group or ()):
+                    if connection.node == current_name:
+                        connection = connection_group[i] = connection._replace(node=new_name)
+                    _rename_in(
+                        _bucket(by_source, connection.node, connection.connection_type, connection.index),
+                        current_name, new_name,
+                    )
+        for connection_list in by_source.get(new_name, {}).values():
+            for connection_group in connection_list:
+                for connection in connection_group or ():
+                    _rename_in(
+                        _bucket(by_dest, connection.node, connection.connection_type, connection.index),
+                        current_name, new_name,
+                    )
 
-        for source_node, connections in self.connections_by_source_node.items():
-            for connection_type, connection_list in connections.items():
-                for source_index, connection_group in enumerate(connection_list):
-                    for connection in connection_group:
-                        if connection["node"] == current_name:
-                            connection["node"] = new_name
+        self.version += 1
 
-        self.connections_by_destination_node = get_connections_by_destination(self.connections_by_source_node)
+    def add_connection(
+        self,
+        source: str,
+        destination: str,
+        connection_type: Union[ConnectionType, str] = ConnectionType.MAIN,
+        source_index: int = 0,
+        destination_index: int = 0,
+    ) -> bool:
+        """
+        添加连接 source[source_index] -> destination[destination_index]，同步维护两个索引，O(度数)。
+        连接已存在时不做修改，返回 False。
+        """
+        for name in (source, destination):
+            if name not in self.nodes:
+                raise ValueError(f'Node "{name}" not found')
+        connection_type = ConnectionType(connection_type)
+        outputs = _slot(
+            self.connections_by_source_node.setdefault(source, {}).setdefault(connection_type.value, []), source_index
+        )
+        if any(c.node == destination and c.index == destination_index for c in outputs):
+            return False
+        outputs.append(NodeConnection(destination, connection_type, destination_index))
+        inputs = _slot(
+            self.connections_by_destination_node.setdefault(destination, {}).setdefault(connection_type.value, []),
+            destination_index,
+        )
+        inputs.append(NodeConnection(source, connection_type.value, source_index))
+        self.version += 1
+        return True
+
+    def remove_connection(
+        self,
+        source: str,
+        destination: str,
+        connection_type: Union[ConnectionType, str] = ConnectionType.MAIN,
+        source_index: int = 0,
+        destination_index: int = 0,
+    ) -> bool:
+        """
+        删除连接 source[source_index] -> destination[destination_index]，O(度数)。连接不存在时返回 False。
+        """
+        outputs = _bucket(self.connections_by_source_node, source, connection_type, source_index)
+        removed = [c for c in outputs or () if c.node == destination and c.index == destination_index]
+        if not removed:
+            return False
+        outputs[:] = [c for c in outputs if c not in removed]
+        for connection in removed:
+            self._unlink_destination(connection, source, connection_type, source_index)
+        self.version += 1
+        return True
+
+    def remove_node(self, node_name: str) -> bool:
+        """
+        删除节点及其全部连接（出边与入边），O(度数)。节点不存在时返回 False。
+        """
+        if node_name not in self.nodes:
+            return False
+        by_source, by_dest = self.connections_by_source_node, self.connections_by_destination_node
+        for connection_type, connection_list in by_source.pop(node_name, {}).items():
+            for source_index, connection_group in enumerate(connection_list):
+                for connection in connection_group or ():
+                    self._unlink_destination(connection, node_name, connection_type, source_index)
+        for connection_list in by_dest.pop(node_name, {}).values():
+            for destination_index, connection_group in enumerate(connection_list):
+                for connection in connection_group or ():
+                    outputs = _bucket(by_source, connection.node, connection.connection_type, connection.index)
+                    if outputs:
+                        outputs[:] = [
+                            c for c in outputs if not (c.node == node_name and c.index == destination_index)
+                        ]
+        del self.nodes[node_name]
+        if self.pin_data:
+            self.pin_data.pop(node_name, None)
+        self.version += 1
+        return True
+
+    def _unlink_destination(
+        self, connection: NodeConnection, source: str, connection_type: Union[ConnectionType, str], source_index: int
+    ) -> None:
+        # 删除 connection 在目标节点一侧的反向条目；目标节点不再有任何入边时移除其整个条目
+        by_dest = self.connections_by_destination_node
+        inputs = _bucket(by_dest, connection.node, connection.connection_type, connection.index)
+        if not inputs:
+            return
+        inputs[:] = [
+            c for c in inputs
+            if not (c.node == source and c.connection_type == connection_type and c.index == source_index)
+        ]
+        node_connections = by_dest[connection.node]
+        if not any(node_connections[connection.connection_type]):
+            del node_connections[connection.connection_type]
+            if not node_connections:
+                del by_dest[connection.node]
+
+    def get_child_nodes(
+        self, node_name: str, connection_type: Union[ConnectionType, str] = ConnectionType.MAIN, depth: int = -1
+    ) -> List[str]:
+        return get_child_nodes(self.connections_by_source_node, node_name, connection_type, depth)
+
+    def get_parent_nodes(
+        self, node_name: str, connection_type: Union[ConnectionType, str] = ConnectionType.MAIN, depth: int = -1
+    ) -> List[str]:
+        return get_parent_nodes(self.connections_by_destination_node, node_name, connection_type, depth)
+
+    def get_topological_levels(
+        self, connection_type: Union[ConnectionType, str] = ConnectionType.MAIN
+    ) -> List[List[str]]:
+        """
+        拓扑分层：每个节点只依赖更早层中的节点，层内按节点定义顺序；
+        存在环时抛出 CycleError（e.nodes / e.cycle 给出环上的节点）。
+        """
+        return topological_levels(
+            list(self.nodes.keys()),
+            lambda name: get_adjacent_nodes(self.connections_by_source_node, name, connection_type),
+        )
+
+    def get_topological_order(self, connection_type: Union[ConnectionType, str] = ConnectionType.MAIN) -> List[str]:
+        return [name for level in self.get_topological_levels(connection_type) for name in level]
+
+    def check_acyclic(self, connection_type: Union[ConnectionType, str] = ConnectionType.MAIN) -> None:
+        """
+        保存工作流时校验：存在环时抛出 CycleError。
+        """
+        self.get_topological_levels(connection_type)
 
     def get_highest_node(
         self, node_name: str, node_connection_index: Optional[int] = None, checked_nodes: Optional[List[str]] = None
     ) -> List[str]:
+        """
+        沿 main 输入向上查找最顶层的（未禁用）节点。使用显式栈，checked_nodes 在整个遍历中共享。
+        """
         if checked_nodes is None:
             checked_nodes = []
-
-        current_highest = []
-        
-        if not self.nodes[node_name].disabled:
-            current_highest.append(node_name)
-
-        if node_name not in self.connections_by_destination_node:
-            return current_highest
-
-        if ConnectionType.Main not in self.connections_by_destination_node[node_name]:
-            return current_highest
-
-        if node_name in checked_nodes:
-            return current_highest
-        checked_nodes.append(node_name)
-
-        return_nodes = []
-
-        for connection_index, connections in enumerate(self.connections_by_destination_node[node_name][ConnectionType.Main]):
-            if node_connection_index is not None and node_connection_index != connection_index:
-                continue
-
-            for connection in connections:
-                if connection.node in checked_nodes:
+        checked = set(checked_nodes)
+
+        def open_frame(name: str, connection_index: Optional[int]):
+            # 返回 (栈帧, None)；节点无需展开时返回 (None, 直接结果)
+            current_highest = [] if self.nodes[name].disabled else [name]
+            inputs = self.connections_by_destination_node.get(name, {}).get(ConnectionType.MAIN)
+            if inputs is None or name in checked:
+                return None, current_highest
+            checked.add(name)
+            checked_nodes.append(name)
+            parents = [
+                connection.node
+                for index, connections in enumerate(inputs)
+                if connection_index is None or connection_index == index
+                for connection in connections or ()
+            ]
+            # 栈帧：[相邻节点迭代器, 有序去重的结果]
+            return [iter(parents), {}], None
+
+        frame, result = open_frame(node_name, node_connection_index)
+        if frame is None:
+            return result
+
+        stack = [frame]
+        pending = []  # 与 stack 对应：每个子帧展开的父节点名
+        while stack:
+            parents, return_nodes = stack[-1]
+            for parent in parents:
+                if parent in checked or parent not in self.nodes:
                     continue
-
-                if connection.node not in self.nodes:
-                    continue
-
-                add_nodes = self.get_highest_node(connection.node, None, checked_nodes)
-
-                if not add_nodes:
-                    if not self.nodes[connection.node].disabled:
-                        add_nodes = [connection.node]
-
-                for name in add_nodes:
-                    if name not in return_nodes:
-                        return_nodes.append(name)
-
-        return return_nodes
+                child, add_nodes = open_frame(parent, None)
+                if child is not None:
+                    stack.append(child)
+                    pending.append(parent)
+                    break
+                self._merge_highest(return_nodes, add_nodes, parent)
+            else:
+                stack.pop()
+                if not stack:
+                    return list(return_nodes)
+                self._merge_highest(stack[-1][1], list(return_nodes), pending.pop())
+
+        return []
+
+    def _merge_highest(self, return_nodes: Dict[str, None], add_nodes: List[str], parent: str) -> None:
+        if not add_nodes and not self.nodes[parent].disabled:
+            add_nodes = [parent]
+        for name in add_nodes:
+            return_nodes.setdefault(name)
     
     def get_node_outputs(self, node, node_type_data) -> List[Union[str, NodeOutputConfiguration]]:
         if isinstance(node_type_data.outputs, list):
@@ -231,27 +413,28 @@ class Workflow:
         return outputs
     
     def get_parent_main_input_node(self, node: WorkflowNode) -> Optional[WorkflowNode]:
-        if node is None:
-            return None
-
-        node_type = self.node_types.get_by_name_and_version(node.node_type, node.type_version)
-        
-        outputs = self.get_node_outputs(node, node_type.description)
-
-        non_main_nodes_connected = []
-        for output in outputs:
-            output_type = output.type if isinstance(output, NodeOutputConfiguration) else output
-            if output_type != ConnectionType.MAIN:
-                parent_nodes = self.get_child_nodes(node.name, output_type)
-                if parent_nodes:
-                    non_main_nodes_connected.extend(parent_nodes)
+        visited = set()
+        while node is not None and node.name not in visited:
+            visited.add(node.name)
+            node_type = self.node_types.get_by_name_and_version(node.node_type, node.type_version)
+
+            outputs = self.get_node_outputs(node, node_type.description)
+
+            non_main_nodes_connected = []
+            for output in outputs:
+                output_type = output.type if isinstance(output, NodeOutputConfiguration) else output
+                if output_type != ConnectionType.MAIN:
+                    parent_nodes = self.get_child_nodes(node.name, output_type)
+                    if parent_nodes:
+                        non_main_nodes_connected.extend(parent_nodes)
+
+            if not non_main_nodes_connected:
+                return node
 
-        if non_main_nodes_connected:
             return_node = self.get_node(non_main_nodes_connected[0])
             if return_node is None:
                 raise RuntimeError(f'Node "{non_main_nodes_connected[0]}" not found')
-
-            return self.get_parent_main_input_node(return_node)
+            node = return_node
 
         return node
     
@@ -267,37 +450,44 @@ class Workflow:
         if node is None:
             return None
 
-        depth = depth if depth == -1 else depth - 1
-        if depth == 0:
-            return None  # 达到最大深度
-
-        if node_name not in self.connections_by_destination_node:
-            return None
-        if connection_type not in self.connections_by_destination_node[node_name]:
-            return None
-
         checked_nodes = checked_nodes or []
-        if node_name in checked_nodes:
-            return None  # 防止无限循环
-
-        checked_nodes.append(node_name)
-
-        for connections_by_index in self.connections_by_destination_node[node_name][connection_type]:
-            if not connections_by_index:
-                continue
-
-            for destination_index, connection in enumerate(connections_by_index):
-                if parent_node_name == connection["node"]:
-                    return {"sourceIndex": connection["index"], "destinationIndex": destination_index}
-
-                if connection["node"] in checked_nodes:
+        checked = set(checked_nodes)
+
+        def open_frame(name: str, remaining: int):
+            remaining = remaining if remaining == -1 else remaining - 1
+            if remaining == 0:
+                return None  # 达到最大深度
+
+            inputs = self.connections_by_destination_node.get(name, {}).get(connection_type)
+            if inputs is None or name in checked:
+                return None  # 防止无限循环
+
+            checked.add(name)
+            checked_nodes.append(name)
+            connections = [
+                (destination_index, connection)
+                for connections_by_index in inputs if connections_by_index
+                for destination_index, connection in enumerate(connections_by_index)
+            ]
+            return remaining, iter(connections)
+
+        frame = open_frame(node_name, depth)
+        stack = [frame] if frame is not None else []
+        while stack:
+            remaining, connections = stack[-1]
+            for destination_index, connection in connections:
+                if parent_node_name == connection.node:
+                    return {"sourceIndex": connection.index, "destinationIndex": destination_index}
+
+                if connection.node in checked:
                     continue  # 已经检查过的节点跳过
 
-                output_index = self.get_node_connection_indexes(
-                    connection["node"], parent_node_name, connection_type, depth, checked_nodes
-                )
-                if output_index is not None:
-                    return output_index
+                child = open_frame(connection.node, remaining)
+                if child is not None:
+                    stack.append(child)
+                    break
+            else:
+                stack.pop()
 
         return None
     
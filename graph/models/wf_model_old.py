@@ -1,6 +1,7 @@
 import re
-from typing import Dict, List, Optional, Set
-from collections import deque
+from typing import Any, Dict, List, Optional
+from graph.models.data_model import WorkflowSettings
+from graph.models.graph_index import WorkflowGraphIndex
 
 class ConnectionInfo:
     __slots__ = ("node", "conn_type", "index")
@@ -13,6 +14,23 @@ class ConnectionInfo:
         return f"ConnectionInfo(node={self.node}, type={self.conn_type}, index={self.index})"
 
 
+def _bucket(connections, node_name: str, conn_type: str, index: int) -> Optional[List[ConnectionInfo]]:
+    # connections[node_name][conn_type][index]，不存在时返回 None
+    list_of_lists = connections.get(node_name, {}).get(conn_type)
+    if list_of_lists is None or index >= len(list_of_lists):
+        return None
+    return list_of_lists[index]
+
+
+def _slot(list_of_lists: List[Optional[List[ConnectionInfo]]], index: int) -> List[ConnectionInfo]:
+    # 取出（必要时补齐）第 index 个连接列表
+    while len(list_of_lists) <= index:
+        list_of_lists.append([])
+    if list_of_lists[index] is None:
+        list_of_lists[index] = []
+    return list_of_lists[index]
+
+
 class Node:
     def __init__(
         self,
@@ -52,6 +70,8 @@ class Workflow:
         connections_by_source_node: Dict[str, Dict[str, List[List[ConnectionInfo]]]],
         active: bool = False,
         static_data: Optional[dict] = None,
+        settings: Optional[WorkflowSettings] = None,
+        pin_data: Optional[Dict[str, List[Any]]] = None,
     ):
         self.id = workflow_id
         self.name = name
@@ -64,6 +84,26 @@ class Workflow:
         self.connections_by_destination_node = self._build_connections_by_destination(connections_by_source_node)
 
         self.static_data = static_data or {}
+        self.settings = settings
+        # 固定数据：节点名 -> item 列表，手动执行时代替节点的实际输出
+        self.pin_data: Dict[str, List[Any]] = pin_data or {}
+
+        # 结构版本号：节点/连接发生变化时递增，供执行计划等缓存判断是否失效
+        self.version = 0
+        self._graph_index: Optional[WorkflowGraphIndex] = None
+
+    @property
+    def graph_index(self) -> WorkflowGraphIndex:
+        """
+        连接图索引（直接相邻 + 记忆化的传递闭包），version 变化后自动重建。
+        """
+        index = self._graph_index
+        if index is None or index.version != self.version:
+            index = WorkflowGraphIndex(
+                self.connections_by_source_node, self.connections_by_destination_node, self.version, self.nodes
+            )
+            self._graph_index = index
+        return index
 
     def _build_connections_by_destination(self, src):
         result: Dict[str, Dict[str, List[List[ConnectionInfo]]]] = {}
@@ -96,6 +136,9 @@ class Workflow:
     def get_node(self, node_name: str) -> Optional[Node]:
         return self.nodes.get(node_name)
 
+    def get_pin_data_of_node(self, node_name: str) -> Optional[List[Any]]:
+        return self.pin_data.get(node_name)
+
     def rename_node(self, old_name: str, new_name: str):
         if old_name not in self.nodes or old_name == new_name:
             return
@@ -104,22 +147,139 @@ class Workflow:
         node_obj.name = new_name
         self.nodes[new_name] = node_obj
         del self.nodes[old_name]
+        if old_name in self.pin_data:
+            self.pin_data[new_name] = self.pin_data.pop(old_name)
 
         for n in self.nodes.values():
             n.parameters = self._recursive_replace_in_parameters(n.parameters, old_name, new_name)
 
-        if old_name in self.connections_by_source_node:
-            self.connections_by_source_node[new_name] = self.connections_by_source_node[old_name]
-            del self.connections_by_source_node[old_name]
-
-        for src_node, conn_types in self.connections_by_source_node.items():
-            for ctype, list_of_lists in conn_types.items():
-                for conn_list in list_of_lists:
-                    for ci in conn_list:
+        by_source, by_dest = self.connections_by_source_node, self.connections_by_destination_node
+        if old_name in by_source:
+            by_source[new_name] = by_source.pop(old_name)
+        if old_name in by_dest:
+            by_dest[new_name] = by_dest.pop(old_name)
+
+        # 只改写与该节点相连的条目：父节点的出边、子节点的反向入边，O(度数)
+        touched = {new_name}
+        for list_of_lists in by_dest.get(new_name, {}).values():
+            for in_idx, rev_infos in enumerate(list_of_lists):
+                for rev in rev_infos or ():
+                    if rev.node == old_name:
+                        rev.node = new_name
+                    touched.add(rev.node)
+                    for ci in _bucket(by_source, rev.node, rev.conn_type, rev.index) or ():
                         if ci.node == old_name:
                             ci.node = new_name
-
-        self.connections_by_destination_node = self._build_connections_by_destination(self.connections_by_source_node)
+        for list_of_lists in by_source.get(new_name, {}).values():
+            for conn_infos in list_of_lists:
+                for ci in conn_infos or ():
+                    touched.add(ci.node)
+                    for rev in _bucket(by_dest, ci.node, ci.conn_type, ci.index) or ():
+                        if rev.node == old_name:
+                            rev.node = new_name
+
+        touched.add(old_name)
+        self._touch(touched)
+
+    # =============== 连接编辑（增量维护 source / destination 两个索引） ===============
+    def add_connection(
+        self,
+        source: str,
+        destination: str,
+        conn_type: str = "main",
+        source_index: int = 0,
+        destination_index: int = 0,
+    ) -> bool:
+        """
+        添加连接 source[source_index] -> destination[destination_index]，O(度数)。
+        连接已存在时不做修改，返回 False。
+        """
+        for nm in (source, destination):
+            if nm not in self.nodes:
+                raise ValueError(f"Node '{nm}' not found")
+        outputs = _slot(self.connections_by_source_node.setdefault(source, {}).setdefault(conn_type, []), source_index)
+        if any(ci.node == destination and ci.index == destination_index for ci in outputs):
+            return False
+        outputs.append(ConnectionInfo(destination, conn_type, destination_index))
+        inputs = _slot(self.connections_by_destination_node.setdefault(destination, {}).setdefault(conn_type, []), destination_index)
+        inputs.append(ConnectionInfo(source, conn_type, source_index))
+        self._touch((source, destination))
+        return True
+
+    def remove_connection(
+        self,
+        source: str,
+        destination: str,
+        conn_type: str = "main",
+        source_index: int = 0,
+        destination_index: int = 0,
+    ) -> bool:
+        """
+        删除连接 source[source_index] -> destination[destination_index]，O(度数)。
+        连接不存在时返回 False。
+        """
+        outputs = _bucket(self.connections_by_source_node, source, conn_type, source_index)
+        removed = [ci for ci in outputs or () if ci.node == destination and ci.index == destination_index]
+        if not removed:
+            return False
+        outputs[:] = [ci for ci in outputs if ci not in removed]
+        for ci in removed:
+            self._unlink_destination(ci, source, conn_type, source_index)
+        self._touch((source, destination))
+        return True
+
+    def remove_node(self, node_name: str) -> bool:
+        """
+        删除节点及其全部连接（出边与入边），O(度数)。节点不存在时返回 False。
+        """
+        if node_name not in self.nodes:
+            return False
+        touched = {node_name}
+        by_source, by_dest = self.connections_by_source_node, self.connections_by_destination_node
+        for conn_type, list_of_lists in by_source.pop(node_name, {}).items():
+            for out_idx, conn_infos in enumerate(list_of_lists):
+                for ci in conn_infos or ():
+                    touched.add(ci.node)
+                    self._unlink_destination(ci, node_name, conn_type, out_idx)
+        for list_of_lists in by_dest.pop(node_name, {}).values():
+            for in_idx, rev_infos in enumerate(list_of_lists):
+                for rev in rev_infos or ():
+                    touched.add(rev.node)
+                    outputs = _bucket(by_source, rev.node, rev.conn_type, rev.index)
+                    if outputs:
+                        outputs[:] = [ci for ci in outputs if not (ci.node == node_name and ci.index == in_idx)]
+        del self.nodes[node_name]
+        self.pin_data.pop(node_name, None)
+        self._touch(touched)
+        return True
+
+    def _unlink_destination(self, ci: ConnectionInfo, source: str, conn_type: str, source_index: int) -> None:
+        # 删除 ci 在目标节点一侧的反向条目；目标节点不再有任何入边时移除其整个条目
+        by_dest = self.connections_by_destination_node
+        inputs = _bucket(by_dest, ci.node, ci.conn_type, ci.index)
+        if not inputs:
+            return
+        inputs[:] = [
+            rev for rev in inputs
+            if not (rev.node == source and rev.conn_type == conn_type and rev.index == source_index)
+        ]
+        type_dict = by_dest[ci.node]
+        if not any(type_dict[ci.conn_type]):
+            del type_dict[ci.conn_type]
+            if not type_dict:
+                del by_dest[ci.node]
+
+    def _touch(self, node_names) -> None:
+        """
+        结构变化：递增 version；已构建的 graph_index 只刷新受影响节点，而不是整体重建。
+        """
+        index = self._graph_index
+        current = index is not None and index.version == self.version
+        self.version += 1
+        if current:
+            index.refresh(
+                self.connections_by_source_node, self.connections_by_destination_node, node_names, self.version
+            )
 
     def _recursive_replace_in_parameters(self, value, old_name, new_name):
         if isinstance(value, str):
@@ -157,102 +317,35 @@ class Workflow:
         return new_text
 
     def get_child_nodes(self, node_name: str, conn_type: str = "main") -> List[str]:
-        visited: Set[str] = set()
-        result: List[str] = []
-
-        def dfs(curr: str):
-            if curr in visited:
-                return
-            visited.add(curr)
-            if curr not in self.connections_by_source_node:
-                return
-            type_dict = self.connections_by_source_node[curr]
-            if conn_type == "ALL":
-                types_to_check = list(type_dict.keys())
-            else:
-                types_to_check = [conn_type]
-
-            for t in types_to_check:
-                if t not in type_dict:
-                    continue
-                for conn_infos in type_dict[t]:
-                    if not conn_infos:
-                        continue
-                    for ci in conn_infos:
-                        child = ci.node
-                        if child not in visited:
-                            result.append(child)
-                            dfs(child)
-
-        dfs(node_name)
-        if node_name in result:
-            result.remove(node_name)
-        return result
+        """
+        全部下游节点（DFS 先序）；conn_type 可为 "ALL"。
+        """
+        return list(self.graph_index.descendants(node_name, conn_type))
 
     def get_child_nodes_bfs(self, node_name: str, conn_type: str = "main") -> List[str]:
-        visited: Set[str] = set()
-        queue = deque([node_name])
-        output: List[str] = []
+        return list(self.graph_index.descendants_bfs(node_name, conn_type))
 
-        while queue:
-            c = queue.popleft()
-            if c in visited:
-                continue
-            visited.add(c)
-            if c != node_name:
-                output.append(c)
+    def get_parent_nodes(self, node_name: str, conn_type: str = "main") -> List[str]:
+        """
+        全部上游节点（DFS 先序）；conn_type 可为 "ALL"。
+        """
+        return list(self.graph_index.ancestors(node_name, conn_type))
 
-            if c not in self.connections_by_source_node:
-                continue
+    def get_topological_levels(self, conn_type: str = "main") -> List[List[str]]:
+        """
+        拓扑分层：每个节点只依赖更早层中的节点，层内按节点定义顺序；
+        存在环时抛出 CycleError（e.nodes / e.cycle 给出环上的节点）。
+        """
+        return [list(level) for level in self.graph_index.topological_levels(conn_type)]
 
-            type_dict = self.connections_by_source_node[c]
-            if conn_type == "ALL":
-                types_to_check = list(type_dict.keys())
-            else:
-                types_to_check = [conn_type]
-
-            for t in types_to_check:
-                if t not in type_dict:
-                    continue
-                for conn_infos in type_dict[t]:
-                    if conn_infos:
-                        for ci in conn_infos:
-                            nxt = ci.node
-                            if nxt not in visited:
-                                queue.append(nxt)
-        return output
+    def get_topological_order(self, conn_type: str = "main") -> List[str]:
+        return [nm for level in self.graph_index.topological_levels(conn_type) for nm in level]
 
-    def get_parent_nodes(self, node_name: str, conn_type: str = "main") -> List[str]:
-        visited: Set[str] = set()
-        result: List[str] = []
-
-        def dfs(curr: str):
-            if curr in visited:
-                return
-            visited.add(curr)
-            if curr not in self.connections_by_destination_node:
-                return
-            type_dict = self.connections_by_destination_node[curr]
-            if conn_type == "ALL":
-                types_to_check = list(type_dict.keys())
-            else:
-                types_to_check = [conn_type]
-            for t in types_to_check:
-                if t not in type_dict:
-                    continue
-                for conn_infos in type_dict[t]:
-                    if not conn_infos:
-                        continue
-                    for ci in conn_infos:
-                        p = ci.node
-                        if p not in visited:
-                            result.append(p)
-                            dfs(p)
-
-        dfs(node_name)
-        if node_name in result:
-            result.remove(node_name)
-        return result
+    def check_acyclic(self, conn_type: str = "main") -> None:
+        """
+        保存工作流时校验：存在环时抛出 CycleError。
+        """
+        self.graph_index.topological_levels(conn_type)
 
     def get_start_node(self) -> Optional[Node]:
         """
@@ -0,0 +1,165 @@
+# tests/test_async_executor.py
+
+import asyncio
+import inspect
+import time
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.http_model import AsyncAbortSignal
+from engine.async_executor import AsyncWorkflowExecutor
+from engine.executor import WorkflowExecutor
+from engine.models import ExecutionStatus, NodeResult
+from engine.node_types import AsyncNodeType
+from engine.registry import NodeTypeRegistry
+
+class AsyncSleepNodeType(AsyncNodeType):
+    """
+    模拟网络等待：await 0.2 秒后传递输入。
+    """
+    async def execute(self, context):
+        await asyncio.sleep(0.2)
+        return await super().execute(context)
+
+def create_fan_out_workflow(branches: int = 4):
+    nodes = [Node("Start", "producer"), Node("Merge", "processor")]
+    fan_out = []
+    connections = {}
+    for i in range(branches):
+        name = f"Wait{i}"
+        nodes.append(Node(name, "asyncSleep"))
+        fan_out.append(ConnectionInfo(name, "main", 0))
+        connections[name] = {"main": [[ConnectionInfo("Merge", "main", i)]]}
+    connections["Start"] = {"main": [fan_out]}
+    return Workflow("wfAsync", "AsyncTest", nodes, connections, True)
+
+@pytest.fixture
+def registry():
+    reg = NodeTypeRegistry()
+    reg.register("asyncSleep", AsyncSleepNodeType)
+    return reg
+
+def test_async_fan_out(registry):
+    wf = create_fan_out_workflow(4)
+    executor = AsyncWorkflowExecutor(wf, mode="manual", node_types=registry)
+
+    started = time.perf_counter()
+    result = asyncio.run(executor.execute_workflow())
+    elapsed = time.perf_counter() - started
+
+    assert result["status"] == "SUCCESS"
+    assert elapsed < 0.6
+    assert "Merge" in result["runData"]
+
+def test_many_executions_share_one_loop(registry):
+    wf = create_fan_out_workflow(2)
+
+    async def run_all():
+        executors = [AsyncWorkflowExecutor(wf, node_types=registry) for _ in range(50)]
+        return await asyncio.gather(*(ex.execute_workflow() for ex in executors))
+
+    started = time.perf_counter()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+
+    assert all(r["status"] == "SUCCESS" for r in results)
+    assert elapsed < 1.5
+
+def test_abort_signal_cancels_execution(registry):
+    wf = create_fan_out_workflow(2)
+    executor = AsyncWorkflowExecutor(wf, node_types=registry)
+
+    async def run():
+        signal = AsyncAbortSignal()
+        task = asyncio.ensure_future(executor.execute_workflow(abort_signal=signal))
+        await asyncio.sleep(0.05)
+        await signal.abort()
+        return await task
+
+    started = time.perf_counter()
+    result = asyncio.run(run())
+    assert time.perf_counter() - started < 0.2
+    assert result["status"] == "CANCELED"
+    assert "Merge" not in result["runData"]
+
+def test_async_node_in_sync_executor(registry):
+    wf = create_fan_out_workflow(1)
+    result = WorkflowExecutor(wf, node_types=registry).execute_workflow()
+    assert result["status"] == "SUCCESS"
+    assert "Merge" in result["runData"]
+
+def test_external_cancel_propagates(registry):
+    wf = create_fan_out_workflow(2)
+    executor = AsyncWorkflowExecutor(wf, node_types=registry)
+
+    async def run():
+        task = asyncio.ensure_future(executor.execute_workflow())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return task
+
+    task = asyncio.run(run())
+    assert task.cancelled()
+    # 执行本身仍被记录为 CANCELED
+    assert executor.status == ExecutionStatus.CANCELED
+
+def test_wait_for_timeout(registry):
+    wf = create_fan_out_workflow(2)
+
+    async def run():
+        await asyncio.wait_for(AsyncWorkflowExecutor(wf, node_types=registry).execute_workflow(), timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+class AsyncDelayNodeType(AsyncNodeType):
+    async def execute(self, context):
+        await asyncio.sleep(context.parameters["delay"])
+        return NodeResult(data=[[{"from": context.node_name}]])
+
+def test_async_order_independent_of_timing(registry):
+    registry.register("asyncDelay", AsyncDelayNodeType)
+    # Z 最后完成，保证 M 在 X、Y 都到达后才就绪；X、Y 的完成顺序不同
+    for delays in ({"X": 0.2, "Y": 0.0, "Z": 0.3}, {"X": 0.0, "Y": 0.2, "Z": 0.3}):
+        nodes = [Node("Start", "producer"), Node("M", "processor")]
+        nodes += [Node(name, "asyncDelay", parameters={"delay": delay}) for name, delay in delays.items()]
+        connections = {
+            "Start": {"main": [[ConnectionInfo(name, "main", 0) for name in delays]]},
+            "X": {"main": [[ConnectionInfo("M", "main", 0)]]},
+            "Y": {"main": [[ConnectionInfo("M", "main", 0)]]},
+            "Z": {"main": [[ConnectionInfo("M", "main", 1)]]},
+        }
+        executor = AsyncWorkflowExecutor(Workflow("wfSkewed", "Skewed", nodes, connections, True), node_types=registry)
+        assert asyncio.run(executor.execute_workflow())["status"] == "SUCCESS"
+        assert [item["from"] for item in executor.run_data["M"][0].data[0]] == ["X", "Y", "Z"]
+        assert list(executor.run_data) == ["Start", "X", "Y", "Z", "M"]
+
+def test_async_slow_node_does_not_block_other_branches(registry):
+    registry.register("asyncDelay", AsyncDelayNodeType)
+    nodes = [Node("Start", "producer"), Node("Slow", "asyncDelay", parameters={"delay": 0.5})]
+    nodes += [Node(f"C{i}", "asyncDelay", parameters={"delay": 0.05}) for i in range(10)]
+    connections = {"Start": {"main": [[ConnectionInfo("Slow", "main", 0), ConnectionInfo("C0", "main", 0)]]}}
+    for i in range(9):
+        connections[f"C{i}"] = {"main": [[ConnectionInfo(f"C{i + 1}", "main", 0)]]}
+    wf = Workflow("wfCritical", "Critical", nodes, connections, True)
+
+    started = time.perf_counter()
+    result = asyncio.run(AsyncWorkflowExecutor(wf, node_types=registry).execute_workflow())
+    assert result["status"] == "SUCCESS"
+    assert time.perf_counter() - started < 0.8
+
+def test_async_node_in_sync_executor_inside_event_loop(registry):
+    wf = create_fan_out_workflow(1)
+
+    async def run():
+        return WorkflowExecutor(wf, node_types=registry).execute_workflow()
+
+    result = asyncio.run(run())
+    assert result["status"] == "ERROR"
+    assert "AsyncWorkflowExecutor" in result["error"]["message"]
+
+def test_execute_workflow_signature_matches_sync():
+    for name in ("execute_workflow", "resume"):
+        sync_params = list(inspect.signature(getattr(WorkflowExecutor, name)).parameters)
+        assert list(inspect.signature(getattr(AsyncWorkflowExecutor, name)).parameters) == sync_params
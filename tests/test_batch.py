@@ -0,0 +1,58 @@
+# tests/test_batch.py
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.batch import execute_many
+from engine.hooks import HookManager
+from engine.plan import CompiledWorkflowPlan
+
+def create_trigger_workflow():
+    """
+    Start(trigger) -> Step(processor)
+    """
+    nodes = [Node("Start", "trigger"), Node("Step", "processor")]
+    connections = {"Start": {"main": [[ConnectionInfo("Step", "main", 0)]]}}
+    return Workflow("wfBatch", "BatchTest", nodes, connections, True)
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_execute_many_streams_results_in_order(concurrency):
+    wf = create_trigger_workflow()
+    payloads = ({"id": i} for i in range(50))
+
+    batch = execute_many(wf, payloads, concurrency=concurrency)
+    results = list(batch)
+
+    assert len(results) == 50
+    for i, result in enumerate(results):
+        assert result["status"] == "SUCCESS"
+        assert f"'id': {i}," in result["runData"]["Step"][0]
+
+    assert batch.stats.submitted == 50
+    assert batch.stats.completed == 50
+    assert batch.stats.succeeded == 50
+    assert batch.stats.failed == 0
+    assert batch.stats.throughput > 0
+
+def test_execute_many_shares_plan_and_hooks():
+    wf = create_trigger_workflow()
+    calls = []
+    hooks = HookManager()
+    hooks.register_hook("workflowExecuteAfter", lambda **kw: calls.append(kw["result"]["status"]))
+
+    batch = execute_many(wf, [[{"id": 1}, {"id": 2}], {"id": 3}], hook_manager=hooks)
+    assert batch.plan is CompiledWorkflowPlan.for_workflow(wf)
+
+    results = list(batch)
+    assert calls == ["SUCCESS", "SUCCESS"]
+    # 列表 payload 作为多个 item 送入起点
+    assert "'id': 2" in results[0]["runData"]["Step"][0]
+
+def test_execute_many_custom_start_inputs():
+    wf = create_trigger_workflow()
+    batch = execute_many(
+        wf,
+        range(3),
+        to_start_inputs=lambda n: {"Start": [{"n": n}] * n},
+    )
+    results = list(batch)
+    assert [r["runData"]["Step"][0].count("'n':") for r in results] == [0, 1, 2]
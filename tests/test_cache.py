@@ -0,0 +1,130 @@
+# tests/test_cache.py
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.cache import NodeOutputCache, stable_hash
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.registry import NodeTypeRegistry
+
+class CountingNodeType(NodeType):
+    """
+    纯函数节点：输出加上参数 add，记录执行次数。
+    """
+    cacheable = True
+    calls = []
+
+    def execute(self, context):
+        CountingNodeType.calls.append(context.node_name)
+        add = context.parameters.get("add", 1)
+        return NodeResult(data=[[{**item, "v": item.get("v", 0) + add} for item in context.input_data]])
+
+class SideEffectNodeType(NodeType):
+    def execute(self, context):
+        return NodeResult(data=[list(context.input_data)])
+
+@pytest.fixture
+def registry():
+    reg = NodeTypeRegistry()
+    reg.register("counting", CountingNodeType)
+    reg.register("effect", SideEffectNodeType)
+    CountingNodeType.calls = []
+    return reg
+
+def create_chain(length):
+    """
+    Start(trigger) -> N0 -> N1 -> ... -> N{length-1}（均为 counting）
+    """
+    nodes = [Node("Start", "trigger")] + [Node(f"N{i}", "counting") for i in range(length)]
+    connections = {}
+    prev = "Start"
+    for i in range(length):
+        connections[prev] = {"main": [[ConnectionInfo(f"N{i}", "main", 0)]]}
+        prev = f"N{i}"
+    return Workflow("wfCache", "CacheTest", nodes, connections, True)
+
+def run(wf, registry, cache):
+    executor = WorkflowExecutor(wf, mode="trigger", node_types=registry, cache=cache)
+    executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": [{"id": 1}]})
+    return executor
+
+def test_rerun_after_editing_last_node_recomputes_only_that_node(registry):
+    wf = create_chain(10)
+    cache = NodeOutputCache()
+
+    run(wf, registry, cache)
+    assert len(CountingNodeType.calls) == 10
+
+    CountingNodeType.calls = []
+    executor = run(wf, registry, cache)
+    assert CountingNodeType.calls == []
+    assert executor.run_data["N9"][0].data == [[{"id": 1, "v": 10}]]
+
+    wf.nodes["N9"].parameters["add"] = 100
+    executor = run(wf, registry, cache)
+    assert CountingNodeType.calls == ["N9"]
+    assert executor.run_data["N9"][0].data == [[{"id": 1, "v": 109}]]
+    assert cache.hits == 10 + 9
+
+def test_changed_input_misses(registry):
+    wf = create_chain(2)
+    cache = NodeOutputCache()
+    run(wf, registry, cache)
+    executor = WorkflowExecutor(wf, mode="trigger", node_types=registry, cache=cache)
+    executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": [{"id": 2}]})
+    assert len(CountingNodeType.calls) == 4
+
+def test_non_cacheable_nodes_always_run(registry):
+    assert not SideEffectNodeType.cacheable
+    nodes = [Node("E", "effect")]
+    wf = Workflow("wfEffect", "Effect", nodes, {}, True)
+    cache = NodeOutputCache()
+    WorkflowExecutor(wf, node_types=registry, cache=cache).execute_workflow()
+    assert len(cache) == 0
+
+def test_same_type_siblings_do_not_share_outputs():
+    nodes = [Node("T", "trigger"), Node("A", "processor"), Node("B", "processor")]
+    connections = {"T": {"main": [[ConnectionInfo("A", "main", 0), ConnectionInfo("B", "main", 0)]]}}
+    wf = Workflow("wfSiblings", "Siblings", nodes, connections, True)
+    cache = NodeOutputCache()
+    for _ in range(2):
+        executor = WorkflowExecutor(wf, mode="trigger", cache=cache)
+        executor.execute_workflow(start_node_names=["T"], start_inputs={"T": [{"id": 1}]})
+        assert executor.run_data["A"][0].data == [[{"id": 1, "processedBy": "A"}]]
+        assert executor.run_data["B"][0].data == [[{"id": 1, "processedBy": "B"}]]
+    assert cache.hits == 2
+
+def test_cacheable_is_opt_in_for_subclasses():
+    class ItemWiseNodeType(NodeType):
+        def process_items(self, items, context):
+            yield from items
+
+    class PureNodeType(ItemWiseNodeType):
+        cacheable = True
+
+    class DerivedNodeType(PureNodeType):
+        pass
+
+    assert NodeType.cacheable
+    assert not ItemWiseNodeType.cacheable
+    assert PureNodeType.cacheable
+    assert not DerivedNodeType.cacheable
+
+def test_lru_and_byte_eviction():
+    cache = NodeOutputCache(max_entries=2)
+    for i in range(3):
+        cache.put(("N", "t", 1, "p", str(i), "manual"), NodeResult(data=[[{"i": i}]]))
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.get(("N", "t", 1, "p", "0", "manual")) is None
+
+    small = NodeOutputCache(max_bytes=200)
+    assert not small.put(("N", "t", 1, "p", "big", "manual"), NodeResult(data=[[{"x": "y" * 500}]]))
+    small.put(("N", "t", 1, "p", "a", "manual"), NodeResult(data=[[{"x": "y" * 80}]]))
+    small.put(("N", "t", 1, "p", "b", "manual"), NodeResult(data=[[{"x": "y" * 80}]]))
+    assert len(small) == 1
+    assert small.size_bytes <= 200
+
+def test_stable_hash_ignores_key_order():
+    assert stable_hash({"a": 1, "b": [1, 2]}) == stable_hash({"b": [1, 2], "a": 1})
+    assert stable_hash({"a": 1}) != stable_hash({"a": 2})
@@ -0,0 +1,192 @@
+# tests/test_checkpoint.py
+
+import asyncio
+import os
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.async_executor import AsyncWorkflowExecutor
+from engine.checkpoint import FileCheckpointStore, SQLiteCheckpointStore
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.registry import NodeTypeRegistry
+
+class Crash(BaseException):
+    """
+    模拟进程崩溃：不是 Exception，执行器不会捕获。
+    """
+
+class StepNodeType(NodeType):
+    """
+    记录调用；fail_plan[节点名] 中按顺序弹出本次调用的行为："crash" / "error" / None。
+    """
+    calls = []
+    fail_plan = {}
+
+    def execute(self, context):
+        StepNodeType.calls.append(context.node_name)
+        plan = StepNodeType.fail_plan.get(context.node_name)
+        action = plan.pop(0) if plan else None
+        if action == "crash":
+            raise Crash()
+        if action == "error":
+            raise RuntimeError(f"{context.node_name} failed")
+        return NodeResult(data=[[{**item, context.node_name: True} for item in context.input_data or []]])
+
+@pytest.fixture
+def registry():
+    reg = NodeTypeRegistry()
+    reg.register("step", StepNodeType)
+    StepNodeType.calls = []
+    StepNodeType.fail_plan = {}
+    return reg
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        s = FileCheckpointStore(str(tmp_path / "ckpt"))
+    else:
+        s = SQLiteCheckpointStore(str(tmp_path / "ckpt.db"))
+    yield s
+    s.close()
+
+def create_chain(parameters=None):
+    """
+    Start(trigger) -> A -> B -> C
+    """
+    nodes = [Node("Start", "trigger"), Node("A", "step"), Node("B", "step"), Node("C", "step", parameters=parameters)]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("A", "main", 0)]]},
+        "A": {"main": [[ConnectionInfo("B", "main", 0)]]},
+        "B": {"main": [[ConnectionInfo("C", "main", 0)]]},
+    }
+    return Workflow("wfCkpt", "CheckpointTest", nodes, connections, True)
+
+def create_merge():
+    """
+    Start -> A -> Merge(输入 0)
+    Start -> B -> Merge(输入 1)
+    """
+    nodes = [Node("Start", "trigger"), Node("A", "step"), Node("B", "step"), Node("Merge", "step")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("A", "main", 0), ConnectionInfo("B", "main", 0)]]},
+        "A": {"main": [[ConnectionInfo("Merge", "main", 0)]]},
+        "B": {"main": [[ConnectionInfo("Merge", "main", 1)]]},
+    }
+    return Workflow("wfCkptMerge", "CheckpointMerge", nodes, connections, True)
+
+def test_resume_after_crash(registry, store):
+    wf = create_chain()
+    StepNodeType.fail_plan = {"C": ["crash"]}
+    executor = WorkflowExecutor(wf, node_types=registry, checkpoint=store)
+    with pytest.raises(Crash):
+        executor.execute_workflow(execution_id="run-1")
+    assert store.unfinished() == ["run-1"]
+    assert StepNodeType.calls == ["A", "B", "C"]
+
+    StepNodeType.calls = []
+    resumed = WorkflowExecutor(wf, node_types=registry, checkpoint=store)
+    result = resumed.resume("run-1")
+
+    assert result["status"] == "SUCCESS"
+    assert StepNodeType.calls == ["C"]
+    assert set(resumed.run_data) == {"Start", "A", "B", "C"}
+    assert resumed.run_data["C"][0].data == [[{"trig": True, "A": True, "B": True, "C": True}]]
+    # 成功结束后检查点被删除
+    assert store.load("run-1") is None
+    assert store.unfinished() == []
+
+def test_resume_restores_waiting_data(registry, store):
+    """
+    B 先执行（后进先出），Merge 的输入 1 在 A 崩溃前已到达，resume 后只需执行 A 与 Merge。
+    """
+    wf = create_merge()
+    StepNodeType.fail_plan = {"A": ["crash"]}
+    executor = WorkflowExecutor(wf, node_types=registry, checkpoint=store)
+    with pytest.raises(Crash):
+        executor.execute_workflow()
+    execution_id = executor.execution_id
+    assert StepNodeType.calls == ["B", "A"]
+
+    StepNodeType.calls = []
+    resumed = WorkflowExecutor(wf, node_types=registry, checkpoint=store)
+    result = resumed.resume(execution_id)
+
+    assert result["status"] == "SUCCESS"
+    assert StepNodeType.calls == ["A", "Merge"]
+    assert resumed.run_data["Merge"][0].data == [[
+        {"trig": True, "A": True, "Merge": True},
+        {"trig": True, "B": True, "Merge": True},
+    ]]
+
+def test_resume_failed_execution(registry, store):
+    """
+    失败的执行保留检查点，修复后 resume 只重新执行失败的节点。
+    """
+    wf = create_chain()
+    StepNodeType.fail_plan = {"B": ["error"]}
+    executor = WorkflowExecutor(wf, node_types=registry, checkpoint=store)
+    result = executor.execute_workflow(execution_id="run-err")
+    assert result["status"] == "ERROR"
+    assert store.load("run-err").status == "ERROR"
+    assert store.unfinished() == []
+
+    StepNodeType.calls = []
+    result = WorkflowExecutor(wf, node_types=registry, checkpoint=store).resume("run-err")
+    assert result["status"] == "SUCCESS"
+    assert StepNodeType.calls == ["B", "C"]
+
+def test_resume_keeps_retry_counter(registry, store):
+    """
+    C 允许重试一次：第 1 次失败、第 2 次时进程崩溃。恢复后从第 2 次尝试继续，
+    再失败即用尽重试，而不是重新获得一次重试机会。
+    """
+    wf = create_chain(parameters={"onError": "retryOnFail", "maxRetries": 1, "retryDelay": 0})
+    StepNodeType.fail_plan = {"C": ["error", "crash", "error"]}
+    with pytest.raises(Crash):
+        WorkflowExecutor(wf, node_types=registry, checkpoint=store).execute_workflow(execution_id="run-retry")
+
+    result = WorkflowExecutor(wf, node_types=registry, checkpoint=store).resume("run-retry")
+    assert result["status"] == "ERROR"
+    assert StepNodeType.calls == ["A", "B", "C", "C", "C"]
+
+def test_resume_errors(registry, store):
+    wf = create_chain()
+    executor = WorkflowExecutor(wf, node_types=registry, checkpoint=store)
+    with pytest.raises(ValueError):
+        executor.resume("missing")
+    with pytest.raises(ValueError):
+        WorkflowExecutor(wf, node_types=registry).resume("missing")
+
+    StepNodeType.fail_plan = {"C": ["crash"]}
+    with pytest.raises(Crash):
+        executor.execute_workflow(execution_id="run-x")
+    wf.rename_node("C", "D")
+    with pytest.raises(ValueError):
+        WorkflowExecutor(wf, node_types=registry, checkpoint=store).resume("run-x")
+
+def test_file_store_ignores_torn_frame(tmp_path):
+    store = FileCheckpointStore(str(tmp_path))
+    store.begin("e1", {"k": 1})
+    store.append("e1", ("retry", "A", 2))
+    store.close()
+    with open(os.path.join(str(tmp_path), "e1.ckpt"), "ab") as f:
+        f.write(b"\x00\x00\x10\x00partial")
+
+    state = store.load("e1")
+    assert state.meta == {"k": 1}
+    assert state.events == [("retry", "A", 2)]
+    assert state.status is None
+
+def test_async_resume(registry, store):
+    wf = create_chain()
+    StepNodeType.fail_plan = {"B": ["crash"]}
+    with pytest.raises(Crash):
+        asyncio.run(AsyncWorkflowExecutor(wf, node_types=registry, checkpoint=store).execute_workflow(execution_id="run-a"))
+
+    StepNodeType.calls = []
+    resumed = AsyncWorkflowExecutor(wf, node_types=registry, checkpoint=store)
+    result = asyncio.run(resumed.resume("run-a"))
+    assert result["status"] == "SUCCESS"
+    assert StepNodeType.calls == ["B", "C"]
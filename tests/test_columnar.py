@@ -0,0 +1,98 @@
+# tests/test_columnar.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.columnar import ColumnarBatch
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.registry import NodeTypeRegistry
+
+ITEMS = [
+    {"id": 1, "value": 1.5, "category": "A", "pass": True},
+    {"id": 2, "value": 2.5, "category": "B"},
+    {"id": 3, "category": "A", "pass": False, "tags": ["x"]},
+]
+
+def test_round_trip_with_validity_masks():
+    batch = ColumnarBatch.from_items(ITEMS)
+    assert len(batch) == 3
+    assert batch.columns["id"].dtype.kind == "i"
+    assert batch.columns["value"].dtype.kind == "f"
+    assert list(batch.mask("value")) == [True, True, False]
+    assert batch.to_items() == ITEMS
+    assert batch[1] == ITEMS[1]
+    assert batch[-1]["tags"] == ["x"]
+    # 行视图中是 Python 原生类型
+    assert type(batch[0]["id"]) is int
+
+def test_mixed_numeric_columns_keep_value_types():
+    items = [{"v": 1}, {"v": 2.5}, {"v": 3}]
+    batch = ColumnarBatch.from_items(items)
+    assert batch.columns["v"].dtype.kind == "O"
+    assert [type(it["v"]) for it in batch] == [int, float, int]
+    assert batch.to_items() == items
+    assert [it["v"] for it in batch.take(batch.equals("v", 3))] == [3]
+
+    ints = ColumnarBatch.from_items([{"v": 1}, {"v": 2}])
+    floats = ColumnarBatch.from_items([{"v": 0.5}])
+    both = ColumnarBatch.concat([ints, floats])
+    assert [(type(it["v"]), it["v"]) for it in both] == [(int, 1), (int, 2), (float, 0.5)]
+
+def test_take_concat_and_constant_columns():
+    batch = ColumnarBatch.from_items(ITEMS)
+    sub = batch.take(batch.equals("category", "A"))
+    assert [it["id"] for it in sub] == [1, 3]
+    tagged = sub.with_constant(processedBy="N")
+    assert tagged.columns["id"] is not None and all(it["processedBy"] == "N" for it in tagged)
+    both = ColumnarBatch.concat([sub, batch.take([1])])
+    assert [it["id"] for it in both] == [1, 3, 2]
+    assert both[2] == ITEMS[1]
+    assert [it["id"] for it in batch[1:]] == [2, 3]
+
+def test_switch_and_condition_route_vectorised():
+    nodes = [Node("Start", "trigger"), Node("Sw", "switch"), Node("Cond", "condition")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("Sw", "main", 0)]]},
+        "Sw": {"main": [[ConnectionInfo("Cond", "main", 0)], []]},
+    }
+    wf = Workflow("wfColumnar", "Columnar", nodes, connections, True)
+    executor = WorkflowExecutor(wf, mode="trigger")
+    batch = ColumnarBatch.from_items(ITEMS)
+    result = executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": batch})
+    assert result["status"] == "SUCCESS"
+
+    sw_true, sw_false = executor.run_data["Sw"][0].data
+    assert isinstance(sw_true, ColumnarBatch)
+    assert [it["id"] for it in sw_true] == [1, 3]
+    assert [it["branch"] for it in sw_false] == ["false"]
+
+    cond_true, cond_false = executor.run_data["Cond"][0].data
+    # 批次在节点之间原样传递
+    assert isinstance(cond_true, ColumnarBatch)
+    assert [it["id"] for it in cond_true] == [1]
+    assert [(it["id"], it["processedBy"], it["branch"]) for it in cond_false] == [(3, "Cond", "false")]
+
+def test_item_wise_nodes_see_dict_rows():
+    seen = []
+
+    class RowNodeType(NodeType):
+        def execute(self, context):
+            seen.extend(context.input_data)
+            return NodeResult(data=[[dict(it) for it in context.input_data]])
+
+    registry = NodeTypeRegistry()
+    registry.register("row", RowNodeType)
+    nodes = [Node("Start", "trigger"), Node("P", "processor"), Node("R", "row")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("P", "main", 0)]]},
+        "P": {"main": [[ConnectionInfo("R", "main", 0)]]},
+    }
+    wf = Workflow("wfColumnarRows", "ColumnarRows", nodes, connections, True)
+    executor = WorkflowExecutor(wf, mode="trigger", node_types=registry)
+    executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": ColumnarBatch.from_items(ITEMS)})
+    assert isinstance(executor.run_data["P"][0].data[0], ColumnarBatch)
+    assert seen[0] == {**ITEMS[0], "processedBy": "P"}
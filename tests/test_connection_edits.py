@@ -0,0 +1,153 @@
+# tests/test_connection_edits.py
+
+import random
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node
+from graph.models.graph_index import WorkflowGraphIndex
+from graph.models.connection_model import ConnectionType
+from graph.models.node_model import WorkflowNode
+from graph.models.utils import get_connections_by_destination
+from graph.models import wf_model
+from engine.executor import WorkflowExecutor
+from engine.plan import CompiledWorkflowPlan
+
+def edges_by_source(connections):
+    return sorted(
+        (src, conn_type, out_idx, c.node, c.index)
+        for src, type_dict in connections.items()
+        for conn_type, list_of_lists in type_dict.items()
+        for out_idx, conns in enumerate(list_of_lists)
+        for c in conns or ()
+    )
+
+def edges_by_destination(connections):
+    return sorted(
+        (rev.node, getattr(rev, "conn_type", None) or rev.connection_type, rev.index, dst, in_idx)
+        for dst, type_dict in connections.items()
+        for list_of_lists in type_dict.values()
+        for in_idx, revs in enumerate(list_of_lists)
+        for rev in revs or ()
+    )
+
+def create_old(names):
+    return Workflow("wfEdit", "Edit", [Node(nm, "trigger" if nm == "Start" else "processor") for nm in names], {}, True)
+
+def create_new(names):
+    nodes = [WorkflowNode(name=nm, type="processor") for nm in names]
+    return wf_model.Workflow(wf_model.WorkflowParameters(id="wfEdit", nodes=nodes, connections={}))
+
+def random_edit(rng, wf, names, counter):
+    op = rng.random()
+    if op < 0.55:
+        src, dst = rng.choice(names), rng.choice(names)
+        conn_type = "ai_tool" if rng.random() < 0.2 else "main"
+        wf.add_connection(src, dst, conn_type, rng.randrange(2), rng.randrange(2))
+    elif op < 0.8:
+        edges = edges_by_source(wf.connections_by_source_node)
+        if edges:
+            src, conn_type, out_idx, dst, in_idx = rng.choice(edges)
+            assert wf.remove_connection(src, dst, conn_type, out_idx, in_idx)
+    elif op < 0.9 and len(names) > 2:
+        victim = rng.choice(names)
+        assert wf.remove_node(victim)
+        names.remove(victim)
+    else:
+        old = rng.choice(names)
+        new = f"R{next(counter)}"
+        wf.rename_node(old, new)
+        names[names.index(old)] = new
+
+@pytest.mark.parametrize("model", ["old", "new"])
+def test_random_edits_keep_indexes_in_sync(model):
+    """
+    随机的增删连接 / 删除节点 / 重命名序列：每一步后两个索引都与整体重建的结果一致。
+    """
+    rng = random.Random(7)
+    counter = iter(range(10**6))
+    names = [f"N{i}" for i in range(12)]
+    wf = create_old(names) if model == "old" else create_new(names)
+    for step in range(400):
+        version = wf.version
+        random_edit(rng, wf, names, counter)
+        assert wf.version >= version
+        forward = edges_by_source(wf.connections_by_source_node)
+        assert edges_by_destination(wf.connections_by_destination_node) == forward
+        assert {e[0] for e in forward} | {e[3] for e in forward} <= set(wf.nodes)
+        if model == "old":
+            rebuilt = wf._build_connections_by_destination(wf.connections_by_source_node)
+            index = wf.graph_index
+            fresh = WorkflowGraphIndex(wf.connections_by_source_node, rebuilt)
+            for nm in names:
+                for conn_type in ("main", "ALL"):
+                    assert index.children(nm, conn_type) == fresh.children(nm, conn_type)
+                    assert set(index.parents(nm, conn_type)) == set(fresh.parents(nm, conn_type))
+                    assert set(index.descendants(nm, conn_type)) == set(fresh.descendants(nm, conn_type))
+        else:
+            rebuilt = get_connections_by_destination(wf.connections_by_source_node)
+            assert edges_by_destination(rebuilt) == edges_by_destination(wf.connections_by_destination_node)
+
+def test_add_and_remove_connection():
+    wf = create_old(["Start", "A", "B"])
+    assert wf.add_connection("Start", "A")
+    assert not wf.add_connection("Start", "A")
+    assert wf.add_connection("A", "B", destination_index=1)
+    assert wf.get_parent_nodes("B") == ["A", "Start"]
+    with pytest.raises(ValueError):
+        wf.add_connection("A", "Missing")
+
+    assert wf.remove_connection("Start", "A")
+    assert not wf.remove_connection("Start", "A")
+    assert wf.get_parent_nodes("B") == ["A"]
+    assert "A" not in wf.connections_by_destination_node
+
+def test_index_refreshed_in_place():
+    wf = create_old(["Start", "A", "B", "C"])
+    wf.add_connection("Start", "A")
+    wf.add_connection("A", "B")
+    index = wf.graph_index
+    assert index.descendants("Start") == ("A", "B")
+
+    wf.add_connection("B", "C")
+    assert wf.graph_index is index
+    assert index.descendants("Start") == ("A", "B", "C")
+
+    wf.remove_node("A")
+    assert wf.graph_index is index
+    assert index.descendants("Start") == ()
+    assert index.parents("B") == ()
+    assert "A" not in wf.nodes
+    assert wf.get_topological_levels() == [["Start", "B"], ["C"]]
+
+def test_rename_with_self_loop():
+    for wf in (create_old(["A", "B"]), create_new(["A", "B"])):
+        wf.add_connection("A", "A", "ai_tool")
+        wf.add_connection("A", "B")
+        wf.rename_node("A", "Z")
+        assert edges_by_source(wf.connections_by_source_node) == [
+            ("Z", "ai_tool", 0, "Z", 0), ("Z", "main", 0, "B", 0),
+        ]
+        assert edges_by_destination(wf.connections_by_destination_node) == [
+            ("Z", "ai_tool", 0, "Z", 0), ("Z", "main", 0, "B", 0),
+        ]
+
+def test_new_model_edits():
+    wf = create_new(["A", "B", "C"])
+    assert wf.add_connection("A", "B", ConnectionType.MAIN)
+    assert wf.add_connection("B", "C")
+    assert wf.get_parent_nodes("C") == ["A", "B"]
+    assert wf.get_highest_node("C") == ["A"]
+    assert wf.remove_node("B")
+    assert wf.get_parent_nodes("C") == []
+    assert wf.connections_by_source_node["A"]["main"] == [[]]
+
+def test_executor_sees_edits():
+    wf = create_old(["Start", "A", "B"])
+    wf.add_connection("Start", "A")
+    plan = CompiledWorkflowPlan.for_workflow(wf)
+    wf.add_connection("A", "B")
+    executor = WorkflowExecutor(wf)
+    assert executor.plan is not plan
+    result = executor.execute_workflow()
+    assert result["status"] == "SUCCESS"
+    assert set(executor.run_data) == {"Start", "A", "B"}
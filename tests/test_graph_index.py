@@ -0,0 +1,121 @@
+# tests/test_graph_index.py
+
+import random
+
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.graph_index import WorkflowGraphIndex
+from engine.executor import WorkflowExecutor
+
+def legacy_closure(connections, node_name, conn_type="main"):
+    """
+    旧版 get_child_nodes / get_parent_nodes 的递归 DFS，作为顺序参照。
+    """
+    visited = set()
+    result = []
+
+    def dfs(curr):
+        if curr in visited:
+            return
+        visited.add(curr)
+        if curr not in connections:
+            return
+        type_dict = connections[curr]
+        types_to_check = list(type_dict.keys()) if conn_type == "ALL" else [conn_type]
+        for t in types_to_check:
+            for conn_infos in type_dict.get(t, []):
+                for ci in conn_infos or []:
+                    if ci.node not in visited:
+                        result.append(ci.node)
+                        dfs(ci.node)
+
+    dfs(node_name)
+    return result
+
+def random_workflow(n_nodes, n_edges, seed):
+    """
+    随机 DAG：边只从编号小的节点指向编号大的节点，部分边为 ai_tool 类型，允许重复边。
+    """
+    rng = random.Random(seed)
+    names = [f"N{i}" for i in range(n_nodes)]
+    connections = {}
+    for _ in range(n_edges):
+        a, b = sorted(rng.sample(range(n_nodes), 2))
+        conn_type = "ai_tool" if rng.random() < 0.2 else "main"
+        outputs = connections.setdefault(names[a], {}).setdefault(conn_type, [])
+        out_idx = rng.randrange(2)
+        while len(outputs) <= out_idx:
+            outputs.append([])
+        outputs[out_idx].append(ConnectionInfo(names[b], conn_type, rng.randrange(2)))
+    return Workflow("wfRand", "Random", [Node(nm, "processor") for nm in names], connections)
+
+def test_closures_match_legacy_order():
+    for seed in range(5):
+        wf = random_workflow(40, 90, seed)
+        for nm in wf.nodes:
+            for conn_type in ("main", "ai_tool", "ALL"):
+                assert wf.get_child_nodes(nm, conn_type) == legacy_closure(wf.connections_by_source_node, nm, conn_type)
+                assert wf.get_parent_nodes(nm, conn_type) == legacy_closure(wf.connections_by_destination_node, nm, conn_type)
+
+def test_bfs_order():
+    # A -> B, A -> C, B -> D, C -> D, D -> E
+    connections = {
+        "A": {"main": [[ConnectionInfo("B", "main", 0), ConnectionInfo("C", "main", 0)]]},
+        "B": {"main": [[ConnectionInfo("D", "main", 0)]]},
+        "C": {"main": [[ConnectionInfo("D", "main", 1)]]},
+        "D": {"main": [[ConnectionInfo("E", "main", 0)]]},
+    }
+    wf = Workflow("wfBfs", "Bfs", [Node(n, "processor") for n in "ABCDE"], connections)
+    assert wf.get_child_nodes_bfs("A") == ["B", "C", "D", "E"]
+    assert wf.get_child_nodes("A") == ["B", "D", "E", "C"]
+
+def test_direct_adjacency():
+    connections = {
+        "A": {"main": [[ConnectionInfo("B", "main", 0)], [ConnectionInfo("C", "main", 0), ConnectionInfo("B", "main", 1)]]},
+        "T": {"ai_tool": [[ConnectionInfo("B", "ai_tool", 0)]]},
+    }
+    wf = Workflow("wfAdj", "Adj", [Node(n, "processor") for n in "ABCT"], connections)
+    index = wf.graph_index
+    assert index.children("A") == ("B", "C")
+    assert index.parents("B") == ("A",)
+    assert index.parents("B", "ALL") == ("A", "T")
+    assert index.parents("B", "ALL_NON_MAIN") == ("T",)
+    assert index.children("C") == ()
+
+def test_memoized_and_invalidated_on_rename():
+    connections = {
+        "A": {"main": [[ConnectionInfo("B", "main", 0)]]},
+        "B": {"main": [[ConnectionInfo("C", "main", 0)]]},
+    }
+    wf = Workflow("wfMemo", "Memo", [Node(n, "processor") for n in "ABC"], connections)
+    index = wf.graph_index
+    first = index.ancestors("C")
+    assert first == ("B", "A")
+    assert index.ancestors("C") is first
+    assert wf.graph_index is index
+
+    # 重命名只刷新受影响的节点，索引对象保留，记忆化结果失效
+    wf.rename_node("A", "Root")
+    assert wf.graph_index is index and index.version == wf.version
+    assert wf.get_parent_nodes("C") == ["B", "Root"]
+
+def test_standalone_index():
+    index = WorkflowGraphIndex({"A": {"main": [[ConnectionInfo("B", "main", 0)]]}}, {"B": {"main": [[ConnectionInfo("A", "main", 0)]]}})
+    assert index.descendants("A") == ("B",)
+    assert index.ancestors("B") == ("A",)
+
+def test_partial_execution_on_long_chain():
+    """
+    3000 个节点的链路上做部分执行：上游子图通过索引计算，不再递归。
+    """
+    n = 3000
+    nodes = [Node("Start", "trigger")] + [Node(f"N{i}", "processor") for i in range(n)]
+    connections = {"Start": {"main": [[ConnectionInfo("N0", "main", 0)]]}}
+    for i in range(n - 1):
+        connections[f"N{i}"] = {"main": [[ConnectionInfo(f"N{i + 1}", "main", 0)]]}
+    wf = Workflow("wfLong", "LongChain", nodes, connections, True)
+
+    executor = WorkflowExecutor(wf)
+    result = executor.execute_workflow(destination_node="N99")
+    assert result["status"] == "SUCCESS"
+    assert "N99" in executor.run_data and "N100" not in executor.run_data
+    assert len(executor.run_data) == 101
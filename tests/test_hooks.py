@@ -1,6 +1,7 @@
 # tests/test_hooks.py
 
-import pytest
+import threading
+import time
 from engine.hooks import HookManager
 
 def test_hook_manager():
@@ -28,4 +29,71 @@ def test_hook_unregister():
     hm.register_hook("testEvent", hook_callback)
     hm.unregister_hook("testEvent", hook_callback)
     hm.run_hook("testEvent")
-    assert len(call_history) == 0
\ No newline at end of file
+    assert len(call_history) == 0
+
+def test_hook_fast_path_without_callbacks():
+    hm = HookManager(dispatch="async")
+    assert not hm.has_hooks("testEvent")
+    hm.run_hook("testEvent", 1)
+    # 没有回调时不会启动后台线程
+    assert hm._worker is None
+
+def test_async_dispatch_does_not_block_caller():
+    gate = threading.Event()
+    seen = []
+
+    def slow_hook(n):
+        gate.wait(5)
+        seen.append(n)
+
+    hm = HookManager(dispatch="async", batch_size=10)
+    hm.register_hook("testEvent", slow_hook)
+    start = time.monotonic()
+    for n in range(5):
+        hm.run_hook("testEvent", n)
+    assert time.monotonic() - start < 1
+    gate.set()
+    assert hm.flush(timeout=5)
+    assert seen == [0, 1, 2, 3, 4]
+    hm.close()
+
+def test_async_dispatch_drop_policy():
+    gate = threading.Event()
+    hm = HookManager(dispatch="async", max_queue=2, overflow="drop")
+    hm.register_hook("testEvent", lambda n: gate.wait(5))
+    for n in range(10):
+        hm.run_hook("testEvent", n)
+    assert hm.dropped >= 7
+    gate.set()
+    hm.close()
+
+def test_hook_timeout_does_not_stall_delivery():
+    seen = []
+    hm = HookManager(dispatch="async")
+    hm.register_hook("testEvent", lambda n: time.sleep(1), timeout=0.05)
+    hm.register_hook("testEvent", lambda n: seen.append(n))
+    hm.run_hook("testEvent", 1)
+    hm.run_hook("testEvent", 2)
+    assert hm.flush(timeout=0.9)
+    assert seen == [1, 2]
+    hm.close()
+
+def test_hook_timeout_is_per_event():
+    def cb():
+        pass
+    hm = HookManager()
+    hm.register_hook("eventA", cb, timeout=0.1)
+    hm.register_hook("eventB", cb, timeout=2.0)
+    assert hm._timeouts == {("eventA", cb): 0.1, ("eventB", cb): 2.0}
+    hm.unregister_hook("eventA", cb)
+    assert hm._timeouts == {("eventB", cb): 2.0}
+    hm.unregister_hook("eventB", cb)
+    assert hm._timeouts == {}
+
+def test_hook_errors_are_isolated():
+    seen = []
+    hm = HookManager()
+    hm.register_hook("testEvent", lambda: 1 / 0)
+    hm.register_hook("testEvent", lambda: seen.append(True))
+    hm.run_hook("testEvent")
+    assert seen == [True]
@@ -0,0 +1,38 @@
+# tests/test_items.py
+
+import json
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.executor import WorkflowExecutor
+from engine.items import derive_item
+
+def test_derive_item_copies_and_updates():
+    base = {"id": 1, "name": "a", "nested": {"x": 1}}
+    item = derive_item(base, name="b", processedBy="A")
+    assert type(item) is dict
+    # 被覆盖的键保持原位置，新增键在后
+    assert list(item.items()) == [("id", 1), ("name", "b"), ("nested", {"x": 1}), ("processedBy", "A")]
+    # 上游 item 不被修改；与 dict(item) 一样是浅拷贝
+    assert base == {"id": 1, "name": "a", "nested": {"x": 1}}
+    assert item["nested"] is base["nested"]
+
+def test_executed_items_are_plain_dicts():
+    nodes = [Node("Start", "trigger"), Node("A", "processor"), Node("B", "processor")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("A", "main", 0)]]},
+        "A": {"main": [[ConnectionInfo("B", "main", 0)]]},
+    }
+    wf = Workflow("wfItems", "Items", nodes, connections, True)
+    source = [{"id": i, "payload": "x" * 100} for i in range(3)]
+    for streaming in (False, True):
+        executor = WorkflowExecutor(wf, mode="trigger", streaming=streaming)
+        result = executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": source})
+
+        out = executor.run_data["B"][0].data[0]
+        assert all(type(it) is dict for it in out)
+        assert out[0] == {"id": 0, "payload": "x" * 100, "processedBy": "B"}
+        assert json.loads(json.dumps(out[0])) == out[0]
+        assert out[0] | {"k": 1} == {**out[0], "k": 1}
+        # 上游 item 未被修改
+        assert source[0] == {"id": 0, "payload": "x" * 100}
+        assert json.loads(result.to_json())["runData"]["B"][0]["data"]["main"][0][0]["json"]["processedBy"] == "B"
+        assert json.dumps(result["runData"])
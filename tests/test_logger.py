@@ -1,5 +1,8 @@
 # tests/test_logger.py
 
+import io
+import json
+import logging
 import pytest
 from engine.logger import Logger
 
@@ -16,4 +19,49 @@ def test_logger_output(caplog):
     assert "Test info message" in caplog.text
     assert "Test warning message" in caplog.text
     assert "Test error message" in caplog.text
-    assert "Test critical message" in caplog.text
\ No newline at end of file
+    assert "Test critical message" in caplog.text
+
+@pytest.fixture
+def restore_logger():
+    yield
+    Logger.configure(level="DEBUG")
+
+def test_logger_lazy_args_not_formatted_when_disabled(restore_logger):
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    Logger.configure(level="INFO")
+    assert not Logger.is_enabled_for(logging.DEBUG)
+    Logger.debug("value %s", Expensive())
+    assert Expensive.formatted == 0
+
+    Logger.configure(level="DEBUG", stream=None)
+    Logger.debug("value %s", Expensive())
+    assert Expensive.formatted >= 1
+
+def test_logger_json_sink(restore_logger):
+    sink = io.StringIO()
+    Logger.configure(level="INFO", stream=None, json_sink=sink)
+    Logger.info("node %s done", "A", extra={"workflow_id": "wf1"})
+    Logger.debug("hidden")
+    Logger.shutdown()
+
+    lines = sink.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["message"] == "node A done"
+    assert record["level"] == "INFO"
+    assert record["workflow_id"] == "wf1"
+
+def test_executor_caches_debug_guard(restore_logger):
+    from graph.models.wf_model_old import Workflow, Node
+    from engine.executor import WorkflowExecutor
+
+    Logger.configure(level="INFO", stream=None)
+    executor = WorkflowExecutor(Workflow("wfLog", "Log", [Node("A", "processor")], {}, True))
+    assert executor._log_debug is False
+    assert executor.execute_workflow()["status"] == "SUCCESS"
@@ -0,0 +1,128 @@
+# tests/test_parallel_execution.py
+
+import time
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.registry import NodeTypeRegistry
+
+class SleepNodeType(NodeType):
+    """
+    模拟 I/O 型节点：等待 0.2 秒后原样传递输入。
+    """
+    def execute(self, context):
+        time.sleep(0.2)
+        return super().execute(context)
+
+def create_fan_out_workflow(branches: int = 4):
+    """
+    Start(producer) -> Slow0..SlowN(sleep) -> Merge(processor, N 个输入)
+    """
+    nodes = [Node("Start", "producer"), Node("Merge", "processor")]
+    fan_out = []
+    connections = {}
+    for i in range(branches):
+        name = f"Slow{i}"
+        nodes.append(Node(name, "sleep"))
+        fan_out.append(ConnectionInfo(name, "main", 0))
+        connections[name] = {"main": [[ConnectionInfo("Merge", "main", i)]]}
+    connections["Start"] = {"main": [fan_out]}
+    return Workflow("wfParallel", "ParallelTest", nodes, connections, True)
+
+@pytest.fixture
+def registry():
+    reg = NodeTypeRegistry()
+    reg.register("sleep", SleepNodeType)
+    return reg
+
+def test_parallel_fan_out_runs_concurrently(registry):
+    wf = create_fan_out_workflow(4)
+    executor = WorkflowExecutor(wf, mode="manual", node_types=registry, max_workers=4)
+
+    started = time.perf_counter()
+    result = executor.execute_workflow()
+    elapsed = time.perf_counter() - started
+
+    assert result["status"] == "SUCCESS"
+    # 串行需要 0.8 秒，并行应接近单个分支的耗时
+    assert elapsed < 0.6
+    assert set(result["runData"]) == {"Start", "Slow0", "Slow1", "Slow2", "Slow3", "Merge"}
+
+def test_parallel_matches_sequential(registry):
+    wf = create_fan_out_workflow(3)
+    seq = WorkflowExecutor(wf, mode="manual", node_types=registry)
+    par = WorkflowExecutor(wf, mode="manual", node_types=registry, max_workers=3)
+    seq.execute_workflow()
+    par.execute_workflow()
+
+    assert set(seq.run_data) == set(par.run_data)
+    merged_seq = seq.run_data["Merge"][0].data
+    merged_par = par.run_data["Merge"][0].data
+    # Merge 按 inputIndex 顺序合并输入，与完成顺序无关
+    assert merged_seq == merged_par
+
+def test_parallel_error_stops_workflow(registry):
+    class BoomNodeType(NodeType):
+        def execute(self, context):
+            raise RuntimeError("boom")
+
+    registry.register("boom", BoomNodeType)
+    nodes = [Node("Start", "producer"), Node("Boom", "boom"), Node("Slow", "sleep")]
+    connections = {"Start": {"main": [[ConnectionInfo("Boom", "main", 0), ConnectionInfo("Slow", "main", 0)]]}}
+    wf = Workflow("wfParallelErr", "ParallelErr", nodes, connections, True)
+
+    result = WorkflowExecutor(wf, node_types=registry, max_workers=2).execute_workflow()
+    assert result["status"] == "ERROR"
+    assert "boom" in result["error"]["message"]
+
+
+class DelayNodeType(NodeType):
+    """
+    等待 parameters["delay"] 秒后输出一条标明来源的 item。
+    """
+    def execute(self, context):
+        time.sleep(context.parameters["delay"])
+        return NodeResult(data=[[{"from": context.node_name}]])
+
+def create_skewed_workflow(delays):
+    """
+    Start -> X, Y, Z；X、Y -> M 输入 0，Z -> M 输入 1。
+    """
+    nodes = [Node("Start", "producer"), Node("M", "processor")]
+    nodes += [Node(name, "delay", parameters={"delay": delay}) for name, delay in delays.items()]
+    connections = {
+        "Start": {"main": [[ConnectionInfo(name, "main", 0) for name in delays]]},
+        "X": {"main": [[ConnectionInfo("M", "main", 0)]]},
+        "Y": {"main": [[ConnectionInfo("M", "main", 0)]]},
+        "Z": {"main": [[ConnectionInfo("M", "main", 1)]]},
+    }
+    return Workflow("wfSkewed", "Skewed", nodes, connections, True)
+
+def test_parallel_order_independent_of_timing(registry):
+    registry.register("delay", DelayNodeType)
+    # Z 最后完成，保证 M 在 X、Y 都到达后才就绪；X、Y 的完成顺序不同
+    for delays in ({"X": 0.2, "Y": 0.0, "Z": 0.3}, {"X": 0.0, "Y": 0.2, "Z": 0.3}, {"X": 0.1, "Y": 0.05, "Z": 0.2}):
+        executor = WorkflowExecutor(create_skewed_workflow(delays), node_types=registry, max_workers=3)
+        assert executor.execute_workflow()["status"] == "SUCCESS"
+        assert [item["from"] for item in executor.run_data["M"][0].data[0]] == ["X", "Y", "Z"]
+        assert list(executor.run_data) == ["Start", "X", "Y", "Z", "M"]
+
+def test_slow_node_does_not_block_other_branches(registry):
+    """
+    一个 0.5 秒的节点与 10 个 0.05 秒节点组成的链路并行：耗时应接近关键路径（0.5 秒），
+    而不是两者之和。
+    """
+    registry.register("delay", DelayNodeType)
+    nodes = [Node("Start", "producer"), Node("Slow", "delay", parameters={"delay": 0.5})]
+    nodes += [Node(f"C{i}", "delay", parameters={"delay": 0.05}) for i in range(10)]
+    connections = {"Start": {"main": [[ConnectionInfo("Slow", "main", 0), ConnectionInfo("C0", "main", 0)]]}}
+    for i in range(9):
+        connections[f"C{i}"] = {"main": [[ConnectionInfo(f"C{i + 1}", "main", 0)]]}
+    wf = Workflow("wfCritical", "Critical", nodes, connections, True)
+
+    started = time.perf_counter()
+    result = WorkflowExecutor(wf, node_types=registry, max_workers=4).execute_workflow()
+    assert result["status"] == "SUCCESS"
+    assert time.perf_counter() - started < 0.8
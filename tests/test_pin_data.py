@@ -0,0 +1,153 @@
+# tests/test_pin_data.py
+
+import asyncio
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.data_model import NodeExecutionData
+from engine.async_executor import AsyncWorkflowExecutor
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.registry import NodeTypeRegistry
+
+class RecordingNodeType(NodeType):
+    """
+    记录执行过的节点名，输出为输入加上 seen 字段。
+    """
+    calls = []
+
+    def execute(self, context):
+        RecordingNodeType.calls.append(context.node_name)
+        return NodeResult(data=[[{**item, "seen": context.node_name} for item in context.input_data or []]])
+
+@pytest.fixture
+def registry():
+    reg = NodeTypeRegistry()
+    reg.register("recording", RecordingNodeType)
+    RecordingNodeType.calls = []
+    return reg
+
+def conn(*targets):
+    return {"main": [[ConnectionInfo(t, "main", 0) for t in targets]]}
+
+def create_api_workflow(pin_data=None):
+    """
+    Start(trigger) -> Auth -> Api -> Transform
+    """
+    nodes = [
+        Node("Start", "trigger"),
+        Node("Auth", "recording"),
+        Node("Api", "recording"),
+        Node("Transform", "recording"),
+    ]
+    connections = {"Start": conn("Auth"), "Auth": conn("Api"), "Api": conn("Transform")}
+    return Workflow("wfPin", "PinTest", nodes, connections, True, pin_data=pin_data)
+
+def test_pinned_node_skips_upstream(registry):
+    """
+    Api 被固定：Start、Auth 都不执行，Transform 直接收到固定的 item。
+    """
+    wf = create_api_workflow(pin_data={"Api": [{"id": 1}, {"id": 2}]})
+    executor = WorkflowExecutor(wf, node_types=registry)
+    result = executor.execute_workflow()
+
+    assert result["status"] == "SUCCESS"
+    assert RecordingNodeType.calls == ["Transform"]
+    assert "Start" not in executor.run_data and "Auth" not in executor.run_data
+
+    api_run = executor.run_data["Api"][0]
+    assert api_run.pinned is True
+    assert api_run.data == [[{"id": 1}, {"id": 2}]]
+    assert executor.run_data["Transform"][0].data == [[{"id": 1, "seen": "Transform"}, {"id": 2, "seen": "Transform"}]]
+    assert executor.run_data["Transform"][0].pinned is False
+
+def test_pinned_node_recorded_in_task_data(registry):
+    wf = create_api_workflow(pin_data={"Api": [{"id": 1}]})
+    result = WorkflowExecutor(wf, node_types=registry).execute_workflow()
+
+    api_task = result.task_data()["Api"][0]
+    assert api_task.hints and api_task.hints[0].message == "Output from pinned data"
+    assert result.task_data()["Transform"][0].hints is None
+    assert "hints" in result.to_dict()["runData"]["Api"][0]
+
+def test_node_execution_data_items(registry):
+    """
+    固定数据也可以是 wf_model 中的 NodeExecutionData 列表。
+    """
+    wf = create_api_workflow(pin_data={"Api": [NodeExecutionData(json_data={"id": 7})]})
+    executor = WorkflowExecutor(wf, node_types=registry)
+    executor.execute_workflow()
+    assert executor.run_data["Transform"][0].data == [[{"id": 7, "seen": "Transform"}]]
+
+def test_upstream_kept_when_needed_elsewhere(registry):
+    """
+    Start -> Api(固定) -> Transform
+    Start -> Other
+    Start 仍需为 Other 执行，但 Api 不会因为收到 Start 的输出而再执行一次。
+    """
+    nodes = [
+        Node("Start", "trigger"),
+        Node("Api", "recording"),
+        Node("Transform", "recording"),
+        Node("Other", "recording"),
+    ]
+    connections = {"Start": conn("Api", "Other"), "Api": conn("Transform")}
+    wf = Workflow("wfPin2", "PinShared", nodes, connections, True, pin_data={"Api": [{"id": 1}]})
+    executor = WorkflowExecutor(wf, node_types=registry)
+    result = executor.execute_workflow()
+
+    assert result["status"] == "SUCCESS"
+    assert sorted(RecordingNodeType.calls) == ["Other", "Transform"]
+    assert len(executor.run_data["Api"]) == 1
+    assert executor.run_data["Api"][0].pinned
+    assert executor.run_data["Other"][0].data == [[{"trig": True, "seen": "Other"}]]
+
+def test_pin_with_destination_node(registry):
+    """
+    destination_node 为固定节点本身时只输出固定数据，不执行任何节点。
+    """
+    wf = create_api_workflow(pin_data={"Api": [{"id": 1}]})
+    executor = WorkflowExecutor(wf, node_types=registry)
+    result = executor.execute_workflow(destination_node="Api")
+
+    assert result["status"] == "SUCCESS"
+    assert RecordingNodeType.calls == []
+    assert list(executor.run_data) == ["Api"]
+
+def test_pin_data_ignored_outside_manual_mode(registry):
+    wf = create_api_workflow(pin_data={"Api": [{"id": 1}]})
+    executor = WorkflowExecutor(wf, mode="trigger", node_types=registry)
+    executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": [{"id": 9}]})
+    assert RecordingNodeType.calls == ["Auth", "Api", "Transform"]
+    assert not executor.run_data["Api"][0].pinned
+
+    RecordingNodeType.calls = []
+    executor = WorkflowExecutor(wf, mode="trigger", node_types=registry, use_pin_data=True)
+    executor.execute_workflow()
+    assert RecordingNodeType.calls == ["Transform"]
+
+def test_disabled_pinned_node_is_not_pinned(registry):
+    """
+    禁用的节点不使用固定数据，按禁用节点处理（上游照常执行）。
+    """
+    wf = create_api_workflow(pin_data={"Api": [{"id": 1}]})
+    wf.get_node("Api").disabled = True
+    executor = WorkflowExecutor(wf, node_types=registry)
+    executor.execute_workflow()
+    assert RecordingNodeType.calls == ["Auth"]
+
+def test_rename_keeps_pin_data(registry):
+    wf = create_api_workflow(pin_data={"Api": [{"id": 1}]})
+    wf.rename_node("Api", "Fetch")
+    assert wf.get_pin_data_of_node("Fetch") == [{"id": 1}]
+    assert wf.get_pin_data_of_node("Api") is None
+
+def test_async_executor_uses_pin_data(registry):
+    wf = create_api_workflow(pin_data={"Api": [{"id": 1}]})
+    executor = AsyncWorkflowExecutor(wf, node_types=registry)
+    result = asyncio.run(executor.execute_workflow())
+
+    assert result["status"] == "SUCCESS"
+    assert RecordingNodeType.calls == ["Transform"]
+    assert executor.run_data["Api"][0].pinned
@@ -0,0 +1,62 @@
+# tests/test_plan.py
+
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.executor import WorkflowExecutor
+from engine.plan import CompiledWorkflowPlan
+from engine.node_types import SwitchNodeType
+
+def create_branch_workflow():
+    """
+    NodeA(trigger) -> NodeB(switch) -> [NodeC, NodeD]
+    """
+    nA = Node("NodeA", "trigger")
+    nB = Node("NodeB", "switch")
+    nC = Node("NodeC", "processor")
+    nD = Node("NodeD", "processor")
+    connections = {
+        "NodeA": {"main": [[ConnectionInfo("NodeB", "main", 0)]]},
+        "NodeB": {"main": [
+            [ConnectionInfo("NodeC", "main", 0)],
+            [ConnectionInfo("NodeD", "main", 0)],
+        ]},
+    }
+    return Workflow("wfPlan", "PlanTest", [nA, nB, nC, nD], connections, True)
+
+def test_plan_structure():
+    wf = create_branch_workflow()
+    plan = CompiledWorkflowPlan.for_workflow(wf)
+
+    a, b, c, d = (plan.index[nm] for nm in ["NodeA", "NodeB", "NodeC", "NodeD"])
+    assert plan.children[a] == (((b, 0),),)
+    assert plan.children[b] == (((c, 0),), ((d, 0),))
+    assert plan.parents[c] == (b,)
+    assert plan.input_requirements_by_name == {"NodeB": 1, "NodeC": 1, "NodeD": 1}
+    assert plan.start_candidate_ids == (a,)
+    assert isinstance(plan.logic_of("NodeB"), SwitchNodeType)
+
+def test_plan_shared_across_executors():
+    """
+    同一版本的工作流只编译一次，多个执行器共享同一个计划。
+    """
+    wf = create_branch_workflow()
+    ex1 = WorkflowExecutor(wf, mode="manual")
+    ex2 = WorkflowExecutor(wf, mode="manual")
+    assert ex1.plan is ex2.plan
+
+    r1 = ex1.execute_workflow()
+    r2 = ex2.execute_workflow()
+    assert r1["status"] == r2["status"] == "SUCCESS"
+    assert set(r1["runData"]) == set(r2["runData"])
+
+def test_plan_invalidated_on_rename():
+    wf = create_branch_workflow()
+    plan = CompiledWorkflowPlan.for_workflow(wf)
+    wf.rename_node("NodeC", "NodeC_new")
+
+    new_plan = CompiledWorkflowPlan.for_workflow(wf)
+    assert new_plan is not plan
+    assert "NodeC_new" in new_plan.index
+    assert "NodeC" not in new_plan.index
+
+    result = WorkflowExecutor(wf, mode="manual").execute_workflow()
+    assert result["status"] == "SUCCESS"
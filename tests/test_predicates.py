@@ -0,0 +1,140 @@
+# tests/test_predicates.py
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.executor import WorkflowExecutor
+from engine.predicates import CompiledByParameters, compile_predicate, compile_switch
+
+ITEMS = [
+    {"id": 1, "score": 5, "name": "alpha", "tag": "x"},
+    {"id": 2, "score": 15, "name": "beta"},
+    {"id": 3, "score": 25, "name": "alpine", "tag": None},
+    {"id": 4, "name": "gamma"},
+    {"id": 5, "score": "n/a", "name": 7},
+]
+
+def ids(pred):
+    return [it["id"] for it in ITEMS if pred(it)]
+
+@pytest.mark.parametrize("rule, expected", [
+    ({"field": "score", "eq": 15}, [2]),
+    ({"field": "score", "not_eq": 15}, [1, 3, 4, 5]),
+    ({"field": "score", "gte": 15}, [2, 3]),
+    ({"field": "score", "lt": 15}, [1]),
+    ({"field": "score", "between": {"from": 5, "to": 15}}, [1, 2]),
+    ({"field": "name", "startsWith": "al"}, [1, 3]),
+    ({"field": "name", "endsWith": "a"}, [1, 2, 4]),
+    ({"field": "name", "includes": "amm"}, [4]),
+    ({"field": "name", "regex": "^a.*a$"}, [1]),
+    ({"field": "tag", "exists": True}, [1, 3]),
+    ({"field": "tag", "exists": False}, [2, 4, 5]),
+    ({"field": "tag", "truthy": True}, [1]),
+    ({"field": "score", "gt": 1, "lt": 20}, [1, 2]),
+])
+def test_operators(rule, expected):
+    assert ids(compile_predicate(rule)) == expected
+
+def test_rule_lists_and_combinators():
+    rules = [{"field": "score", "gte": 10}, {"field": "name", "startsWith": "al"}]
+    assert ids(compile_predicate(rules)) == [3]
+    assert ids(compile_predicate(rules, "or")) == [1, 2, 3]
+
+def test_compiled_predicates_are_cached():
+    rule = {"field": "score", "gte": 10}
+    assert compile_predicate(rule) is compile_predicate(dict(rule))
+    assert compile_switch([rule]) is compile_switch([dict(rule)])
+
+def test_non_json_rule_values_are_not_conflated():
+    class Token:
+        def __init__(self, value):
+            self.value = value
+
+        def __eq__(self, other):
+            return isinstance(other, Token) and other.value == self.value
+
+        __hash__ = None
+
+        def __str__(self):
+            return "token"
+
+    a, b = Token(1), Token(2)
+    items = [{"id": 1, "t": a}, {"id": 2, "t": b}]
+    assert [it["id"] for it in items if compile_predicate({"field": "t", "eq": a})(it)] == [1]
+    assert [it["id"] for it in items if compile_predicate({"field": "t", "eq": b})(it)] == [2]
+    assert compile_switch([{"field": "t", "eq": b}]).route(items[1]) == 0
+
+def test_compiled_once_per_parameters_object():
+    calls = []
+    compiled = CompiledByParameters(lambda params: calls.append(params) or compile_predicate(params["conditions"]))
+    params = {"conditions": {"field": "score", "gte": 10}}
+    first = compiled.get(params)
+    assert compiled.get(params) is first
+    assert len(calls) == 1
+    # 参数整体替换或原地修改后重新编译
+    compiled.get(dict(params))
+    assert len(calls) == 2
+    params["conditions"]["gte"] = 20
+    assert compiled.get(params) is not first
+    assert len(calls) == 3
+
+def test_invalid_rules():
+    with pytest.raises(ValueError):
+        compile_predicate({"field": "x", "near": 1})
+    with pytest.raises(ValueError):
+        compile_predicate({"eq": 1})
+
+def test_vectorised_matches_item_wise():
+    pytest.importorskip("numpy")
+    from engine.columnar import ColumnarBatch
+
+    batch = ColumnarBatch.from_items(ITEMS)
+    for rule in [
+        {"field": "score", "gte": 15},
+        {"field": "name", "startsWith": "al"},
+        {"field": "name", "regex": "a$"},
+        {"field": "tag", "exists": True},
+        {"field": "missing", "not_eq": 1},
+        [{"field": "score", "between": {"from": 0, "to": 20}}, {"field": "name", "includes": "e"}],
+    ]:
+        pred = compile_predicate(rule)
+        assert list(pred.mask(batch)) == [pred(it) for it in ITEMS], rule
+
+def create_routing_workflow(node_type, parameters):
+    """
+    Start(trigger) -> Route(switch/condition)
+    """
+    nodes = [Node("Start", "trigger"), Node("Route", node_type, parameters=parameters)]
+    connections = {"Start": {"main": [[ConnectionInfo("Route", "main", 0)]]}}
+    return Workflow("wfRoute", "Route", nodes, connections, True)
+
+def run_route(wf, items):
+    executor = WorkflowExecutor(wf, mode="trigger")
+    executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": items})
+    return [[it["id"] for it in out] for out in executor.run_data["Route"][0].data]
+
+def test_switch_node_with_rules():
+    wf = create_routing_workflow("switch", {"rules": [
+        {"field": "score", "lt": 10},
+        [{"field": "score", "gte": 10}, {"field": "name", "startsWith": "b"}],
+        {"field": "name", "regex": "^al"},
+    ]})
+    assert run_route(wf, ITEMS) == [[1], [2], [3], [4, 5]]
+
+def test_condition_node_with_conditions():
+    wf = create_routing_workflow("condition", {
+        "conditions": [{"field": "score", "gte": 20}, {"field": "tag", "exists": False}],
+        "combinator": "or",
+    })
+    assert run_route(wf, ITEMS) == [[2, 3, 4, 5], [1]]
+
+def test_switch_rules_edited_in_place():
+    parameters = {"rules": [{"field": "score", "lt": 10}]}
+    wf = create_routing_workflow("switch", parameters)
+    assert run_route(wf, ITEMS) == [[1], [2, 3, 4, 5]]
+    parameters["rules"][0]["lt"] = 20
+    assert run_route(wf, ITEMS) == [[1, 2], [3, 4, 5]]
+
+def test_legacy_defaults_unchanged():
+    items = [{"id": 1, "category": "A", "pass": 1}, {"id": 2, "category": "B"}]
+    assert run_route(create_routing_workflow("switch", {}), items) == [[1], [2]]
+    assert run_route(create_routing_workflow("condition", {}), items) == [[1], [2]]
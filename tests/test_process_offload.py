@@ -0,0 +1,106 @@
+# tests/test_process_offload.py
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.async_executor import AsyncWorkflowExecutor
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.registry import NodeTypeRegistry
+
+class CpuNodeType(NodeType):
+    """
+    CPU 密集型节点：在每个 item 上记录执行它的进程 id。
+    必须定义在模块顶层，才能被进程池 pickle。
+    """
+    cpu_bound = True
+
+    def execute(self, context):
+        out = []
+        for item in context.input_data:
+            new_item = dict(item)
+            new_item["pid"] = os.getpid()
+            new_item["total"] = sum(range(item.get("n", 0)))
+            out.append(new_item)
+        return NodeResult(data=[out])
+
+def create_cpu_workflow():
+    nodes = [Node("Start", "trigger"), Node("Crunch", "crunch"), Node("After", "processor")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("Crunch", "main", 0)]]},
+        "Crunch": {"main": [[ConnectionInfo("After", "main", 0)]]},
+    }
+    return Workflow("wfCpu", "CpuTest", nodes, connections, True)
+
+@pytest.fixture
+def registry():
+    reg = NodeTypeRegistry()
+    reg.register("crunch", CpuNodeType)
+    return reg
+
+@pytest.fixture(scope="module")
+def pool():
+    with ProcessPoolExecutor(max_workers=2) as p:
+        yield p
+
+def test_cpu_bound_node_runs_in_process_pool(registry, pool):
+    wf = create_cpu_workflow()
+    executor = WorkflowExecutor(wf, mode="trigger", node_types=registry, process_pool=pool)
+    result = executor.execute_workflow(
+        start_node_names=["Start"],
+        start_inputs={"Start": [{"n": 10}, {"n": 100}]},
+    )
+    assert result["status"] == "SUCCESS"
+
+    items = executor.run_data["Crunch"][0].data[0]
+    assert [it["total"] for it in items] == [45, 4950]
+    assert all(it["pid"] != os.getpid() for it in items)
+    # 下游节点照常收到进程池返回的数据
+    assert executor.run_data["After"][0].data[0][0]["processedBy"] == "After"
+
+def test_cpu_bound_node_without_pool_runs_inline(registry):
+    wf = create_cpu_workflow()
+    executor = WorkflowExecutor(wf, mode="trigger", node_types=registry)
+    executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": [{"n": 3}]})
+    assert executor.run_data["Crunch"][0].data[0][0]["pid"] == os.getpid()
+
+def test_cpu_bound_node_async_executor(registry, pool):
+    wf = create_cpu_workflow()
+    executor = AsyncWorkflowExecutor(wf, mode="trigger", node_types=registry, process_pool=pool)
+    result = asyncio.run(executor.execute_workflow(
+        start_node_names=["Start"],
+        start_inputs={"Start": [{"n": 4}]},
+    ))
+    assert result["status"] == "SUCCESS"
+    item = executor.run_data["Crunch"][0].data[0][0]
+    assert item["total"] == 6
+    assert item["pid"] != os.getpid()
+
+class RunawayCpuNodeType(NodeType):
+    """
+    不检查取消信号的长时间 CPU 节点（进程池中无法收到 abort_signal）。
+    """
+    cpu_bound = True
+
+    def execute(self, context):
+        time.sleep(1.5)
+        return NodeResult(data=[list(context.input_data)])
+
+def test_deadline_enforced_for_offloaded_node():
+    registry = NodeTypeRegistry()
+    registry.register("runaway", RunawayCpuNodeType)
+    nodes = [Node("Start", "trigger"), Node("Crunch", "runaway")]
+    wf = Workflow("wfCpuTimeout", "CpuTimeout", nodes, {"Start": {"main": [[ConnectionInfo("Crunch", "main", 0)]]}}, True)
+    pool = ProcessPoolExecutor(max_workers=1)
+    try:
+        started = time.perf_counter()
+        result = WorkflowExecutor(wf, node_types=registry, process_pool=pool, timeout=0.3).execute_workflow()
+        assert time.perf_counter() - started < 1.2
+        assert result["status"] == "CANCELED"
+        assert "timed out" in result["error"]["message"]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
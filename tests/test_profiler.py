@@ -0,0 +1,100 @@
+# tests/test_profiler.py
+
+import time
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.profiler import LatencyHistogram, Profiler
+from engine.registry import NodeTypeRegistry
+
+def test_histogram_percentiles_within_precision():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000)
+    assert hist.count == 1000
+    assert hist.min == pytest.approx(0.001)
+    assert hist.max == pytest.approx(1.0)
+    assert hist.percentile(50) == pytest.approx(0.5, rel=0.04)
+    assert hist.percentile(99) == pytest.approx(0.99, rel=0.04)
+    assert hist.percentile(100) == pytest.approx(1.0)
+    # 桶数与记录次数无关
+    assert len(hist.counts) < 300
+
+def test_histogram_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0.001)
+    b.record(0.1)
+    a.merge(b)
+    assert a.count == 2
+    assert a.max == pytest.approx(0.1)
+
+class SlowNodeType(NodeType):
+    def execute(self, context):
+        time.sleep(0.02)
+        return NodeResult(data=[[dict(item) for item in context.input_data] * 2])
+
+def create_workflow():
+    """
+    Start(trigger) -> Slow(slow, 输出加倍) -> Fast(processor)
+    """
+    registry = NodeTypeRegistry()
+    registry.register("slow", SlowNodeType)
+    nodes = [Node("Start", "trigger"), Node("Slow", "slow"), Node("Fast", "processor")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("Slow", "main", 0)]]},
+        "Slow": {"main": [[ConnectionInfo("Fast", "main", 0)]]},
+    }
+    return Workflow("wfProfile", "ProfileTest", nodes, connections, True), registry
+
+def test_profiler_records_per_node_stats_across_runs():
+    wf, registry = create_workflow()
+    profiler = Profiler()
+    for _ in range(3):
+        executor = WorkflowExecutor(wf, mode="trigger", node_types=registry, profiler=profiler)
+        executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": [{"id": 1}, {"id": 2}]})
+
+    slow = profiler.get("wfProfile", "Slow")
+    assert slow.runs == 3 and slow.attempts == 3
+    assert (slow.items_in, slow.items_out) == (6, 12)
+    assert slow.wall_total >= 0.06
+    assert slow.latency.count == 3
+    assert slow.cpu_total < slow.wall_total
+
+    assert profiler.hot_nodes(top=1)[0].node_name == "Slow"
+    report = profiler.report()
+    assert "Slow" in report and "Fast" in report
+
+def test_profiler_records_failed_attempts():
+    class FlakyNodeType(NodeType):
+        calls = 0
+
+        def execute(self, context):
+            FlakyNodeType.calls += 1
+            if FlakyNodeType.calls == 1:
+                raise RuntimeError("boom")
+            return NodeResult(data=[[{"ok": True}]])
+
+    registry = NodeTypeRegistry()
+    registry.register("flaky", FlakyNodeType)
+    wf = Workflow("wfFlaky", "Flaky", [Node("F", "flaky", parameters={"onError": "retryOnFail", "maxRetries": 1})], {}, True)
+    profiler = Profiler()
+    WorkflowExecutor(wf, node_types=registry, profiler=profiler).execute_workflow()
+
+    prof = profiler.get("wfFlaky", "F")
+    assert (prof.attempts, prof.failures, prof.runs) == (2, 1, 1)
+    assert set(prof.latency_by_attempt) == {1, 2}
+
+def test_profiler_streaming_stages():
+    nodes = [Node("Start", "trigger"), Node("A", "processor"), Node("B", "processor")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("A", "main", 0)]]},
+        "A": {"main": [[ConnectionInfo("B", "main", 0)]]},
+    }
+    wf = Workflow("wfStreamProfile", "StreamProfile", nodes, connections, True)
+    profiler = Profiler()
+    executor = WorkflowExecutor(wf, mode="trigger", streaming=True, stream_chunk_size=10, profiler=profiler)
+    executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": [{"id": i} for i in range(25)]})
+    assert profiler.get("wfStreamProfile", "A").items_out == 25
+    assert profiler.get("wfStreamProfile", "B").items_in == 25
@@ -0,0 +1,88 @@
+# tests/test_registry.py
+
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.node_type import NodeTypes, VersionedNodeType
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.node_types import NodeType, ProducerNodeType, TriggerNodeType
+from engine.registry import NodeTypeRegistry, default_registry
+
+def test_builtin_lookup_and_singletons():
+    registry = NodeTypeRegistry()
+    assert isinstance(registry, NodeTypes)
+    assert isinstance(registry.get_by_name("producer"), VersionedNodeType)
+
+    producer = registry.get_by_name_and_version("producer", 1)
+    assert isinstance(producer, ProducerNodeType)
+    # 同一 (type, version) 始终返回同一个实例
+    assert registry.get_by_name_and_version("producer", 1) is producer
+
+    # 未注册的类型名按旧规则做子串匹配
+    assert isinstance(registry.get_by_name_and_version("webhookTrigger", 1), TriggerNodeType)
+    assert registry.get_by_name_and_version("myProducer", 1) is producer
+    # 都不匹配 => default 直通节点
+    assert type(registry.get_by_name_and_version("merge", 1)) is NodeType
+
+def test_versioned_registration():
+    registry = NodeTypeRegistry(include_builtins=False)
+
+    class V1(NodeType):
+        pass
+
+    class V2(NodeType):
+        pass
+
+    registry.register("custom", V1, version=1)
+    registry.register("custom", V2, version=2)
+
+    assert isinstance(registry.get_by_name_and_version("custom", 1), V1)
+    assert isinstance(registry.get_by_name_and_version("custom", 2), V2)
+    assert isinstance(registry.get_by_name_and_version("custom"), V2)
+    assert registry.get_by_name("custom").current_version == 2
+    assert registry.get_known_types() == {"custom": [1, 2]}
+
+def test_plugin_node_type_without_monkey_patch():
+    """
+    插件类型注册到独立的注册表，再交给 WorkflowExecutor 使用。
+    """
+    class FailingNodeType(NodeType):
+        def execute(self, context):
+            calls = context.global_config.setdefault("A_calls", 0)
+            context.global_config["A_calls"] = calls + 1
+            if calls < 2:
+                raise Exception("Simulated error")
+            return NodeResult(data=[[{"msg": "OK after retries"}]])
+
+    registry = NodeTypeRegistry()
+    registry.register("failing", FailingNodeType)
+
+    nA = Node("NodeA", "failing", parameters={
+        "onError": "retryOnFail", "maxRetries": 2, "retryDelay": 0
+    })
+    nB = Node("NodeB", "processor")
+    connections = {"NodeA": {"main": [[ConnectionInfo("NodeB", "main", 0)]]}}
+    wf = Workflow("wfPlugin", "PluginTest", [nA, nB], connections, True)
+
+    executor = WorkflowExecutor(wf, mode="manual", global_config={}, node_types=registry)
+    result = executor.execute_workflow()
+
+    assert result["status"] == "SUCCESS"
+    assert executor.global_config["A_calls"] == 3
+    assert "NodeB" in result["runData"]
+    # 默认注册表不受影响
+    assert type(default_registry.get_by_name_and_version("failing", 1)) is NodeType
+
+def test_registry_change_recompiles_plan():
+    registry = NodeTypeRegistry()
+    wf = Workflow("wfReg", "RegTest", [Node("NodeA", "custom")], {}, True)
+
+    ex1 = WorkflowExecutor(wf, node_types=registry)
+    assert type(ex1._get_node_type_logic(wf.get_node("NodeA"))) is NodeType
+
+    class CustomNodeType(NodeType):
+        pass
+
+    registry.register("custom", CustomNodeType)
+    ex2 = WorkflowExecutor(wf, node_types=registry)
+    assert ex2.plan is not ex1.plan
+    assert isinstance(ex2._get_node_type_logic(wf.get_node("NodeA")), CustomNodeType)
@@ -0,0 +1,61 @@
+# tests/test_result.py
+
+import json
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.executor_model import ExecutionStatus as TaskExecutionStatus
+from engine.executor import WorkflowExecutor
+from engine.hooks import HookManager
+from engine.result import ExecutionResult
+
+def create_simple_workflow():
+    """
+    Start(trigger) -> Step(processor)
+    """
+    nodes = [Node("Start", "trigger"), Node("Step", "processor")]
+    connections = {"Start": {"main": [[ConnectionInfo("Step", "main", 0)]]}}
+    return Workflow("wfResult", "ResultTest", nodes, connections, True)
+
+def run(wf, **kwargs):
+    executor = WorkflowExecutor(wf, mode="trigger", **kwargs)
+    return executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": [{"id": 1}, {"id": 2}]})
+
+def test_result_is_backward_compatible_mapping():
+    result = run(create_simple_workflow())
+    assert isinstance(result, ExecutionResult)
+    assert result["status"] == "SUCCESS"
+    assert set(result) == {"status", "startedAt", "finishedAt", "executionTime", "runData"}
+    # runData 的 repr 视图按需构建并缓存
+    assert result._legacy_run_data is None
+    run_data = result["runData"]
+    assert "'processedBy': 'Step'" in run_data["Step"][0]
+    assert result["runData"] is run_data
+
+def test_result_task_data_is_structured():
+    result = run(create_simple_workflow())
+    task = result.task_data()["Step"][0]
+    assert task.execution_status == TaskExecutionStatus.SUCCESS
+    assert task.start_time > 0
+    assert task.execution_time >= 0
+    assert [e.json_data["id"] for e in task.data["main"][0]] == [1, 2]
+
+def test_result_json_streaming_matches_to_json():
+    result = run(create_simple_workflow())
+    text = result.to_json()
+    assert "".join(result.iter_json()) == text
+    parsed = json.loads(text)
+    assert parsed["runData"]["Step"][0]["data"]["main"][0][1]["json"] == {"id": 2, "processedBy": "Step"}
+
+def test_error_result_carries_error_field():
+    wf = Workflow("wfEmpty", "Empty", [Node("Start", "trigger", disabled=True)], {}, True)
+    result = WorkflowExecutor(wf).execute_workflow()
+    assert result["status"] == "ERROR"
+    assert result["error"]["message"] == "No valid start nodes found"
+    assert json.loads("".join(result.iter_json()))["error"]["message"] == "No valid start nodes found"
+
+def test_hook_receives_structured_result():
+    seen = []
+    hooks = HookManager()
+    hooks.register_hook("workflowExecuteAfter", lambda **kw: seen.append(kw["result"]))
+    result = run(create_simple_workflow(), hook_manager=hooks)
+    assert seen == [result]
+    assert seen[0].node_results["Step"][0].data[0][0]["id"] == 1
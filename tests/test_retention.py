@@ -0,0 +1,87 @@
+# tests/test_retention.py
+
+import os
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.data_model import WorkflowSettings
+from engine.executor import WorkflowExecutor
+from engine.models import NodeResult
+from engine.retention import (
+    KeepAll, KeepLastRun, KeepSinkNodes, SampleItems, SpillToDisk, RetentionPolicy,
+)
+
+def create_chain_workflow(settings=None):
+    """
+    Start(trigger) -> A(processor) -> B(processor)
+    """
+    nodes = [Node("Start", "trigger"), Node("A", "processor"), Node("B", "processor")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("A", "main", 0)]]},
+        "A": {"main": [[ConnectionInfo("B", "main", 0)]]},
+    }
+    return Workflow("wfRetention", "RetentionTest", nodes, connections, True, settings=settings)
+
+ITEMS = [{"id": i} for i in range(10)]
+
+def run(wf, **kwargs):
+    executor = WorkflowExecutor(wf, mode="trigger", **kwargs)
+    result = executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": ITEMS})
+    return executor, result
+
+def test_default_keeps_everything():
+    executor, _ = run(create_chain_workflow())
+    assert isinstance(executor.retention, KeepAll)
+    assert len(executor.run_data["A"][0].data[0]) == 10
+
+def test_keep_sink_nodes_releases_intermediate_data():
+    executor, result = run(create_chain_workflow(), retention=KeepSinkNodes())
+    assert result["status"] == "SUCCESS"
+    a = executor.run_data["A"][0]
+    assert a.data is None and a.streamed_items == 10
+    assert a.execution_time is not None
+    # 下游仍拿到了完整数据
+    assert executor.run_data["B"][0].data[0][9] == {"id": 9, "processedBy": "B"}
+
+def test_keep_sink_nodes_honours_destination_node():
+    executor = WorkflowExecutor(create_chain_workflow(), mode="trigger", retention=KeepSinkNodes())
+    executor.execute_workflow(start_node_names=["Start"], destination_node="A", start_inputs={"Start": ITEMS})
+    assert len(executor.run_data["A"][0].data[0]) == 10
+
+def test_keep_last_run():
+    policy = KeepLastRun()
+    run_data = {}
+    policy.record(run_data, "X", NodeResult(data=[[{"n": 1}]]), False)
+    policy.record(run_data, "X", NodeResult(data=[[{"n": 2}]]), False)
+    assert [r.data for r in run_data["X"]] == [[[{"n": 2}]]]
+
+def test_sample_items():
+    executor, _ = run(create_chain_workflow(), retention=SampleItems(3))
+    assert [it["id"] for it in executor.run_data["A"][0].data[0]] == [0, 1, 2]
+    assert len(executor.run_data["B"][0].data[0]) == 10
+
+def test_spill_to_disk(tmp_path):
+    policy = SpillToDisk(str(tmp_path))
+    executor, result = run(create_chain_workflow(), retention=policy)
+    spilled = executor.run_data["A"][0]
+    assert os.path.exists(spilled.path)
+    assert spilled.data[0][0] == {"id": 0, "processedBy": "A"}
+    assert "'processedBy': 'A'" in result["runData"]["A"][0]
+    policy.cleanup()
+    assert not os.listdir(tmp_path)
+
+@pytest.mark.parametrize("success, error, expected", [
+    (None, None, KeepAll),
+    ("all", "none", RetentionPolicy),
+    ("none", "none", KeepSinkNodes),
+])
+def test_from_settings(success, error, expected):
+    settings = WorkflowSettings(save_data_success_execution=success, save_data_error_execution=error)
+    assert isinstance(RetentionPolicy.from_settings(settings), expected)
+
+def test_settings_prune_on_success():
+    settings = WorkflowSettings(save_data_success_execution="none", save_data_error_execution="all")
+    executor, result = run(create_chain_workflow(settings))
+    assert result["status"] == "SUCCESS"
+    assert executor.run_data["A"][0].data is None
+    assert executor.run_data["A"][0].streamed_items == 10
+    assert len(executor.run_data["B"][0].data[0]) == 10
@@ -0,0 +1,113 @@
+# tests/test_retry.py
+
+import asyncio
+import random
+import time
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.node_model import WorkflowNode
+from engine.async_executor import AsyncWorkflowExecutor
+from engine.executor import WorkflowExecutor
+from engine.hooks import HookManager
+from engine.models import NodeResult
+from engine.node_types import NodeType
+from engine.registry import NodeTypeRegistry
+from engine.retry import RetryPolicy
+
+def test_exponential_backoff_with_max_delay():
+    policy = RetryPolicy(max_retries=5, delay=0.1, backoff=2.0, max_delay=0.5)
+    assert [policy.delay_for(n) for n in range(1, 6)] == pytest.approx([0.1, 0.2, 0.4, 0.5, 0.5])
+
+def test_jitter_only_shortens_delay():
+    policy = RetryPolicy(max_retries=1, delay=1.0, jitter=0.5)
+    rng = random.Random(7)
+    delays = [policy.delay_for(1, rng) for _ in range(100)]
+    assert all(0.5 <= d <= 1.0 for d in delays)
+    assert len(set(delays)) > 1
+
+def test_policy_from_workflow_node_fields():
+    node = WorkflowNode(name="A", retry_on_fail=True, max_tries=3, wait_between_tries=250)
+    policy = RetryPolicy.from_node(node)
+    assert policy.max_retries == 2
+    assert policy.delay == pytest.approx(0.25)
+    # parameters 优先
+    node.parameters = {"maxRetries": 4, "retryDelay": 1, "retryBackoff": 3}
+    policy = RetryPolicy.from_node(node)
+    assert (policy.max_retries, policy.delay, policy.backoff) == (4, 1.0, 3.0)
+
+class FlakyNodeType(NodeType):
+    """
+    第一次调用失败，之后成功；记录每次调用。
+    """
+    def __init__(self, name, log):
+        super().__init__(name)
+        self.log = log
+
+    def execute(self, context):
+        self.log.append((context.node_name, time.monotonic()))
+        if sum(1 for nm, _ in self.log if nm == context.node_name) == 1:
+            raise RuntimeError("flaky")
+        return NodeResult(data=[[{"ok": True}]])
+
+class LoggingNodeType(NodeType):
+    def __init__(self, name, log):
+        super().__init__(name)
+        self.log = log
+
+    def execute(self, context):
+        self.log.append((context.node_name, time.monotonic()))
+        return super().execute(context)
+
+def create_branching_workflow(log):
+    """
+    Start(trigger) -> Other(logging)
+                   -> Flaky(retryOnFail, retryDelay=0.2)
+    顺序模式下 Flaky 先出栈：第一次失败后进入延迟队列，Other 随即执行。
+    """
+    registry = NodeTypeRegistry()
+    registry.register("flaky", FlakyNodeType("flaky", log))
+    registry.register("logging", LoggingNodeType("logging", log))
+    nodes = [
+        Node("Start", "trigger"),
+        Node("Flaky", "flaky", parameters={"onError": "retryOnFail", "maxRetries": 1, "retryDelay": 0.2}),
+        Node("Other", "logging"),
+    ]
+    connections = {"Start": {"main": [[ConnectionInfo("Other", "main", 0), ConnectionInfo("Flaky", "main", 0)]]}}
+    return Workflow("wfRetry", "RetryTest", nodes, connections, True), registry
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_retry_does_not_block_other_branches(max_workers):
+    log = []
+    wf, registry = create_branching_workflow(log)
+    before = []
+    hooks = HookManager()
+    hooks.register_hook("nodeExecuteBefore", lambda **kw: before.append(kw["node"].name))
+
+    executor = WorkflowExecutor(wf, node_types=registry, max_workers=max_workers, hook_manager=hooks)
+    result = executor.execute_workflow()
+    assert result["status"] == "SUCCESS"
+
+    names = [nm for nm, _ in log]
+    assert names.count("Flaky") == 2
+    # Other 在 Flaky 的重试之前执行
+    assert names.index("Other") < len(names) - 1 - names[::-1].index("Flaky")
+    flaky_times = [t for nm, t in log if nm == "Flaky"]
+    assert flaky_times[1] - flaky_times[0] >= 0.19
+    # nodeExecuteBefore 每个节点只触发一次
+    assert before.count("Flaky") == 1
+
+def test_retry_async_executor():
+    log = []
+    wf, registry = create_branching_workflow(log)
+    executor = AsyncWorkflowExecutor(wf, node_types=registry)
+    result = asyncio.run(executor.execute_workflow())
+    assert result["status"] == "SUCCESS"
+    assert executor.run_data["Flaky"][0].data == [[{"ok": True}]]
+
+def test_retries_exhausted_stop_workflow():
+    log = []
+    wf, registry = create_branching_workflow(log)
+    wf.nodes["Flaky"].parameters["maxRetries"] = 0
+    result = WorkflowExecutor(wf, node_types=registry).execute_workflow()
+    assert result["status"] == "ERROR"
+    assert result["error"]["nodeName"] == "Flaky"
@@ -0,0 +1,75 @@
+# tests/test_streaming.py
+
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from engine.executor import WorkflowExecutor
+from engine.node_types import NodeType, ProducerNodeType
+from engine.registry import NodeTypeRegistry
+
+def create_chain_workflow(length: int, node_type: str = "processor"):
+    """
+    Start(trigger) -> Step0 -> Step1 -> ... -> Step{length-1}
+    """
+    nodes = [Node("Start", "trigger")]
+    connections = {}
+    prev = "Start"
+    for i in range(length):
+        name = f"Step{i}"
+        nodes.append(Node(name, node_type))
+        connections[prev] = {"main": [[ConnectionInfo(name, "main", 0)]]}
+        prev = name
+    return Workflow("wfStream", "StreamTest", nodes, connections, True)
+
+def run_chain(wf, items, **kwargs):
+    executor = WorkflowExecutor(wf, mode="trigger", **kwargs)
+    result = executor.execute_workflow(start_node_names=["Start"], start_inputs={"Start": items})
+    assert result["status"] == "SUCCESS"
+    return executor
+
+def test_streaming_matches_materialized_output():
+    wf = create_chain_workflow(6)
+    items = [{"id": i} for i in range(2500)]
+
+    plain = run_chain(wf, items)
+    streamed = run_chain(wf, items, streaming=True, stream_chunk_size=100)
+
+    assert streamed.run_data["Step5"][0].data == plain.run_data["Step5"][0].data
+    # 中间节点只记录 item 数，不物化输出
+    for i in range(5):
+        res = streamed.run_data[f"Step{i}"][0]
+        assert res.data is None
+        assert res.streamed_items == 2500
+
+def test_streaming_processes_chunk_by_chunk():
+    log = []
+
+    class TracingNodeType(NodeType):
+        def process_items(self, items, context):
+            log.append((context.node_name, len(items)))
+            return super().process_items(items, context)
+
+    registry = NodeTypeRegistry()
+    registry.register("tracing", TracingNodeType)
+    wf = create_chain_workflow(3, node_type="tracing")
+
+    run_chain(wf, [{"id": i} for i in range(25)], node_types=registry, streaming=True, stream_chunk_size=10)
+
+    # 第一块先流经整条链路，再读取下一块
+    assert log[:4] == [("Step0", 10), ("Step1", 10), ("Step2", 10), ("Step0", 10)]
+    assert log[-1] == ("Step2", 5)
+
+def test_non_item_wise_nodes_break_the_chain():
+    assert NodeType.streamable
+    assert not ProducerNodeType.streamable
+
+    nodes = [Node("Start", "trigger"), Node("A", "processor"), Node("P", "producer"), Node("B", "processor")]
+    connections = {
+        "Start": {"main": [[ConnectionInfo("A", "main", 0)]]},
+        "A": {"main": [[ConnectionInfo("P", "main", 0)]]},
+        "P": {"main": [[ConnectionInfo("B", "main", 0)]]},
+    }
+    wf = Workflow("wfStreamBreak", "StreamBreak", nodes, connections, True)
+    executor = run_chain(wf, [{"id": 1}], streaming=True)
+
+    # A 后面是 producer，无法组成链路 => 照常物化
+    assert executor.run_data["A"][0].data == [[{"id": 1, "processedBy": "A"}]]
+    assert executor.run_data["B"][0].data == [[{"id": 1, "processedBy": "B"}]]
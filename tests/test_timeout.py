@@ -0,0 +1,169 @@
+# tests/test_timeout.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.data_model import WorkflowSettings
+from graph.models.http_model import ThreadedAbortSignal
+from engine.async_executor import AsyncWorkflowExecutor
+from engine.context import NodeExecutionContext
+from engine.executor import WorkflowExecutor
+from engine.models import ExecutionCancelled, NodeResult
+from engine.node_types import AsyncNodeType, ConditionNodeType, NodeType, SwitchNodeType
+from engine.registry import NodeTypeRegistry
+
+class RunawayNodeType(NodeType):
+    """
+    长时间运行但会检查取消信号的节点。
+    """
+    calls = []
+
+    def execute(self, context):
+        RunawayNodeType.calls.append(context.node_name)
+        for _ in range(1000):
+            context.check_aborted()
+            time.sleep(0.01)
+        return NodeResult(data=[list(context.input_data)])
+
+class SlowNodeType(NodeType):
+    """
+    不检查取消信号、耗时固定的节点。
+    """
+    calls = []
+
+    def execute(self, context):
+        SlowNodeType.calls.append(context.node_name)
+        time.sleep(0.1)
+        return NodeResult(data=[list(context.input_data)])
+
+class HangingAsyncNodeType(AsyncNodeType):
+    async def execute(self, context):
+        await asyncio.sleep(10)
+        return NodeResult(data=[list(context.input_data)])
+
+class SlowItemsNodeType(NodeType):
+    def process_items(self, items, context):
+        for item in items:
+            yield item
+
+@pytest.fixture
+def registry():
+    reg = NodeTypeRegistry()
+    reg.register("runaway", RunawayNodeType)
+    reg.register("slow", SlowNodeType)
+    reg.register("hang", HangingAsyncNodeType)
+    RunawayNodeType.calls = []
+    SlowNodeType.calls = []
+    return reg
+
+def create_chain(node_type, length, parameters=None, settings=None):
+    """
+    Start(trigger) -> N0 -> ... -> N{length-1}
+    """
+    nodes = [Node("Start", "trigger")] + [
+        Node(f"N{i}", node_type, parameters=dict(parameters or {})) for i in range(length)
+    ]
+    connections = {}
+    prev = "Start"
+    for i in range(length):
+        connections[prev] = {"main": [[ConnectionInfo(f"N{i}", "main", 0)]]}
+        prev = f"N{i}"
+    return Workflow("wfTimeout", "TimeoutTest", nodes, connections, True, settings=settings)
+
+class SignalProbeNodeType(NodeType):
+    signals = []
+
+    def execute(self, context):
+        SignalProbeNodeType.signals.append(context.abort_signal)
+        return NodeResult(data=[list(context.input_data)])
+
+def test_abort_signal_only_when_needed(registry):
+    registry.register("probe", SignalProbeNodeType)
+    SignalProbeNodeType.signals = []
+    wf = create_chain("probe", 1)
+    WorkflowExecutor(wf, node_types=registry).execute_workflow()
+    WorkflowExecutor(wf, node_types=registry, timeout=5).execute_workflow()
+    signal = ThreadedAbortSignal()
+    WorkflowExecutor(wf, node_types=registry).execute_workflow(abort_signal=signal)
+    # 没有超时、也没有外部信号时不创建信号，逐 item 循环不做取消检查
+    assert SignalProbeNodeType.signals[0] is None
+    assert isinstance(SignalProbeNodeType.signals[1], ThreadedAbortSignal)
+    assert SignalProbeNodeType.signals[2] is signal
+
+def test_timeout_from_settings():
+    wf = create_chain("slow", 1, settings=WorkflowSettings(execution_timeout=30))
+    assert WorkflowExecutor(wf).timeout == 30
+    assert WorkflowExecutor(wf, timeout=5).timeout == 5
+    wf.settings = WorkflowSettings(execution_timeout=-1)
+    assert WorkflowExecutor(wf).timeout is None
+
+def test_runaway_node_is_cancelled(registry):
+    wf = create_chain("runaway", 2)
+    started = time.perf_counter()
+    result = WorkflowExecutor(wf, node_types=registry, timeout=0.2).execute_workflow()
+
+    assert time.perf_counter() - started < 2
+    assert result["status"] == "CANCELED"
+    assert "timed out" in result["error"]["message"]
+    assert RunawayNodeType.calls == ["N0"]
+
+def test_deadline_checked_between_nodes(registry):
+    wf = create_chain("slow", 10)
+    result = WorkflowExecutor(wf, node_types=registry, timeout=0.25).execute_workflow()
+
+    assert result["status"] == "CANCELED"
+    assert 2 <= len(SlowNodeType.calls) < 10
+    assert "N9" not in result["runData"]
+
+def test_cancellation_is_not_retried(registry):
+    wf = create_chain("runaway", 1, parameters={"onError": "retryOnFail", "maxRetries": 3, "retryDelay": 0})
+    result = WorkflowExecutor(wf, node_types=registry, timeout=0.1).execute_workflow()
+    assert result["status"] == "CANCELED"
+    assert RunawayNodeType.calls == ["N0"]
+
+def test_parallel_mode_does_not_wait_for_runaway_node(registry):
+    wf = create_chain("runaway", 1)
+    started = time.perf_counter()
+    result = WorkflowExecutor(wf, node_types=registry, max_workers=4, timeout=0.2).execute_workflow()
+    assert time.perf_counter() - started < 2
+    assert result["status"] == "CANCELED"
+
+def test_external_abort(registry):
+    wf = create_chain("runaway", 1)
+    signal = ThreadedAbortSignal()
+    threading.Timer(0.1, signal.abort).start()
+    result = WorkflowExecutor(wf, node_types=registry).execute_workflow(abort_signal=signal)
+    assert result["status"] == "CANCELED"
+    assert result["error"]["message"] == "Execution was canceled"
+
+def test_no_timeout_runs_to_completion(registry):
+    wf = create_chain("slow", 2)
+    result = WorkflowExecutor(wf, node_types=registry, timeout=5).execute_workflow()
+    assert result["status"] == "SUCCESS"
+
+def test_default_item_loop_checks_signal():
+    signal = ThreadedAbortSignal()
+    signal.abort()
+    context = NodeExecutionContext("Items", [{"i": i} for i in range(10)], abort_signal=signal)
+    with pytest.raises(ExecutionCancelled):
+        SlowItemsNodeType("slowItems").execute(context)
+
+def test_switch_and_condition_loops_check_signal():
+    signal = ThreadedAbortSignal()
+    signal.abort()
+    items = [{"category": "A", "pass": True} for _ in range(10)]
+    for node_type in (SwitchNodeType("Sw"), ConditionNodeType("Cond")):
+        context = NodeExecutionContext(node_type.name, items, abort_signal=signal)
+        with pytest.raises(ExecutionCancelled):
+            node_type.execute(context)
+
+def test_async_timeout_cancels_running_nodes(registry):
+    wf = create_chain("hang", 1)
+    started = time.perf_counter()
+    result = asyncio.run(AsyncWorkflowExecutor(wf, node_types=registry, timeout=0.2).execute_workflow())
+    assert time.perf_counter() - started < 2
+    assert result["status"] == "CANCELED"
+    assert "timed out" in result["error"]["message"]
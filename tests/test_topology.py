@@ -0,0 +1,106 @@
+# tests/test_topology.py
+
+import pytest
+from graph.models.wf_model_old import Workflow, Node, ConnectionInfo
+from graph.models.graph_index import CycleError, topological_levels
+from graph.models.connection_model import ConnectionType, NodeConnection
+from graph.models.node_model import WorkflowNode
+from graph.models import wf_model
+from engine.executor import WorkflowExecutor
+from engine.plan import CompiledWorkflowPlan
+
+def create_workflow(edges, names, conn_type="main"):
+    connections = {}
+    for src, dst, in_idx in edges:
+        connections.setdefault(src, {}).setdefault(conn_type, [[]])[0].append(ConnectionInfo(dst, conn_type, in_idx))
+    nodes = [Node(nm, "trigger" if nm == "Start" else "processor") for nm in names]
+    return Workflow("wfTopo", "Topology", nodes, connections, True)
+
+def create_new_model(edges, names):
+    connections = {}
+    for src, dst in edges:
+        connections.setdefault(src, {}).setdefault("main", [[]])[0].append(NodeConnection(dst, ConnectionType.MAIN, 0))
+    nodes = [WorkflowNode(name=nm, type="processor") for nm in names]
+    return wf_model.Workflow(wf_model.WorkflowParameters(id="wfTopo", nodes=nodes, connections=connections))
+
+DIAMOND = [("Start", "B", 0), ("Start", "A", 0), ("A", "Merge", 0), ("B", "Merge", 1), ("Merge", "End", 0), ("Start", "End", 0)]
+NAMES = ["Start", "A", "B", "Merge", "End"]
+
+def test_levels_old_model():
+    wf = create_workflow(DIAMOND, NAMES)
+    assert wf.get_topological_levels() == [["Start"], ["A", "B"], ["Merge"], ["End"]]
+    assert wf.get_topological_order() == ["Start", "A", "B", "Merge", "End"]
+    assert wf.graph_index.topological_levels() is wf.graph_index.topological_levels()
+    wf.check_acyclic()
+
+def test_levels_new_model():
+    wf = create_new_model([(s, d) for s, d, _ in DIAMOND], NAMES)
+    assert wf.get_topological_levels() == [["Start"], ["A", "B"], ["Merge"], ["End"]]
+    assert wf.get_topological_order() == ["Start", "A", "B", "Merge", "End"]
+
+def test_cycle_reports_offending_nodes():
+    # Start -> A -> B -> C -> A，C -> D（环的下游）
+    edges = [("Start", "A", 0), ("A", "B", 0), ("B", "C", 0), ("C", "A", 1), ("C", "D", 0)]
+    names = ["Start", "A", "B", "C", "D"]
+    for wf in (create_workflow(edges, names), create_new_model([(s, d) for s, d, _ in edges], names)):
+        with pytest.raises(CycleError) as exc_info:
+            wf.get_topological_levels()
+        err = exc_info.value
+        assert err.nodes == ["A", "B", "C"]
+        assert err.cycle == ["A", "B", "C"]
+        assert "A -> B -> C -> A" in str(err)
+        assert isinstance(err, ValueError)
+
+def test_self_loop_and_non_main_connections():
+    wf = create_workflow([("Start", "A", 0), ("A", "A", 1)], ["Start", "A"])
+    with pytest.raises(CycleError) as exc_info:
+        wf.check_acyclic()
+    assert exc_info.value.cycle == ["A"]
+
+    wf = create_new_model([("Start", "A"), ("A", "A")], ["Start", "A"])
+    with pytest.raises(CycleError):
+        wf.check_acyclic()
+
+    # 只有 ai_tool 连接成环时，main 连接的分层不受影响
+    wf = create_workflow([("Agent", "Tool", 0), ("Tool", "Agent", 0)], ["Agent", "Tool"], conn_type="ai_tool")
+    assert wf.get_topological_levels() == [["Agent", "Tool"]]
+    with pytest.raises(CycleError):
+        wf.get_topological_levels("ai_tool")
+
+def test_cycle_between_two_cycles():
+    """
+    两个环及连接它们的节点都被报告，环的下游不报告。
+    """
+    adjacency = {1: [2], 2: [1, 3], 3: [4], 4: [5], 5: [4, 6], 6: []}
+    with pytest.raises(CycleError) as exc_info:
+        topological_levels(list(adjacency), adjacency.__getitem__)
+    assert exc_info.value.nodes == [1, 2, 3, 4, 5]
+    assert exc_info.value.cycle == [1, 2]
+
+def test_executor_rejects_cyclic_workflow():
+    wf = create_workflow([("Start", "A", 0), ("A", "B", 0), ("B", "A", 0)], ["Start", "A", "B"])
+    with pytest.raises(CycleError):
+        WorkflowExecutor(wf)
+
+def test_plan_levels_and_waiting_slots():
+    wf = create_workflow(DIAMOND, NAMES)
+    plan = CompiledWorkflowPlan.for_workflow(wf)
+    assert [[plan.names[i] for i in level] for level in plan.levels] == wf.get_topological_levels()
+    assert plan.level_of[plan.index["Merge"]] == 2
+
+    executor = WorkflowExecutor(wf, max_workers=4)
+    for _ in range(2):
+        result = executor.execute_workflow()
+        assert result["status"] == "SUCCESS"
+        assert len(executor.run_data["Merge"][0].data[0]) == 2
+        assert len(executor.waitingData) == len(plan)
+        assert all(slot is None for slot in executor.waitingData)
+
+def test_partial_execution_start_order():
+    """
+    部分执行的起点按拓扑层排序，与集合的迭代顺序无关。
+    """
+    wf = create_workflow([("A", "C", 0), ("B", "C", 1), ("Start", "B", 0)], ["Start", "A", "B", "C"])
+    executor = WorkflowExecutor(wf)
+    starts = executor._find_start_nodes_in_subgraph({"C", "B", "Start", "A"})
+    assert [n.name for n in starts] == ["Start", "A"]
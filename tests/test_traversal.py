@@ -0,0 +1,170 @@
+# tests/test_traversal.py
+
+import random
+
+from graph.models.connection_model import ConnectionType, NodeConnection
+from graph.models.node_model import WorkflowNode
+from graph.models.utils import get_connected_nodes, get_child_nodes, get_parent_nodes, get_connections_by_destination
+from graph.models.wf_model import Workflow, WorkflowParameters
+
+def conn(node, conn_type=ConnectionType.MAIN, index=0):
+    return NodeConnection(node, conn_type, index)
+
+def chain_connections(n):
+    """
+    N0 -> N1 -> ... -> N{n-1}
+    """
+    return {f"N{i}": {"main": [[conn(f"N{i + 1}")]]} for i in range(n - 1)}
+
+def chain_workflow(n, disabled=()):
+    nodes = [WorkflowNode(name=f"N{i}", type="processor", disabled=f"N{i}" in disabled) for i in range(n)]
+    return Workflow(WorkflowParameters(id="wfChain", nodes=nodes, connections=chain_connections(n)))
+
+def reference_connected_nodes(connections, node_name, connection_type="main", depth=-1, checked_nodes_incoming=None):
+    """
+    原递归实现（每层复制 checked_nodes，list.insert(0) + list.remove 移到最前），作为顺序参照。
+    """
+    if depth == 0:
+        return []
+    if node_name not in connections:
+        return []
+    new_depth = depth - 1 if depth > 0 else -1
+    checked_nodes = checked_nodes_incoming[:] if checked_nodes_incoming else []
+    if node_name in checked_nodes:
+        return []
+    checked_nodes.append(node_name)
+
+    if connection_type == "ALL":
+        types = list(connections[node_name].keys())
+    elif connection_type == "ALL_NON_MAIN":
+        types = [t for t in connections[node_name] if t != ConnectionType.MAIN]
+    else:
+        types = [connection_type]
+
+    return_nodes = []
+    for conn_type in types:
+        if conn_type not in connections[node_name]:
+            continue
+        for connections_by_index in connections[node_name][conn_type]:
+            for connection in connections_by_index:
+                if connection.node in checked_nodes:
+                    continue
+                return_nodes.insert(0, connection.node)
+                add_nodes = reference_connected_nodes(connections, connection.node, connection_type, new_depth, checked_nodes)
+                for parent_node in reversed(add_nodes):
+                    if parent_node in return_nodes:
+                        return_nodes.remove(parent_node)
+                    return_nodes.insert(0, parent_node)
+    return return_nodes
+
+def random_connections(rng, n_nodes, n_edges, acyclic):
+    connections = {}
+    for _ in range(n_edges):
+        a, b = rng.sample(range(n_nodes), 2)
+        if acyclic:
+            a, b = min(a, b), max(a, b)
+        conn_type = ConnectionType.AI_TOOL if rng.random() < 0.2 else ConnectionType.MAIN
+        outputs = connections.setdefault(f"N{a}", {}).setdefault(conn_type.value, [])
+        out_idx = rng.randrange(2)
+        while len(outputs) <= out_idx:
+            outputs.append([])
+        outputs[out_idx].append(conn(f"N{b}", conn_type, rng.randrange(2)))
+    return connections
+
+def test_connected_nodes_match_reference():
+    """
+    随机图（含环、重复边、多种连接类型与深度限制）上与原递归实现逐一对比；
+    原实现在菱形结构中会重复返回同一节点，对比时只保留第一次出现。
+    """
+    rng = random.Random(20240611)
+    for case in range(300):
+        n_nodes = rng.randrange(3, 12)
+        connections = random_connections(rng, n_nodes, rng.randrange(n_nodes, 3 * n_nodes), acyclic=case % 2 == 0)
+        for v in range(n_nodes):
+            for connection_type in ("main", "ai_tool", "ALL", "ALL_NON_MAIN"):
+                for depth in (-1, 1, 2, 3):
+                    expected = reference_connected_nodes(connections, f"N{v}", connection_type, depth)
+                    assert get_connected_nodes(connections, f"N{v}", connection_type, depth) == list(dict.fromkeys(expected))
+        checked = [f"N{rng.randrange(n_nodes)}"]
+        expected = reference_connected_nodes(connections, "N0", "ALL", -1, checked)
+        assert get_connected_nodes(connections, "N0", "ALL", -1, checked) == list(dict.fromkeys(expected))
+
+def test_connected_nodes_on_dense_graph():
+    """
+    每层 8 个节点、相邻层全连接的 40 层图：原实现按路径展开为指数级，现在线性。
+    """
+    width, layers = 8, 40
+    connections = {
+        f"N{layer}_{i}": {"main": [[conn(f"N{layer + 1}_{j}") for j in range(width)]]}
+        for layer in range(layers - 1) for i in range(width)
+    }
+    children = get_child_nodes(connections, "N0_0")
+    assert len(children) == width * (layers - 1)
+    assert children[:width] == [f"N{layers - 1}_{j}" for j in reversed(range(width))]
+    assert children[-1] == "N1_0"
+
+def test_connected_nodes_on_long_chain():
+    """
+    20000 个节点的链路：不再触发 RecursionError，最远的节点在前。
+    """
+    n = 20000
+    connections = chain_connections(n)
+    children = get_child_nodes(connections, "N0")
+    assert len(children) == n - 1
+    assert children[0] == f"N{n - 1}" and children[-1] == "N1"
+
+    wf = chain_workflow(n)
+    parents = wf.get_parent_nodes(f"N{n - 1}")
+    assert parents[0] == "N0" and parents[-1] == f"N{n - 2}"
+
+def test_connected_nodes_order_and_depth():
+    # A -> B -> D, A -> C -> D, D -> E
+    connections = {
+        "A": {"main": [[conn("B"), conn("C")]]},
+        "B": {"main": [[conn("D")]]},
+        "C": {"main": [[conn("D")]]},
+        "D": {"main": [[conn("E")]]},
+    }
+    assert get_child_nodes(connections, "A") == ["E", "D", "C", "B"]
+    assert get_child_nodes(connections, "A", depth=1) == ["C", "B"]
+    assert get_child_nodes(connections, "A", depth=2) == ["D", "C", "B"]
+    assert get_child_nodes(connections, "E") == []
+
+def test_connected_nodes_diamond_without_duplicates():
+    """
+    菱形结构中同一节点只出现一次。
+    """
+    connections = {
+        "A": {"main": [[conn("B"), conn("C")]]},
+        "B": {"main": [[conn("C")]]},
+    }
+    assert get_child_nodes(connections, "A") == ["C", "B"]
+
+def test_connected_nodes_type_filters_and_cycles():
+    connections = {
+        "Agent": {"main": [[conn("Out")]]},
+        "Tool": {"ai_tool": [[conn("Agent", ConnectionType.AI_TOOL)]]},
+        "Model": {"ai_languageModel": [[conn("Agent", ConnectionType.AI_LANGUAGE_MODEL)]]},
+        "Out": {"main": [[conn("Agent")]]},
+    }
+    by_dest = get_connections_by_destination(connections)
+    assert get_parent_nodes(by_dest, "Agent", "ALL_NON_MAIN") == ["Model", "Tool"]
+    assert set(get_parent_nodes(by_dest, "Agent", "ALL")) == {"Out", "Model", "Tool"}
+    assert get_connected_nodes(connections, "Agent") == ["Out"]
+    assert get_connected_nodes(connections, "Agent", checked_nodes_incoming=["Agent"]) == []
+
+def test_highest_node_on_long_chain():
+    n = 20000
+    wf = chain_workflow(n)
+    assert wf.get_highest_node(f"N{n - 1}") == ["N0"]
+
+    wf = chain_workflow(5, disabled={"N0"})
+    assert wf.get_highest_node("N4") == ["N1"]
+    assert wf.get_start_node("N4").name == "N1"
+
+def test_node_connection_indexes_on_long_chain():
+    n = 20000
+    wf = chain_workflow(n)
+    assert wf.get_node_connection_indexes(f"N{n - 1}", "N0") == {"sourceIndex": 0, "destinationIndex": 0}
+    assert wf.get_node_connection_indexes(f"N{n - 1}", "N0", depth=10) is None
+    assert wf.get_node_connection_indexes("N0", "N5") is None